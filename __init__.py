@@ -1,22 +1,70 @@
-from .balanced_ordering import balanced_ordering
+from .balanced_ordering import ORDERING_ENGINES, OrderingResult, balanced_ordering, bounded_balanced_ordering
+from .batch_layout import batch_layout
+from .checkpoint import Checkpoint
+from .compaction import grid_compaction
 from .crossing_removal import crossing_removal
 from .diagonal_layout_and_movement import diagonal_layout_and_movement
-from .edge_construction import edge_construction
+from .edge_construction import direction_flags, edge_construction
+from .estimate import estimate_layout
+from .export import export_glb, export_graph, export_obj
 from .general_position_drawing import general_position_drawing
 from .graph import Graph
+from .greedy_3_coloring import greedy_3_coloring
 from .helper import *
+from .initial_ordering import ORDERING_STRATEGIES, initial_ordering
+from .layout import LayoutResult, layout, working_graph
+from .layout_arrays import LayoutArrays, layout_arrays
+from .layout_store import LayoutStore
 from .movement_special import movement_special
 from .lovasz_3_coloring import lovasz_3_coloring
+from .memory import MemoryMeter
+from .metrics import drawing_metrics, graph_metrics
+from .streamed_drawing import stream_drawing_layout
 from .port_assignment import port_assignment
+from .ports import PortMap, port_index
+from .route_store import DeltaRoutes, RouteStore
+from .server import LayoutClient, LayoutServer
+from .spatial_index import SpatialIndex
 
 __all__ = [
     "balanced_ordering",
+    "bounded_balanced_ordering",
+    "OrderingResult",
+    "ORDERING_ENGINES",
+    "batch_layout",
+    "Checkpoint",
+    "grid_compaction",
     "crossing_removal",
     "diagonal_layout_and_movement",
+    "direction_flags",
     "edge_construction",
+    "estimate_layout",
+    "export_glb",
+    "export_graph",
+    "export_obj",
     "general_position_drawing",
     "Graph",
+    "greedy_3_coloring",
+    "ORDERING_STRATEGIES",
+    "initial_ordering",
+    "LayoutResult",
+    "layout",
+    "working_graph",
+    "LayoutArrays",
+    "layout_arrays",
     "movement_special",
     "lovasz_3_coloring",
+    "MemoryMeter",
+    "drawing_metrics",
+    "graph_metrics",
+    "LayoutStore",
+    "stream_drawing_layout",
     "port_assignment",
+    "PortMap",
+    "port_index",
+    "DeltaRoutes",
+    "RouteStore",
+    "LayoutClient",
+    "LayoutServer",
+    "SpatialIndex",
 ]
@@ -0,0 +1,208 @@
+import networkx as nx
+import numpy as np
+import argparse
+import csv
+import fnmatch
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from graph_embedding.graph import Graph
+from graph_embedding.diagonal_layout_and_movement import diagonal_layout_and_movement
+from graph_embedding.export import export_glb, export_obj
+from graph_embedding.balanced_ordering import ORDERING_ENGINES
+from graph_embedding.initial_ordering import ORDERING_STRATEGIES
+from graph_embedding.layout_arrays import layout_arrays
+from graph_embedding.memory import peak_rss_bytes
+
+
+def read_edge_list(path):
+    """
+    Read a graph from a file with one edge per line, given as two vertex ids separated by
+    whitespace. Anything after a "#" is a comment, further columns are ignored, and integer
+    ids are read as ints.
+
+    :param path: Path of the file.
+    :return: The graph object, with vertices in order of first appearance.
+    """
+    G = Graph()
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            if len(fields) < 2:
+                raise ValueError(f"{path}:{number}: expected two vertex ids, got {line.strip()!r}")
+            u, v = (int(x) if x.lstrip("-").isdigit() else x for x in fields[:2])
+            if u == v:
+                raise ValueError(f"{path}:{number}: self-loop at {u}")
+            for w in (u, v):
+                if w not in G:
+                    G.add_vertex(w)
+            G.add_edge(u, v)
+    return G
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _write_json(stem, arrays, report):
+    routes = [arrays.route(i).tolist() for i in range(len(arrays.edges))]
+    with open(stem + ".json", "w") as f:
+        json.dump({
+            "nodes": arrays.nodes,
+            "positions": arrays.positions.tolist(),
+            "edges": arrays.edges,
+            "routes": routes,
+            "report": report,
+        }, f, default=_json_default)
+    return [stem + ".json"]
+
+def _write_npz(stem, arrays, report):
+    np.savez_compressed(
+        stem + ".npz",
+        nodes=np.asarray(arrays.nodes),
+        edges=np.asarray(arrays.edges),
+        positions=arrays.positions,
+        route_points=arrays.route_points,
+        route_offsets=arrays.route_offsets,
+        report=np.asarray(json.dumps(report, default=_json_default)),
+    )
+    return [stem + ".npz"]
+
+def _write_csv(stem, arrays, report):
+    with open(stem + ".positions.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["vertex", "x", "y", "z"])
+        for v, position in zip(arrays.nodes, arrays.positions.tolist()):
+            writer.writerow([v, *position])
+    with open(stem + ".routes.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["start", "end", "point", "x", "y", "z"])
+        for i, (u, v) in enumerate(arrays.edges):
+            for k, point in enumerate(arrays.route(i).tolist()):
+                writer.writerow([u, v, k, *point])
+    return [stem + ".positions.csv", stem + ".routes.csv"]
+
+def _write_mesh(extension, exporter):
+    def write(stem, arrays, report):
+        exporter(stem + extension, arrays.positions, arrays.route_points, arrays.route_offsets)
+        return [stem + extension]
+    return write
+
+WRITERS = {
+    "json": _write_json,
+    "npz": _write_npz,
+    "csv": _write_csv,
+    "obj": _write_mesh(".obj", export_obj),
+    "glb": _write_mesh(".glb", export_glb),
+}
+
+def input_files(path, pattern="*"):
+    """
+    List the edge list files to lay out.
+
+    :param path: A file, or a directory whose files matching pattern are taken in sorted order.
+    :param pattern: Shell pattern for file names in a directory.
+    :return: List of paths.
+    """
+    if os.path.isdir(path):
+        names = sorted(name for name in os.listdir(path) if fnmatch.fnmatch(name, pattern))
+        return [os.path.join(path, name) for name in names if os.path.isfile(os.path.join(path, name))]
+    if os.path.isfile(path):
+        return [path]
+    raise ValueError(f"{path} is neither a file nor a directory")
+
+def _run_job(job):
+    """
+    Lay out one file in a worker process and write the result.
+
+    :param job: Tuple (path, output directory, output format, layout keyword arguments).
+    :return: Dictionary with the file name, size, report or error, total seconds and peak RSS.
+    """
+    path, output, output_format, options = job
+    summary = {"input": path}
+    start = time.perf_counter()
+    try:
+        G = read_edge_list(path)
+        summary["n"] = G.number_of_nodes()
+        summary["m"] = G.number_of_edges()
+        stem = os.path.join(output, os.path.splitext(os.path.basename(path))[0])
+        # The checkpoint option is a flag, the file goes next to the output
+        options = {**options, "checkpoint": stem + ".checkpoint.npz" if options["checkpoint"] else None}
+        report = diagonal_layout_and_movement(G, **options)
+        summary["outputs"] = WRITERS[output_format](stem, layout_arrays(G), report)
+        summary["report"] = report
+    except Exception as e:
+        summary["error"] = f"{type(e).__name__}: {e}"
+    summary["seconds"] = time.perf_counter() - start
+    # Every job runs in a fresh process, so the peak of the process is that of the job alone
+    summary["peak_rss"] = peak_rss_bytes()
+    return summary
+
+def _format_summary(summary):
+    name = os.path.basename(summary["input"])
+    if "error" in summary:
+        return f"{name}: FAILED after {summary['seconds']:.3f}s: {summary['error']}"
+    stages = "  ".join(f"{stage} {seconds:.3f}s" for stage, seconds in summary["report"]["timings"].items())
+    # The peak cannot be read on Windows
+    peak = "" if summary["peak_rss"] is None else f"  peak {summary['peak_rss'] / 2**20:.1f} MiB"
+    return f"{name}: n={summary['n']} m={summary['m']}  {stages}  total {summary['seconds']:.3f}s{peak}"
+
+def main(argv=None):
+    """
+    Lay out one edge list file or a directory of them, see --help.
+
+    :param argv: Command line arguments, defaults to sys.argv[1:].
+    :return: Exit status, 1 if any layout failed.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m graph_embedding",
+        description="Compute 3D orthogonal drawings of graphs given as edge lists.",
+    )
+    parser.add_argument("input", help="edge list file, or directory of edge list files")
+    parser.add_argument("-o", "--output", default=".", help="directory for the results (default: current directory)")
+    parser.add_argument("-f", "--format", choices=sorted(WRITERS), default="json", help="output format (default: json)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of files laid out in parallel (default: 1)")
+    parser.add_argument("--pattern", default="*", help="file name pattern inside a directory (default: *)")
+    parser.add_argument("--strategy", choices=sorted(ORDERING_STRATEGIES), default="insertion", help="initial ordering strategy")
+    parser.add_argument("--ordering-engine", choices=ORDERING_ENGINES, default="sequential",
+                        help="balanced ordering engine: one edge at a time, or batches of disjoint moves per round")
+    parser.add_argument("--coloring", choices=["lovasz", "greedy", "auto"], default="lovasz", help="arc graph colorer")
+    parser.add_argument("--compact", action="store_true", help="collapse unused grid planes")
+    parser.add_argument("--trace-memory", action="store_true", help="report the traced peak memory of every stage (slow)")
+    parser.add_argument("--memory-budget", type=float, help="MiB a job may use; a job whose next stage would not fit fails")
+    parser.add_argument("--checkpoint", action="store_true", help="record every stage next to the output and resume from it")
+    parser.add_argument("--report", help="also write all job summaries to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.jobs < 1:
+        parser.error(f"--jobs must be positive, got {args.jobs}")
+    try:
+        paths = input_files(args.input, args.pattern)
+    except ValueError as e:
+        parser.error(str(e))
+    os.makedirs(args.output, exist_ok=True)
+
+    options = {"compact": args.compact, "strategy": args.strategy, "coloring": args.coloring,
+               "trace_memory": args.trace_memory, "checkpoint": args.checkpoint, "ordering_engine": args.ordering_engine}
+    if args.memory_budget is not None:
+        options["memory_budget"] = int(args.memory_budget * 2**20)
+    jobs = [(path, args.output, args.format, options) for path in paths]
+    summaries = []
+    # One process per job keeps the peak memory of each job separate
+    with multiprocessing.Pool(args.jobs, maxtasksperchild=1) as pool:
+        for summary in pool.imap(_run_job, jobs):
+            print(_format_summary(summary), flush=True)
+            summaries.append(summary)
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(summaries, f, indent=2, default=_json_default)
+    return 1 if any("error" in summary for summary in summaries) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
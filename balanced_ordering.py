@@ -1,8 +1,16 @@
 import networkx as nx
+import numpy as np
+import collections
+import itertools
 import math
+import time
+import warnings
 
 from graph_embedding.graph import Graph
-from graph_embedding.helper import order_neighbor, opposite, succ_index, pred_index, vertex_type
+from graph_embedding.helper import succ_index, pred_index, order_types, imbalance
+from graph_embedding.initial_ordering import initial_ordering
+
+ORDERING_ENGINES = ("sequential", "rounds")
 
 def move1(ordered, v, w):
     """
@@ -81,163 +89,395 @@ def move4opp(ordered, v, type):
     ordered.remove(v)
     ordered.insert(ordered.index(target), v)
 
-def balanced_ordering(graph: Graph):
+class OrderingResult:
     """
-    Perform a balanced ordering on the graph to minimize crossings.
+    Outcome of a bounded run of balanced_ordering.
+
+    The potential is the total imbalance of the order, see order_potential. It is zero exactly
+    when every vertex but the first and the last is balanced.
+    """
+
+    def __init__(self, order, status, moves, potential, potentials, elapsed, round_moves=None):
+        """
+        :param order: The order of vertices reached.
+        :param status: "balanced" if the potential is zero, "converged" if no move applies any more,
+            "stalled" if the moves stopped lowering the potential, "max_moves" or "time_budget"
+            if the run stopped on its budget.
+        :param moves: Number of executed moves.
+        :param potential: Potential of the returned order.
+        :param potentials: Potential before the first move and after every move, or after every
+            round of the rounds engine.
+        :param elapsed: Wall time in seconds.
+        :param round_moves: Number of moves executed in each round of the rounds engine, or None
+            for the sequential engine.
+        """
+        self.order = order
+        self.status = status
+        self.moves = moves
+        self.potential = potential
+        self.potentials = potentials
+        self.elapsed = elapsed
+        self.round_moves = round_moves
+
+    @property
+    def balanced(self):
+        """
+        True if every vertex but the first and the last is balanced.
+        """
+        return self.potential == 0
+
+    @property
+    def rounds(self):
+        """
+        Number of rounds of the rounds engine, or None for the sequential engine.
+        """
+        return None if self.round_moves is None else len(self.round_moves)
+
+    @property
+    def budget_exhausted(self):
+        """
+        True if the run stopped on a budget or a stall rather than at a fixed point.
+        """
+        return self.status in ("stalled", "max_moves", "time_budget")
+
+    def __repr__(self):
+        rounds = "" if self.round_moves is None else f", rounds={self.rounds}"
+        return f"OrderingResult(status={self.status!r}, moves={self.moves}{rounds}, potential={self.potential}, elapsed={self.elapsed:.3f})"
+
+def order_potential(order, types):
+    """
+    Measure how far an order is from balanced: the sum of imbalance over its vertices, leaving
+    out the first and the last. These have types [degree, 0] and [0, degree] in any order, so
+    the balance condition exempts them, and the potential of a cycle or a clique can reach 0.
+
+    :param order: The ordered list of vertices.
+    :param types: Dictionary of the vertex types under order, see order_types.
+    :return: A non-negative integer.
+    """
+    return sum(imbalance(types[v]) for v in order[1:-1])
+
+def _end_imbalance(order, types):
+    """
+    :return: The imbalance of the first and the last vertex of order, the part of the total
+        imbalance that order_potential leaves out.
+    """
+    ends = {order[0], order[-1]} if order else set()
+    return sum(imbalance(types[v]) for v in ends)
+
+def _rerank(order, rank, positions):
+    """
+    Refresh the ranks of the vertices a move may have shifted. A move only reorders the
+    vertices between the lowest and highest position of the vertices it involves.
+
+    :param order: The current order of vertices.
+    :param rank: Dictionary mapping each vertex to its position in order, updated in place.
+    :param positions: Positions, before the move, of the moved and reference vertices.
+    """
+    for i in range(min(positions), max(positions) + 1):
+        rank[order[i]] = i
+
+def _update_potential(graph: Graph, rank, types, affected):
+    """
+    Recompute the types of the affected vertices after a move.
 
     :param graph: The graph object.
-    :return: The balanced order of vertices.
+    :param rank: Dictionary mapping each vertex to its position in the current order.
+    :param types: Dictionary of vertex types, updated in place.
+    :param affected: The vertices whose type may have changed.
+    :return: The change of the total imbalance of all vertices.
     """
-    order = list(graph.nodes)
-    check = list(graph.edges(data=False))
-    degree = max(dict(graph.degree()).values())
+    change = 0
+    for x in affected:
+        succ = sum(1 for y in graph.neighbors(x) if rank[y] > rank[x])
+        new_type = [succ, graph.degree(x) - succ]
+        change += imbalance(new_type) - imbalance(types[x])
+        types[x] = new_type
+    return change
 
-    while check:
-        edge = check[0]  # Get the first edge from the list
-        v, w = edge
+def _find_move(graph: Graph, order, rank, types, degree, v, w):
+    """
+    Find the move that the edge (v, w) allows under the current order, trying moves 1 to 4 in turn.
+
+    :param graph: The graph object.
+    :param order: The current order of vertices.
+    :param rank: Dictionary mapping each vertex to its position in order.
+    :param types: Dictionary of the current vertex types.
+    :param degree: The maximum degree of the graph.
+    :param v: The first vertex of the edge.
+    :param w: The second vertex of the edge.
+    :return: Tuple (move, vertices) such that move(order, *vertices) executes the move, or None.
+        Moves 4 and 4opp are given as moves 1 and 1opp next to the vertex they pass last.
+    """
+    # Retrieve neighbors and their ordered positions, the types are kept up to date by every move
+    ordered_v = sorted(list(graph.neighbors(v)) + [v], key=rank.__getitem__)
+    ordered_w = sorted(list(graph.neighbors(w)) + [w], key=rank.__getitem__)
+    type_v = types[v]
+    type_w = types[w]
+
+    v_in_v = ordered_v.index(v)
+    v_in_w = ordered_w.index(v)
+    w_in_v = ordered_v.index(w)
+    w_in_w = ordered_w.index(w)
 
-        # Retrieve neighbors and their ordered positions
-        ordered_v = order_neighbor(order, list(graph.neighbors(v)) + [v])
-        ordered_w = order_neighbor(order, list(graph.neighbors(w)) + [w])
-        type_v = vertex_type(v, ordered_v)
-        type_w = vertex_type(w, ordered_w)
-
-        v_in_v = ordered_v.index(v)
-        v_in_w = ordered_w.index(v)
-        w_in_v = ordered_v.index(w)
-        w_in_w = ordered_w.index(w)
-
-        v_ind = order.index(v)
-        w_ind = order.index(w)
-
-        moved = False  # Flag to track if any movement occurs
-
-        if opposite(v, w, type_v, type_w, order) and 1 <= succ_index(v, w, ordered_v) <= math.floor(abs(type_v[0] - type_v[1]) / 2):
-            #print(f"executing move 1")
-            move1(order, v, w)
-            moved = True
-        elif opposite(w, v, type_w, type_v, order) and 1 <= pred_index(v, w, ordered_v) <= math.floor(abs(type_w[0] - type_w[1]) / 2):
-            #print(f"executing move 1opp")
-            move1opp(order, v, w)
-            moved = True
-        elif opposite(v, w, type_v, type_w, order) and ordered_v.index(w) > v_in_v + 2:
-            for vi in ordered_v[v_in_v:w_in_v]:
-                for wj in ordered_w[:w_in_w]:
-                    if v_ind < order.index(wj) < order.index(vi):
-                        i = succ_index(v, vi, ordered_v)
-                        j = pred_index(w, wj, ordered_w)
-                        if 1 <= i <= math.floor((type_v[0] - type_v[1]) / 2) and 1 <= j <= math.floor((type_w[0] - type_w[1]) / 2):
-                            #print(f"executing move 2")
-                            move2(order, v, w, vi, wj)
-                            moved = True
-                            break
-                if moved:
-                    break
-        elif opposite(w, v, type_w, type_v, order) and ordered_w.index(v) > w_in_w + 2:
-            for wj in ordered_w[w_in_w:v_in_w]:
-                for vi in ordered_v[:v_in_v]:
-                    if w_ind < order.index(vi) < order.index(wj):
-                        i = pred_index(v, vi, ordered_v)
-                        j = succ_index(w, wj, ordered_w)
-                        if 1 <= i <= math.floor((type_v[0] - type_v[1]) / 2) and 1 <= j <= math.floor((type_w[0] - type_w[1]) / 2):
-                            #print(f"executing move 2opp")
-                            move2(order, w, v, wj, vi)
-                            moved = True
-                            break
-                if moved:
-                    break
-        elif opposite(v, w, type_v, type_w, order) and ordered_v.index(w) > v_in_v + 1:
-            for vi in ordered_v[v_in_v + 1:w_in_v]:
-                if vi in ordered_w:
+    v_ind = rank[v]
+    w_ind = rank[w]
+    # Whether v and w are opposite, see opposite, in either direction
+    opposite_vw = v_ind < w_ind and type_v[0] > type_v[1] and type_w[0] < type_w[1]
+    opposite_wv = w_ind < v_ind and type_w[0] > type_w[1] and type_v[0] < type_v[1]
+
+    if opposite_vw and 1 <= succ_index(v, w, ordered_v) <= math.floor(abs(type_v[0] - type_v[1]) / 2):
+        #print(f"executing move 1")
+        return move1, (v, w)
+    elif opposite_wv and 1 <= pred_index(v, w, ordered_v) <= math.floor(abs(type_w[0] - type_w[1]) / 2):
+        #print(f"executing move 1opp")
+        return move1opp, (v, w)
+    elif opposite_vw and ordered_v.index(w) > v_in_v + 2:
+        for vi in ordered_v[v_in_v:w_in_v]:
+            for wj in ordered_w[:w_in_w]:
+                if v_ind < rank[wj] < rank[vi]:
                     i = succ_index(v, vi, ordered_v)
-                    j = pred_index(w, vi, ordered_w)
-                    if 1 <= i <= math.floor(abs(type_v[0] - type_v[1]) / 2 - 1) and 1 <= j <= math.floor(abs(type_w[0] - type_w[1]) / 2 - 1):
-                        #print(f"executing move 3")
-                        move3(order, v, w, vi)
-                        moved = True
-                        break
-        elif opposite(w, v, type_w, type_v, order) and ordered_w.index(v) > w_in_w + 1:
-            for wj in ordered_w[w_in_w + 1:v_in_w]:
-                if wj in ordered_v:
+                    j = pred_index(w, wj, ordered_w)
+                    if 1 <= i <= math.floor((type_v[0] - type_v[1]) / 2) and 1 <= j <= math.floor((type_w[0] - type_w[1]) / 2):
+                        #print(f"executing move 2")
+                        return move2, (v, w, vi, wj)
+    elif opposite_wv and ordered_w.index(v) > w_in_w + 2:
+        for wj in ordered_w[w_in_w:v_in_w]:
+            for vi in ordered_v[:v_in_v]:
+                if w_ind < rank[vi] < rank[wj]:
+                    i = pred_index(v, vi, ordered_v)
                     j = succ_index(w, wj, ordered_w)
-                    i = pred_index(v, wj, ordered_v)
-                    if 1 <= i <= math.floor(abs(type_v[0] - type_v[1]) / 2 - 1) and 1 <= j <= math.floor(abs(type_w[0] - type_w[1]) / 2 - 1):
-                        #print(f"executing move 3opp")
-                        move3(order, w, v, wj)
-                        moved = True
-                        break
-        elif len(ordered_v) - 1 == degree:
-            if type_v[0] - type_v[1] == 0:
-                unbalanced = False
-            else:
-                unbalanced = True
-                if type_v[0] > type_v[1]:
-                    for i in range(1, math.floor(abs((type_v[0] - type_v[1]) / 2)) + 1):
-                        vi = ordered_v[v_in_v + i]
-                        ordered_vi = order_neighbor(order, list(graph.neighbors(vi)) + [vi])
-                        type_vi = vertex_type(vi, ordered_vi)
-                        if type_vi[0] - type_vi[1] == 0:
-                            unbalanced = False
-                            break
-                    if unbalanced:
-                        #print(f"executing move 4 on {edge}")
-                        move4(order, v, type_v)
-                        moved = True
-                else:
-                    for i in range(1, math.floor(abs((type_v[0] - type_v[1]) / 2)) + 1):
-                        vi = ordered_v[v_in_v - i]
-                        ordered_vi = order_neighbor(order, list(graph.neighbors(vi)) + [vi])
-                        type_vi = vertex_type(vi, ordered_vi)
-                        if type_vi[0] - type_vi[1] == 0:
-                            unbalanced = False
-                            break
-                    if unbalanced:
-                        #print(f"executing move 4opp")
-                        move4opp(order, v, type_v)
-                        moved = True
-        elif len(ordered_w) - 1 == degree:
-            if (type_w[0] - type_w[1]) == 0:
-                unbalanced = False
-            else:
-                unbalanced = True
-                if type_w[0] > type_w[1]:
-                    for i in range(1, math.floor(abs((type_w[0] - type_w[1]) / 2)) + 1):
-                        wi = ordered_w[w_in_w + i]
-                        ordered_wi = order_neighbor(order, list(graph.neighbors(wi)) + [wi])
-                        type_wi = vertex_type(wi, ordered_wi)
-                        if type_wi[0] - type_wi[1] == 0:
-                            unbalanced = False
-                            break
-                    if unbalanced:
-                        #print(f"executing move 4")
-                        move4(order, w, type_w)
-                        moved = True
-                elif type_w[0] < type_w[1]:
-                    for i in range(1, math.floor(abs((type_w[0] - type_w[1]) / 2)) + 1):
-                        wi = ordered_w[w_in_w - i]
-                        ordered_wi = order_neighbor(order, list(graph.neighbors(wi)) + [wi])
-                        type_wi = vertex_type(wi, ordered_wi)
-                        if type_wi[0] - type_wi[1] == 0:
-                            unbalanced = False
-                            break
-                    if unbalanced:
-                        #print(f"executing move 4opp")
-                        move4opp(order, w, type_w)
-                        moved = True
-
-        if moved:
-            # If a movement occurred, extend `check` with edges of affected neighbors
-            for x in set(graph.neighbors(v)).union(set(graph.neighbors(w))):
-                for e in graph.edges(x, data=False):
-                    in_check = False
-                    for e2 in check:
-                        if ((e[0] == e2[0] and e[1] == e2[1]) or (e[1] == e2[0] and e[0] == e2[1])):
-                            in_check = True
-                    #if edge not in check:  # Check if the edge is already in `check`
-                    if not in_check:
-                        check.append(edge)
+                    if 1 <= i <= math.floor((type_v[0] - type_v[1]) / 2) and 1 <= j <= math.floor((type_w[0] - type_w[1]) / 2):
+                        #print(f"executing move 2opp")
+                        return move2, (w, v, wj, vi)
+    elif opposite_vw and ordered_v.index(w) > v_in_v + 1:
+        for vi in ordered_v[v_in_v + 1:w_in_v]:
+            if vi in ordered_w:
+                i = succ_index(v, vi, ordered_v)
+                j = pred_index(w, vi, ordered_w)
+                if 1 <= i <= math.floor(abs(type_v[0] - type_v[1]) / 2 - 1) and 1 <= j <= math.floor(abs(type_w[0] - type_w[1]) / 2 - 1):
+                    #print(f"executing move 3")
+                    return move3, (v, w, vi)
+    elif opposite_wv and ordered_w.index(v) > w_in_w + 1:
+        for wj in ordered_w[w_in_w + 1:v_in_w]:
+            if wj in ordered_v:
+                j = succ_index(w, wj, ordered_w)
+                i = pred_index(v, wj, ordered_v)
+                if 1 <= i <= math.floor(abs(type_v[0] - type_v[1]) / 2 - 1) and 1 <= j <= math.floor(abs(type_w[0] - type_w[1]) / 2 - 1):
+                    #print(f"executing move 3opp")
+                    return move3, (w, v, wj)
+    elif len(ordered_v) - 1 == degree:
+        return _move4(order, types, v, type_v, ordered_v, v_in_v, v_ind)
+    elif len(ordered_w) - 1 == degree:
+        return _move4(order, types, w, type_w, ordered_w, w_in_w, w_ind)
+    return None
+
+def _move4(order, types, v, type_v, ordered_v, v_in_v, v_ind):
+    """
+    Check move 4 or 4opp on a vertex of maximum degree: it applies unless one of the
+    neighbours it would pass is already balanced.
+
+    :return: Tuple (move, vertices) as for _find_move, or None.
+    """
+    # A move by zero positions would leave the order unchanged
+    if abs(type_v[0] - type_v[1]) < 2:
+        return None
+    distance = math.floor(abs(type_v[0] - type_v[1]) / 2)
+    step = 1 if type_v[0] > type_v[1] else -1
+    for i in range(1, distance + 1):
+        type_vi = types[ordered_v[v_in_v + step * i]]
+        if type_vi[0] - type_vi[1] == 0:
+            return None
+    # See move4 and move4opp
+    target = order[v_ind + step * distance]
+    return (move1 if step == 1 else move1opp), (v, target)
+
+def _select_round(graph: Graph, order, rank, types, degree, full, check, limit):
+    """
+    Evaluate the move of every queued edge against the current order, and select moves that
+    can be executed together.
+
+    The necessary conditions of the moves are first checked for all edges at once: moves 1 to
+    3 need v and w opposite and move 4 a vertex of maximum degree that is not balanced. The
+    remaining edges are searched in queue order, and a move is selected if the closed
+    neighbourhoods of its edge and the vertices it refers to are disjoint from those of the
+    moves selected before it. The moves then neither change the types their conditions read nor
+    move each other's reference vertices, so they can be executed in any order.
+
+    :param graph: The graph object.
+    :param order: The current order of vertices.
+    :param rank: Dictionary mapping each vertex to its position in order.
+    :param types: Dictionary of the current vertex types.
+    :param degree: The maximum degree of the graph.
+    :param full: Dictionary telling for each vertex whether its degree is the maximum.
+    :param check: The queue of edges to check.
+    :param limit: Maximum number of moves to select, or None for no limit.
+    :return: Tuple (selected, idle): a list of (edge, (move, vertices)) in queue order, and a
+        list of the edges that allow no move.
+    """
+    edges = list(check)
+    columns = np.array([(rank[v], rank[w], types[v][0] - types[v][1], types[w][0] - types[w][1],
+                         full[v], full[w]) for v, w in edges],
+                       dtype=np.int64).reshape(-1, 6)
+    rank_v, rank_w, diff_v, diff_w, full_v, full_w = columns.T
+    opposite = ((rank_v < rank_w) & (diff_v > 0) & (diff_w < 0)) | ((rank_w < rank_v) & (diff_w > 0) & (diff_v < 0))
+    unbalanced = ((full_v == 1) & (np.abs(diff_v) >= 2)) | ((full_w == 1) & (np.abs(diff_w) >= 2))
+    candidate = (opposite | unbalanced).tolist()
+
+    selected = []
+    idle = []
+    claimed = set()
+    for edge, maybe in zip(edges, candidate):
+        if not maybe:
+            idle.append(edge)
+            continue
+        v, w = edge
+        footprint = set(graph.neighbors(v)).union(graph.neighbors(w))
+        if not footprint.isdisjoint(claimed):
+            # Deferred to the next round
+            continue
+        found = _find_move(graph, order, rank, types, degree, v, w)
+        if found is None:
+            idle.append(edge)
+            continue
+        footprint.update(found[1])
+        if not footprint.isdisjoint(claimed):
+            continue
+        claimed.update(footprint)
+        selected.append((edge, found))
+        if limit is not None and len(selected) >= limit:
+            break
+    return selected, idle
+
+def bounded_balanced_ordering(graph: Graph, strategy="insertion", max_moves=None, time_budget=None, stall_moves=None, initial=None,
+                              engine="sequential"):
+    """
+    Perform a balanced ordering on the graph, tracking progress and stopping on a budget.
+
+    The run also stops once stall_moves consecutive moves have not lowered the lowest potential
+    seen so far. As the potential is a non-negative integer, this bounds the number of moves by
+    (initial potential + 1) * stall_moves even without a budget.
+
+    The "sequential" engine checks the edge at the head of the queue and executes its move at
+    once. The "rounds" engine checks all queued edges against the same order, executes a
+    maximal set of moves with disjoint neighbourhoods together, see _select_round, and repeats.
+    Both stop at an order in which no queued edge allows a move, but generally not the same one.
+
+    :param graph: The graph object.
+    :param strategy: Name of the initial ordering strategy, see initial_ordering.
+    :param max_moves: Maximum number of moves, or None for no limit.
+    :param time_budget: Maximum wall time in seconds, or None for no limit.
+    :param stall_moves: Number of moves without progress before giving up, defaults to the number of edges.
+    :param initial: Order to continue from instead of the initial ordering given by strategy.
+    :param engine: "sequential" or "rounds".
+    :return: An OrderingResult.
+    """
+    if engine not in ORDERING_ENGINES:
+        raise ValueError(f"Unknown ordering engine {engine!r}, expected one of {list(ORDERING_ENGINES)}")
+    start = time.perf_counter()
+    order = initial_ordering(graph, strategy) if initial is None else list(initial)
+    types = order_types(graph, order)
+    # The total imbalance of all vertices is kept up to date move by move, and the potential
+    # is what is left of it without the two ends of the order
+    potential = order_potential(order, types)
+    total = potential + _end_imbalance(order, types)
+    potentials = [potential]
+    round_moves = [] if engine == "rounds" else None
+    if potential == 0:
+        return OrderingResult(order, "balanced", 0, 0, potentials, time.perf_counter() - start, round_moves)
+
+    moves = 0
+    status = None
+    best_potential = potential
+    since_best = 0
+    if stall_moves is None:
+        stall_moves = graph.number_of_edges()
+    rank = {v: i for i, v in enumerate(order)}
+    # Edges still to check, in order, and the same edges as sets for membership tests
+    check = collections.deque(graph.edges(data=False))
+    queued = set(map(frozenset, check))
+    degree = max(dict(graph.degree()).values())
+    full = {v: d == degree for v, d in graph.degree()}
+
+    while check:
+        if potential == 0:
+            status = "balanced"
+            break
+        if max_moves is not None and moves >= max_moves:
+            status = "max_moves"
+            break
+        if time_budget is not None and time.perf_counter() - start >= time_budget:
+            status = "time_budget"
+            break
+        if since_best >= stall_moves:
+            status = "stalled"
+            break
+
+        if engine == "rounds":
+            limit = None if max_moves is None else max_moves - moves
+            selected, idle = _select_round(graph, order, rank, types, degree, full, check, limit)
+            if idle:
+                # Drop the edges that allow no move from the check list
+                dropped = set(map(frozenset, idle))
+                check = collections.deque(e for e in check if frozenset(e) not in dropped)
+                queued -= dropped
+        else:
+            edge = check[0]  # Get the first edge from the list
+            found = _find_move(graph, order, rank, types, degree, *edge)
+            if found is None:
+                # If no movement occurred, remove the edge from the check list
+                check.popleft()
+                queued.discard(frozenset(edge))
+                continue
+            selected = [(edge, found)]
+        if not selected:
+            continue
+
+        # Positions before the moves bound what they reorder, see _rerank
+        span = [rank[x] for _, (_, vertices) in selected for x in vertices]
+        for _, (move, vertices) in selected:
+            move(order, *vertices)
+        _rerank(order, rank, span)
+        moves += len(selected)
+        neighbourhoods = [set(graph.neighbors(v)).union(set(graph.neighbors(w))) for (v, w), _ in selected]
+        total += _update_potential(graph, rank, types, set().union(*neighbourhoods))
+        potential = total - _end_imbalance(order, types)
+        potentials.append(potential)
+        if round_moves is not None:
+            round_moves.append(len(selected))
+        if potential < best_potential:
+            best_potential = potential
+            since_best = 0
         else:
-            # If no movement occurred, remove the edge from the check list
-            check.remove(edge)
+            since_best += len(selected)
+        # If a movement occurred, extend `check` with edges of affected neighbors
+        for x in itertools.chain.from_iterable(neighbourhoods):
+            for e in graph.edges(x, data=False):
+                key = frozenset(e)
+                if key not in queued:  # Check if the edge is already in `check`
+                    queued.add(key)
+                    check.append(e)
         #print(check)
-    return order
+
+    if status is None:
+        status = "balanced" if potential == 0 else "converged"
+    return OrderingResult(order, status, moves, potential, potentials, time.perf_counter() - start, round_moves)
+
+def balanced_ordering(graph: Graph, strategy="insertion", max_moves=None, time_budget=None, stall_moves=None, engine="sequential"):
+    """
+    Perform a balanced ordering on the graph to minimize crossings.
+
+    :param graph: The graph object.
+    :param strategy: Name of the initial ordering strategy, see initial_ordering.
+    :param max_moves: Maximum number of moves, or None for no limit.
+    :param time_budget: Maximum wall time in seconds, or None for no limit.
+    :param stall_moves: Number of moves without progress before giving up, defaults to the number
+        of edges. A run stopped by that default bound warns with a RuntimeWarning, as its order
+        is not balanced.
+    :param engine: "sequential" or "rounds", see bounded_balanced_ordering.
+    :return: The balanced order of vertices, see bounded_balanced_ordering for the full outcome.
+    """
+    result = bounded_balanced_ordering(graph, strategy, max_moves, time_budget, stall_moves, engine=engine)
+    if result.status == "stalled" and stall_moves is None:
+        warnings.warn(f"balanced_ordering stalled after {result.moves} moves with potential {result.potential}, "
+                      f"the order is not balanced; pass stall_moves to bound the run explicitly", RuntimeWarning, stacklevel=2)
+    return result.order
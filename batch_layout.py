@@ -0,0 +1,171 @@
+import networkx as nx
+import numpy as np
+import itertools
+import multiprocessing
+import os
+import secrets
+from multiprocessing import resource_tracker, shared_memory
+
+from graph_embedding.graph import Graph
+from graph_embedding.diagonal_layout_and_movement import diagonal_layout_and_movement
+from graph_embedding.layout_arrays import LayoutArrays, layout_arrays
+
+
+def _layout_chunk(chunk, shm_name):
+    """
+    Lay out a chunk of graphs in a worker and write the results to shared memory.
+
+    :param chunk: List of (nodes, edges) pairs.
+    :param shm_name: Name of the shared memory block to create, chosen by the parent.
+    :return: Tuple (shm_name, counts) where counts holds (n, P) for each graph.
+    """
+    packed = []
+    for nodes, edges in chunk:
+        G = Graph()
+        for v in nodes:
+            G.add_vertex(v)
+        for u, v in edges:
+            G.add_edge(u, v)
+        diagonal_layout_and_movement(G)
+        packed.append(layout_arrays(G))
+
+    counts = [(len(p.positions), len(p.route_points)) for p in packed]
+    n_total = sum(n for n, _ in counts)
+    p_total = sum(p for _, p in counts)
+    m_total = sum(len(p.route_offsets) for p in packed)
+    size = 4 * 3 * (n_total + p_total) + 8 * m_total
+
+    shm = shared_memory.SharedMemory(name=shm_name, create=True, size=max(size, 1))
+    positions, points, offsets = _chunk_views(shm.buf, n_total, p_total, m_total)
+    positions[:] = np.concatenate([p.positions for p in packed])
+    points[:] = np.concatenate([p.route_points for p in packed])
+    offsets[:] = np.concatenate([p.route_offsets for p in packed])
+    del positions, points, offsets
+    shm.close()
+    # The parent unlinks the block, once it has read it or when the batch ends early
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm.name, counts
+
+
+def _chunk_views(buf, n_total, p_total, m_total):
+    """
+    Split a shared memory buffer into the position, route point and offset arrays of a chunk.
+    """
+    positions = np.ndarray((n_total, 3), dtype=np.int32, buffer=buf)
+    points = np.ndarray((p_total, 3), dtype=np.int32, buffer=buf, offset=12 * n_total)
+    offsets = np.ndarray((m_total,), dtype=np.int64, buffer=buf, offset=12 * (n_total + p_total))
+    return positions, points, offsets
+
+
+def _read_chunk(shm_name, counts, chunk):
+    """
+    Copy the results of a chunk out of shared memory and release the block.
+
+    :return: List of LayoutArrays, one per graph of the chunk.
+    """
+    n_total = sum(n for n, _ in counts)
+    p_total = sum(p for _, p in counts)
+    m_total = sum(len(edges) + 1 for _, edges in chunk)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        positions, points, offsets = _chunk_views(shm.buf, n_total, p_total, m_total)
+        results = []
+        n_start = p_start = m_start = 0
+        for (n, p), (nodes, edges) in zip(counts, chunk):
+            m = len(edges) + 1
+            results.append(LayoutArrays(
+                nodes,
+                edges,
+                positions[n_start:n_start + n].copy(),
+                points[p_start:p_start + p].copy(),
+                offsets[m_start:m_start + m].copy(),
+            ))
+            n_start += n
+            p_start += p
+            m_start += m
+        del positions, points, offsets
+    finally:
+        shm.close()
+        shm.unlink()
+    return results
+
+
+def _discard_block(shm_name):
+    """
+    Unlink a shared memory block of a chunk that was never read, if the worker created it.
+    """
+    try:
+        shm = shared_memory.SharedMemory(name=shm_name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def _chunks(graphs, chunksize):
+    """
+    Group graphs into lists of (nodes, edges) pairs of length chunksize.
+    """
+    iterator = iter(graphs)
+    while True:
+        chunk = [(list(G.nodes), list(G.edges)) for G in itertools.islice(iterator, chunksize)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def _indexed_layout_chunk(item):
+    """
+    Lay out a numbered chunk, keeping its number so results can be matched up in any order.
+    """
+    i, chunk, shm_name = item
+    return i, _layout_chunk(chunk, shm_name)
+
+
+def batch_layout(graphs, processes=None, chunksize=64, ordered=True):
+    """
+    Lay out many graphs over a pool of worker processes.
+
+    Only vertex and edge lists are sent to the workers. The positions and routes come back
+    through one shared memory block per chunk instead of pickled Graph objects. The blocks
+    are named by this process, so that those not read yet are unlinked even when the batch
+    stops early, because the caller stopped iterating or a chunk raised.
+
+    :param graphs: Iterable of graphs.
+    :param processes: Number of worker processes, defaults to the number of CPUs.
+    :param chunksize: Number of graphs handed to a worker at once.
+    :param ordered: If True, yield results in input order. Otherwise yield (index, result)
+        pairs as chunks complete.
+    :return: Generator of LayoutArrays.
+    """
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be positive, got {chunksize}")
+
+    chunks = {}
+    # Blocks handed out and not yet read, by chunk
+    outstanding = {}
+    prefix = f"ge{os.getpid()}_{secrets.token_hex(4)}_"
+
+    def tracked():
+        for i, chunk in enumerate(_chunks(graphs, chunksize)):
+            chunks[i] = chunk
+            outstanding[i] = prefix + str(i)
+            yield i, chunk, outstanding[i]
+
+    try:
+        with multiprocessing.Pool(processes) as pool:
+            mapper = pool.imap if ordered else pool.imap_unordered
+            for i, (shm_name, counts) in mapper(_indexed_layout_chunk, tracked()):
+                chunk = chunks.pop(i)
+                del outstanding[i]
+                results = _read_chunk(shm_name, counts, chunk)
+                for j, result in enumerate(results):
+                    if ordered:
+                        yield result
+                    else:
+                        yield i * chunksize + j, result
+    finally:
+        # The pool is terminated by now, so no worker creates a block after this
+        for shm_name in outstanding.values():
+            _discard_block(shm_name)
@@ -0,0 +1,258 @@
+import networkx as nx
+import numpy as np
+import argparse
+import json
+import random
+import sys
+
+from graph_embedding.graph import Graph
+from graph_embedding.balanced_ordering import bounded_balanced_ordering
+from graph_embedding.diagonal_layout_and_movement import diagonal_layout_and_movement
+from graph_embedding.initial_ordering import ORDERING_STRATEGIES
+
+# Vertex counts of the scaling benchmark, doubling from one to the next. Below a few hundred
+# vertices most stages take about a millisecond, where timer noise makes the fits unstable.
+SCALING_SIZES = (256, 512, 1024, 2048)
+
+# Allowed growth of a stage's scaling exponent, and of its fitted time at the largest size as
+# a fraction of the baseline, before check_scaling reports a regression
+EXPONENT_TOLERANCE = 0.25
+FACTOR_TOLERANCE = 0.5
+
+# Stages faster than this at the largest size are timer noise and not checked
+MIN_SECONDS = 1e-3
+
+
+def build_graph(nx_graph, shuffle_seed=None):
+    """
+    Copy a networkx graph into a Graph, optionally inserting its vertices in shuffled order.
+
+    :param nx_graph: Any networkx graph.
+    :param shuffle_seed: Seed for shuffling the insertion order, or None to keep it.
+    :return: A Graph with the same vertices and edges.
+    """
+    vertices = list(nx_graph.nodes)
+    if shuffle_seed is not None:
+        random.Random(shuffle_seed).shuffle(vertices)
+    G = Graph()
+    for v in vertices:
+        G.add_vertex(v)
+    for u, v in nx_graph.edges:
+        G.add_edge(u, v)
+    return G
+
+def benchmark_graphs():
+    """
+    The benchmark inputs: random 4- and 6-regular graphs of growing size, inserted in random order.
+
+    :return: A dictionary mapping a name to a Graph.
+    """
+    graphs = {}
+    for degree in (4, 6):
+        for n in (20, 50, 100):
+            graphs[f"regular{degree}_{n}"] = build_graph(nx.random_regular_graph(degree, n, seed=n), shuffle_seed=n)
+    return graphs
+
+def ordering_benchmark(graphs=None, strategies=None):
+    """
+    Run balanced_ordering from every initial ordering strategy on the benchmark inputs.
+
+    :param graphs: Dictionary of graphs, defaults to benchmark_graphs().
+    :param strategies: Names of the strategies to compare, defaults to all of them.
+    :return: A dictionary mapping (graph name, strategy) to a dictionary with the number of
+        moves, the wall time and both savings relative to the insertion order.
+    """
+    if graphs is None:
+        graphs = benchmark_graphs()
+    if strategies is None:
+        strategies = list(ORDERING_STRATEGIES)
+
+    results = {}
+    for name, G in graphs.items():
+        runs = {}
+        for strategy in ["insertion"] + [s for s in strategies if s != "insertion"]:
+            result = bounded_balanced_ordering(G, strategy=strategy)
+            runs[strategy] = {"moves": result.moves, "time": result.elapsed}
+        baseline = runs["insertion"]
+        for strategy in strategies:
+            run = runs[strategy]
+            run["moves_saved"] = baseline["moves"] - run["moves"]
+            run["time_saved"] = baseline["time"] - run["time"]
+            results[(name, strategy)] = run
+    return results
+
+def scaling_graphs(sizes=SCALING_SIZES, degree=6, attempts=20, skipped=None):
+    """
+    The inputs of the scaling benchmark: one random regular graph per size, the first seed
+    whose graph the pipeline lays out.
+
+    Seeds whose graph fails are pipeline failures, and choosing only graphs that succeed leans
+    toward easy inputs, so they are recorded in skipped rather than dropped silently.
+
+    :param sizes: Vertex counts.
+    :param degree: Degree of the graphs.
+    :param attempts: Seeds to try per size.
+    :param skipped: Dictionary that receives, for each size with failures, a list of
+        (seed, error message) pairs.
+    :return: A dictionary mapping a size to a networkx graph.
+    """
+    if skipped is None:
+        skipped = {}
+    graphs = {}
+    for n in sizes:
+        for seed in range(attempts):
+            graph = nx.random_regular_graph(degree, n, seed=seed)
+            try:
+                diagonal_layout_and_movement(build_graph(graph), coloring="greedy")
+            except (ValueError, IndexError) as e:
+                skipped.setdefault(n, []).append((seed, f"{type(e).__name__}: {e}"))
+                continue
+            graphs[n] = graph
+            break
+        else:
+            raise ValueError(f"None of {attempts} random {degree}-regular graphs on {n} vertices could be laid out")
+    return graphs
+
+def fit_scaling(edges, seconds):
+    """
+    Fit seconds = coefficient * edges ** exponent by least squares on a log-log scale.
+
+    :param edges: Input sizes.
+    :param seconds: Time taken at each size, all positive.
+    :return: Tuple (exponent, coefficient).
+    """
+    exponent, intercept = np.polyfit(np.log(edges), np.log(seconds), 1)
+    return float(exponent), float(np.exp(intercept))
+
+def scaling_benchmark(graphs=None, repeats=3, **options):
+    """
+    Time every stage of diagonal_layout_and_movement across inputs of growing size and fit
+    its scaling exponent in the number of edges.
+
+    :param graphs: Dictionary mapping a size to a networkx graph, defaults to scaling_graphs().
+    :param repeats: Runs per graph, of which the fastest time of each stage counts.
+    :param options: Keyword arguments of diagonal_layout_and_movement.
+    :return: A dictionary with the number of edges of each input under "edges", for every stage
+        under "stages" its times ("seconds"), "exponent", "coefficient", and the fitted time at
+        the largest input ("fitted"), and under "skipped" the seeds scaling_graphs passed over,
+        if it chose the inputs.
+    """
+    skipped = {}
+    if graphs is None:
+        graphs = scaling_graphs(skipped=skipped)
+    edges = [graph.number_of_edges() for graph in graphs.values()]
+    times = {}
+    for i, graph in enumerate(graphs.values()):
+        for _ in range(repeats):
+            report = diagonal_layout_and_movement(build_graph(graph), **options)
+            for stage, seconds in report["timings"].items():
+                column = times.setdefault(stage, [float("inf")] * len(edges))
+                column[i] = min(column[i], seconds)
+
+    stages = {}
+    for stage, seconds in times.items():
+        if any(np.isinf(seconds)):
+            continue
+        # A zero time, below the timer resolution, would break the logarithm
+        floored = np.maximum(seconds, 1e-7)
+        exponent, coefficient = fit_scaling(edges, floored)
+        stages[stage] = {
+            "seconds": seconds,
+            "exponent": exponent,
+            "coefficient": coefficient,
+            "fitted": coefficient * edges[-1] ** exponent,
+        }
+    return {"edges": edges, "stages": stages, "skipped": skipped}
+
+def save_baseline(path, results):
+    """
+    Write the results of scaling_benchmark as a JSON baseline. Times depend on the machine,
+    so baselines are only comparable on the machine that recorded them.
+
+    :param path: Path of the file.
+    :param results: Dictionary returned by scaling_benchmark.
+    """
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+def load_baseline(path):
+    """
+    :param path: Path of a file written by save_baseline.
+    :return: The results stored in it.
+    """
+    with open(path) as f:
+        return json.load(f)
+
+def check_scaling(results, baseline, exponent_tolerance=EXPONENT_TOLERANCE, factor_tolerance=FACTOR_TOLERANCE, min_seconds=MIN_SECONDS):
+    """
+    Compare scaling results to a baseline.
+
+    A stage regresses if its exponent grew by more than exponent_tolerance, or if its fitted
+    time at the largest input grew by more than the fraction factor_tolerance. Stages faster
+    than min_seconds at the largest input in both runs are skipped.
+
+    :param results: Dictionary returned by scaling_benchmark.
+    :param baseline: Dictionary returned by scaling_benchmark on the same inputs.
+    :param exponent_tolerance: Allowed growth of the exponent.
+    :param factor_tolerance: Allowed relative growth of the fitted time.
+    :param min_seconds: Noise floor.
+    :return: List of messages, one per regression, empty if there is none.
+    """
+    if results["edges"] != baseline["edges"]:
+        raise ValueError(f"Inputs with {results['edges']} edges cannot be compared to a baseline on {baseline['edges']}")
+    regressions = []
+    for stage, base in baseline["stages"].items():
+        if stage not in results["stages"]:
+            continue
+        current = results["stages"][stage]
+        if max(current["seconds"][-1], base["seconds"][-1]) < min_seconds:
+            continue
+        if current["exponent"] > base["exponent"] + exponent_tolerance:
+            regressions.append(f"{stage}: exponent {current['exponent']:.2f}, baseline {base['exponent']:.2f}")
+        if current["fitted"] > (1 + factor_tolerance) * base["fitted"]:
+            regressions.append(f"{stage}: {current['fitted']:.4f}s at {results['edges'][-1]} edges, "
+                               f"baseline {base['fitted']:.4f}s")
+    return regressions
+
+def main(argv=None):
+    """
+    Without arguments, print the ordering benchmark. With --scaling, print the scaling
+    exponents and, given a baseline, check them against it.
+
+    :param argv: Command line arguments, defaults to sys.argv[1:].
+    :return: Exit status, 1 if a stage regressed.
+    """
+    parser = argparse.ArgumentParser(prog="python -m graph_embedding.benchmark")
+    parser.add_argument("--scaling", action="store_true", help="run the scaling benchmark instead of the ordering benchmark")
+    parser.add_argument("--baseline", help="JSON baseline to check the scaling against")
+    parser.add_argument("--update", action="store_true", help="write the scaling results to the baseline instead")
+    parser.add_argument("--coloring", choices=["lovasz", "greedy", "auto"], default="greedy", help="arc graph colorer")
+    args = parser.parse_args(argv)
+
+    if not args.scaling:
+        print(f"{'graph':<14} {'strategy':<14} {'moves':>6} {'saved':>6} {'time':>8} {'saved':>8}")
+        for (name, strategy), run in ordering_benchmark().items():
+            print(f"{name:<14} {strategy:<14} {run['moves']:>6} {run['moves_saved']:>6} "
+                  f"{run['time']:>8.3f} {run['time_saved']:>8.3f}")
+        return 0
+
+    results = scaling_benchmark(coloring=args.coloring)
+    for n, failures in results["skipped"].items():
+        for seed, error in failures:
+            print(f"skipped seed {seed} with {n} vertices: {error}", file=sys.stderr)
+    print(f"{'stage':<18} {'exponent':>8} {'fitted':>10}   edges {results['edges']}")
+    for stage, fit in results["stages"].items():
+        print(f"{stage:<18} {fit['exponent']:>8.2f} {fit['fitted']:>10.4f}")
+    if args.baseline is None:
+        return 0
+    if args.update:
+        save_baseline(args.baseline, results)
+        return 0
+    regressions = check_scaling(results, load_baseline(args.baseline))
+    for regression in regressions:
+        print("REGRESSION", regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
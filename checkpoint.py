@@ -0,0 +1,204 @@
+import networkx as nx
+import numpy as np
+import hashlib
+import json
+import os
+
+from graph_embedding.graph import ARC_ATTRIBUTES, Graph, decode_arc_value, encode_arc_value
+from graph_embedding.balanced_ordering import OrderingResult
+from graph_embedding.ports import PortMap
+from graph_embedding.route_store import RouteStore
+
+# Stages of diagonal_layout_and_movement in order, with what each one writes into the graph:
+# arc attributes, "positions" and "routes"
+STAGES = {
+    "balanced_ordering": (),
+    "movement_special": ("movement", "special"),
+    "port_assignment": ("color", "orientation"),
+    "movement_orders": (),
+    "positions": ("positions",),
+    "edge_construction": ("toward", "anchor", "routes"),
+    "crossing_removal": ("color", "orientation", "toward", "anchor", "routes"),
+    "compaction": ("positions", "routes"),
+}
+
+
+def graph_fingerprint(graph: Graph):
+    """
+    :param graph: The graph object.
+    :return: A hex digest of the vertices and edges of the graph, in order, since the order
+        decides ties in every stage.
+    """
+    edges = [(arcs[0]["start"], arcs[0]["end"]) for _, _, arcs in graph.edges(data="arcs")]
+    return hashlib.sha256(repr((list(graph.nodes), edges)).encode()).hexdigest()
+
+class Checkpoint:
+    """
+    Checkpoints of the stages of diagonal_layout_and_movement, kept in one compressed .npz file.
+
+    After every completed stage, what it wrote into the graph and the values it handed on (the
+    order, the X, Y and Z orders, the reports) are added to the file, with a digest of the
+    inputs of the stage: the graph and the options of this and all earlier stages. Opening the
+    file again restores the leading stages whose digests still match, so that a run can skip
+    them, and drops the rest.
+
+    Only completed stages are recorded: an order cut short by its time budget, or a crossing
+    removal stopped by the deadline, ends the checkpoints of a run.
+    """
+
+    def __init__(self, path, graph: Graph, strategy="insertion", coloring="lovasz", compact=False, engine="sequential"):
+        """
+        :param path: Path of the checkpoint file, read if it exists. None disables checkpoints.
+        :param graph: The graph object, not yet laid out.
+        :param strategy: Initial ordering strategy of the run.
+        :param coloring: Colorer of the run.
+        :param compact: Whether the run compacts the drawing.
+        :param engine: Engine of balanced_ordering in the run.
+        """
+        self.path = path
+        self.nodes = list(graph.nodes)
+        self.index = {v: i for i, v in enumerate(self.nodes)}
+        options = {"balanced_ordering": (strategy, engine), "port_assignment": coloring}
+        self.digests = {}
+        if path is not None:
+            digest = graph_fingerprint(graph)
+            for stage in STAGES:
+                digest = hashlib.sha256(f"{digest}:{stage}:{options.get(stage)}".encode()).hexdigest()
+                self.digests[stage] = digest
+        self.stages = [stage for stage in STAGES if compact or stage != "compaction"]
+        self.completed = []
+        self.arrays = {}
+        if path is not None and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with np.load(self.path) as data:
+            for stage, digest in zip(data["stages"].tolist(), data["digests"].tolist()):
+                if len(self.completed) == len(self.stages) or stage != self.stages[len(self.completed)]:
+                    break
+                if digest != self.digests[stage]:
+                    break
+                self.completed.append(stage)
+            prefixes = tuple(stage + "." for stage in self.completed)
+            self.arrays = {name: data[name] for name in data.files if name.startswith(prefixes)}
+
+    def done(self, stage):
+        """
+        :param stage: Name of a stage.
+        :return: True if the stage was restored from the file and can be skipped.
+        """
+        return stage in self.completed
+
+    def restore(self, graph: Graph):
+        """
+        Write the results of the restored stages into the graph.
+
+        :param graph: The graph object the checkpoint was opened for.
+        :return: The list of restored stages.
+        """
+        nodes = self.nodes
+        for stage in self.completed:
+            for key in STAGES[stage]:
+                values = self.arrays[f"{stage}.{key}"]
+                if key == "positions":
+                    for v, position in zip(nodes, values.tolist()):
+                        graph.nodes[v]["position"] = position
+                elif key == "routes":
+                    # Into a route buffer, as edge_construction leaves them
+                    offsets = self.arrays[f"{stage}.offsets"]
+                    graph.routes = RouteStore.allocate(graph)
+                    for i, (_, _, edge) in enumerate(graph.edges(data=True)):
+                        edge["route"] = graph.routes.set_route(i, values[offsets[i]:offsets[i + 1]])
+                else:
+                    for i, (_, _, arcs) in enumerate(graph.edges(data="arcs")):
+                        for k, arc in enumerate(arcs):
+                            arc[key] = decode_arc_value(key, values[i, k])
+        if self.done("port_assignment"):
+            graph.port_map = PortMap.from_graph(graph)
+        return list(self.completed)
+
+    @property
+    def ordering(self):
+        """
+        The OrderingResult of the restored balanced_ordering stage.
+        """
+        a = self.arrays
+        return OrderingResult(
+            [self.nodes[i] for i in a["balanced_ordering.order"].tolist()],
+            str(a["balanced_ordering.status"]),
+            int(a["balanced_ordering.moves"]),
+            int(a["balanced_ordering.potential"]),
+            a["balanced_ordering.potentials"].tolist(),
+            float(a["balanced_ordering.elapsed"]),
+            a["balanced_ordering.round_moves"].tolist() if "balanced_ordering.round_moves" in a else None,
+        )
+
+    @property
+    def vertex_positions(self):
+        """
+        The [X_order, Y_order, Z_order] lists of the restored movement_orders stage.
+        """
+        return [[self.nodes[i] for i in row] for row in self.arrays["movement_orders.orders"].tolist()]
+
+    @property
+    def compaction(self):
+        """
+        The report of the restored compaction stage.
+        """
+        return json.loads(str(self.arrays["compaction.report"]))
+
+    def save(self, stage, graph: Graph, ordering=None, vertex_positions=None, compaction=None):
+        """
+        Record a completed stage and rewrite the file. Nothing is recorded unless every
+        earlier stage is, so a stage left incomplete ends the checkpoints of the run.
+
+        :param stage: Name of the stage.
+        :param graph: The graph object after the stage.
+        :param ordering: The OrderingResult of balanced_ordering.
+        :param vertex_positions: The [X_order, Y_order, Z_order] lists of movement_orders.
+        :param compaction: The report of grid_compaction.
+        """
+        position = self.stages.index(stage)
+        if self.path is None or self.completed[:position] != self.stages[:position]:
+            return
+        # A stage run again invalidates the stages after it
+        dropped = tuple(name + "." for name in self.completed[position:])
+        self.completed = self.completed[:position] + [stage]
+        if dropped:
+            self.arrays = {name: values for name, values in self.arrays.items() if not name.startswith(dropped)}
+
+        arrays = {}
+        for key in STAGES[stage]:
+            if key == "positions":
+                arrays[key] = np.array([graph.nodes[v]["position"] for v in self.nodes], dtype=np.int64).reshape(-1, 3)
+            elif key == "routes":
+                routes = RouteStore.from_graph(graph) if graph.routes is None else graph.routes.packed()
+                arrays["routes"] = routes.points
+                arrays["offsets"] = routes.offsets
+            else:
+                arrays[key] = np.array([[encode_arc_value(key, arc[key]) for arc in arcs]
+                                        for _, _, arcs in graph.edges(data="arcs")], dtype=np.int8).reshape(-1, 2)
+        if ordering is not None:
+            arrays["order"] = np.array([self.index[v] for v in ordering.order], dtype=np.int64)
+            arrays["status"] = np.array(ordering.status)
+            arrays["moves"] = np.array(ordering.moves)
+            arrays["potential"] = np.array(ordering.potential)
+            arrays["potentials"] = np.array(ordering.potentials, dtype=np.int64)
+            arrays["elapsed"] = np.array(ordering.elapsed)
+            if ordering.round_moves is not None:
+                arrays["round_moves"] = np.array(ordering.round_moves, dtype=np.int64)
+        if vertex_positions is not None:
+            arrays["orders"] = np.array([[self.index[v] for v in row] for row in vertex_positions], dtype=np.int64).reshape(3, -1)
+        if compaction is not None:
+            arrays["report"] = np.array(json.dumps(compaction))
+        self.arrays.update({f"{stage}.{key}": values for key, values in arrays.items()})
+
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as f:
+            np.savez_compressed(
+                f,
+                stages=np.array(self.completed),
+                digests=np.array([self.digests[name] for name in self.completed]),
+                **self.arrays,
+            )
+        os.replace(temporary, self.path)
@@ -0,0 +1,67 @@
+import networkx as nx
+import numpy as np
+
+from graph_embedding.graph import Graph
+
+
+def grid_compaction(graph: Graph):
+    """
+    Collapse the grid planes that carry no vertex or bend, axis by axis.
+
+    Every coordinate is replaced by its rank among the coordinates used on that axis.
+    The map is strictly increasing, so axis-parallel segments stay axis-parallel and
+    the relative order of all points, hence crossing-freeness, is preserved.
+
+    :param graph: A graph on which the layout has been computed.
+    :return: A dictionary with the bounding-box volume before and after compaction.
+    """
+    if graph.routes is not None:
+        return _compact_route_buffer(graph)
+
+    # Route end points alias the vertex position lists, so every point list is collected once
+    points = {}
+    for _, features in graph.nodes(data=True):
+        points[id(features["position"])] = features["position"]
+    for _, _, route in graph.edges(data="route"):
+        for point in route:
+            points[id(point)] = point
+    if not points:
+        return {"volume_before": 0, "volume_after": 0}
+
+    point_lists = list(points.values())
+    coordinates = np.array(point_lists, dtype=np.int64)
+    compacted = np.empty_like(coordinates)
+    for axis in range(3):
+        _, compacted[:, axis] = np.unique(coordinates[:, axis], return_inverse=True)
+
+    for point, new_point in zip(point_lists, compacted.tolist()):
+        point[:] = new_point
+
+    return {
+        "volume_before": int(np.prod(np.ptp(coordinates, axis=0) + 1)),
+        "volume_after": int(np.prod(compacted.max(axis=0) + 1)),
+    }
+
+def _compact_route_buffer(graph: Graph):
+    """
+    grid_compaction for a graph whose routes are views of graph.routes, which hold copies of
+    the vertex positions, so the positions and the route points are compacted together.
+    """
+    positions = [features["position"] for _, features in graph.nodes(data=True)]
+    rows = graph.routes.rows()
+    if not positions and not len(rows):
+        return {"volume_before": 0, "volume_after": 0}
+
+    coordinates = np.concatenate([np.array(positions, dtype=np.int64).reshape(-1, 3), graph.routes.points[rows]])
+    compacted = np.empty_like(coordinates)
+    for axis in range(3):
+        _, compacted[:, axis] = np.unique(coordinates[:, axis], return_inverse=True)
+
+    for position, new_position in zip(positions, compacted[:len(positions)].tolist()):
+        position[:] = new_position
+    graph.routes.points[rows] = compacted[len(positions):]
+
+    return {
+        "volume_before": int(np.prod(np.ptp(coordinates, axis=0) + 1)),
+        "volume_after": int(np.prod(compacted.max(axis=0) + 1)),
+    }
@@ -1,35 +1,140 @@
 import networkx as nx
+import time
 
 from graph_embedding.graph import Graph
-from graph_embedding.balanced_ordering import balanced_ordering
+from graph_embedding.balanced_ordering import bounded_balanced_ordering
+from graph_embedding.checkpoint import Checkpoint
 from graph_embedding.movement_special import movement_special
 from graph_embedding.port_assignment import port_assignment
 from graph_embedding.general_position_drawing import general_position_drawing
+from graph_embedding.memory import MemoryMeter
 
-def diagonal_layout_and_movement(G: Graph):
+# Share of the time left before a deadline that balanced ordering may use, and then that the
+# lovasz coloring may use before port assignment falls back to greedy
+ORDERING_SHARE = 0.5
+COLORING_SHARE = 0.5
+
+def movement_orders(G: Graph, order):
+    """
+    Derive the X, Y and Z vertex orders by moving the start of every movement arc to just
+    after its end in the order of the arc's color.
+
+    :param G: The graph object, with ports assigned.
+    :param order: The balanced order of vertices.
+    :return: The list [X_order, Y_order, Z_order].
+    """
+    vertex_positions = [order, order, order]  #[X_order, Y_order, Z_order]
+    arcs_of_G = G.get_arcs()
+    for arc in arcs_of_G:
+        arc_info = G.get_arc(arc[0],arc[1])
+        if arc_info["movement"]:
+            vertex_positions[arc_info["color"]].remove(arc_info["start"])
+            vertex_positions[arc_info["color"]].insert(order.index(arc_info["end"]) + 1, arc_info["start"])
+    return vertex_positions
+
+def diagonal_layout_and_movement(G: Graph, compact=False, strategy="insertion", coloring="lovasz", deadline=None,
+                                 trace_memory=False, memory_budget=None, checkpoint=None, ordering_engine="sequential",
+                                 workers=None):
     """
     Generate the diagonal layout and movement for the graph based on prior algorithms.
 
     :param G: The graph object.
-    :return: A dictionary containing diagonal layouts and movement details.
+    :param compact: If True, collapse unused grid planes of the final drawing.
+    :param strategy: Initial ordering strategy handed to balanced_ordering.
+    :param coloring: Colorer for the arc graph in port_assignment, see color_arc_graph.
+    :param deadline: Value of time.perf_counter() by which to return. Balanced ordering and
+        crossing removal then stop early, and a lovasz coloring falls back to greedy when it
+        runs long. Port assignment always completes, so the deadline can be overrun. After an
+        ordering cut short, arcs the coloring cannot be transferred to take conflicting colors,
+        see port_assignment, rather than the ordering being finished.
+    :param trace_memory: If True, trace allocations with tracemalloc to report the peak memory
+        of each stage. This slows the layout down several times.
+    :param memory_budget: Bytes of resident memory the process may use. Before each stage its
+        footprint is estimated, and a MemoryError is raised if it would not fit.
+    :param checkpoint: Path of a checkpoint file, see Checkpoint. The results of the stages
+        recorded in it whose inputs are unchanged are restored into G and the stages skipped,
+        and every stage run is recorded in it.
+    :param ordering_engine: Engine of balanced_ordering, "sequential" or "rounds", see
+        bounded_balanced_ordering.
+    :param workers: Number of processes for phase 2 of crossing_removal.
+    :return: A dictionary reporting on the run: the seconds spent in each stage under "timings",
+        under "guarantees" whether the order is balanced ("balanced_order") and whether crossing
+        removal completed without conflicting ports ("no_crossings"), the number of arcs with
+        conflicting colors under "port_conflicts" if the ordering was cut short, and the
+        compaction volumes under "compaction". With trace_memory or memory_budget, the memory
+        of each stage is under "memory", see MemoryMeter. With checkpoint, the stages restored
+        from it are listed under "resumed", and have no timings.
     """
+    with MemoryMeter(G, trace_memory, memory_budget) as memory:
+        report = _layout(G, compact, strategy, coloring, deadline, memory, checkpoint, ordering_engine, workers)
+    if trace_memory or memory_budget is not None:
+        report["memory"] = memory.stages
+    return report
+
+def _layout(G: Graph, compact, strategy, coloring, deadline, memory, checkpoint_path, engine, workers):
+    timings = {}
+    report = {"timings": timings}
+
+    def time_left(share):
+        return None if deadline is None else max(0.0, share * (deadline - time.perf_counter()))
+
+    if deadline is not None and coloring == "lovasz":
+        coloring = "auto"
+    checkpoint = Checkpoint(checkpoint_path, G, strategy, coloring, compact, engine)
+    if checkpoint_path is not None:
+        report["resumed"] = checkpoint.restore(G)
+
     # Step 1: Initialize balanced vertex orderings for X, Y, Z
-    order = balanced_ordering(G)
-    vertex_positions = [order, order, order]  #[X_order, Y_order, Z_order]
+    if checkpoint.done("balanced_ordering"):
+        ordering = checkpoint.ordering
+    else:
+        memory.start("balanced_ordering")
+        start = time.perf_counter()
+        ordering = bounded_balanced_ordering(G, strategy, time_budget=time_left(ORDERING_SHARE), engine=engine)
+        timings["balanced_ordering"] = time.perf_counter() - start
+        memory.stop("balanced_ordering")
+        if ordering.status != "time_budget":
+            checkpoint.save("balanced_ordering", G, ordering=ordering)
+    order = ordering.order
 
     # Step 2: Label arcs as movement or special based on table 2
-    movement_special(G, order)  # Using X_order for arc classification
+    if not checkpoint.done("movement_special"):
+        memory.start("movement_special")
+        start = time.perf_counter()
+        movement_special(G, order)  # Using X_order for arc classification
+        timings["movement_special"] = time.perf_counter() - start
+        memory.stop("movement_special")
+        checkpoint.save("movement_special", G)
 
-    # Step 3: Perform port assignment
-    port_assignment(G, order)
+    # Step 3: Perform port assignment. An order cut short by the deadline can leave vertices
+    # too unbalanced for the coloring to transfer to every arc; finishing the order could take
+    # far longer than the deadline allows, so those arcs take conflicting colors instead.
+    conflicts = [] if ordering.status == "time_budget" else None
+    if not checkpoint.done("port_assignment"):
+        memory.start("port_assignment")
+        start = time.perf_counter()
+        port_assignment(G, order, coloring, time_left(COLORING_SHARE), conflicts)
+        timings["port_assignment"] = time.perf_counter() - start
+        memory.stop("port_assignment")
+        checkpoint.save("port_assignment", G)
 
     # Step 4: Move the end point of movement arcs accordingly
-    arcs_of_G = G.get_arcs()
-    for arc in arcs_of_G:
-        arc_info = G.get_arc(arc[0],arc[1])
-        if arc_info["movement"]:
-            vertex_positions[arc_info["color"]].remove(arc_info["start"])
-            vertex_positions[arc_info["color"]].insert(order.index(arc_info["end"]) + 1, arc_info["start"])
+    if checkpoint.done("movement_orders"):
+        vertex_positions = checkpoint.vertex_positions
+    else:
+        memory.start("movement_orders")
+        start = time.perf_counter()
+        vertex_positions = movement_orders(G, order)
+        timings["movement_orders"] = time.perf_counter() - start
+        memory.stop("movement_orders")
+        checkpoint.save("movement_orders", G, vertex_positions=vertex_positions)
 
     # Generate general position drawing
-    general_position_drawing(G, vertex_positions)
\ No newline at end of file
+    drawing = general_position_drawing(G, vertex_positions, compact, timings, deadline, memory, checkpoint, workers)
+    report["guarantees"] = {"balanced_order": ordering.balanced, "no_crossings": drawing["no_crossings"] and not conflicts}
+    if conflicts is not None:
+        report["port_conflicts"] = len(conflicts)
+    if "compaction" in drawing:
+        report["compaction"] = drawing["compaction"]
+
+    return report
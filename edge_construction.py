@@ -1,7 +1,9 @@
 import networkx as nx
+import numpy as np
 
 from graph_embedding.graph import Graph
 from graph_embedding.helper import perpendicular, missing, point_toward
+from graph_embedding.route_store import RouteStore
 
 def edge_route1(arc1, arc2, graph: Graph):
     step1 = list(graph.nodes[arc1["start"]]["position"])
@@ -79,19 +81,54 @@ def edge_route4(arc1, arc2, graph: Graph):
         arc2["anchor"] = True
         return [graph.nodes[arc1["start"]]["position"], step1, step2, step3, step4, graph.nodes[arc1["end"]]["position"]]
 
+def direction_flags(graph: Graph):
+    """
+    Set the "toward" flag of every arc, whether it points toward its end vertex, see
+    point_toward. The flags are computed for all arcs at once from the positions, and
+    edge_routing reads them instead of the positions, so whoever changes the port of an arc
+    afterwards must update its flag. edge_routing computes a flag that is not set yet itself.
+
+    :param graph: The graph object, with positions and ports assigned.
+    """
+    nodes = list(graph.nodes)
+    index = {v: i for i, v in enumerate(nodes)}
+    positions = np.array([graph.nodes[v]["position"] for v in nodes], dtype=np.int64).reshape(-1, 3)
+    arcs = [arc for _, _, edge_arcs in graph.edges(data="arcs") for arc in edge_arcs]
+    count = len(arcs)
+    starts = np.fromiter((index[arc["start"]] for arc in arcs), dtype=np.int64, count=count)
+    ends = np.fromiter((index[arc["end"]] for arc in arcs), dtype=np.int64, count=count)
+    colors = np.fromiter((arc["color"] for arc in arcs), dtype=np.int64, count=count)
+    orientations = np.fromiter((arc["orientation"] or 0 for arc in arcs), dtype=np.int64, count=count)
+    toward = orientations * (positions[ends, colors] - positions[starts, colors]) > 0
+    for arc, flag in zip(arcs, toward.tolist()):
+        arc["toward"] = flag
+
 def edge_routing(edge, graph: Graph):
     arc1, arc2 = edge["arcs"]
-    if perpendicular(arc1, arc2) and point_toward(arc1, graph) and point_toward(arc2, graph):
-        edge["route"] = edge_route1(arc1, arc2, graph)
-    elif not point_toward(arc1, graph) and point_toward(arc2, graph):
-        edge["route"] = edge_route2(arc1, arc2, graph)
-    elif not point_toward(arc2, graph) and point_toward(arc1, graph):
-        edge["route"] = list(reversed(edge_route2(arc2, arc1, graph)))
-    elif not perpendicular(arc1, arc2) and point_toward(arc1, graph) and point_toward(arc2, graph):
-        edge["route"] = edge_route3(arc1, arc2, graph)
-    elif not point_toward(arc1, graph) and not point_toward(arc2, graph):
-        edge["route"] = edge_route4(arc1, arc2, graph)
+    # A flag that is not set yet would read as pointing away, so it is computed here as
+    # direction_flags would, with an arc without orientation pointing away
+    for arc in (arc1, arc2):
+        if arc["toward"] is None:
+            arc["toward"] = bool(point_toward(arc, graph))
+    toward1 = arc1["toward"]
+    toward2 = arc2["toward"]
+    if perpendicular(arc1, arc2) and toward1 and toward2:
+        route = edge_route1(arc1, arc2, graph)
+    elif not toward1 and toward2:
+        route = edge_route2(arc1, arc2, graph)
+    elif not toward2 and toward1:
+        route = list(reversed(edge_route2(arc2, arc1, graph)))
+    elif not perpendicular(arc1, arc2) and toward1 and toward2:
+        route = edge_route3(arc1, arc2, graph)
+    else:
+        route = edge_route4(arc1, arc2, graph)
+    # With a route buffer the edge keeps a view of its points there instead of the list
+    if graph.routes is not None:
+        route = graph.routes.set_route(graph.routes.index(arc1["start"], arc1["end"]), route)
+    edge["route"] = route
 
 def edge_construction(graph: Graph):
+    direction_flags(graph)
+    graph.routes = RouteStore.allocate(graph)
     for _, _, edge_data in graph.edges(data=True):
         edge_routing(edge_data, graph)
\ No newline at end of file
@@ -0,0 +1,178 @@
+import networkx as nx
+import numpy as np
+import random
+
+from graph_embedding.graph import Graph
+from graph_embedding.benchmark import build_graph, scaling_benchmark, scaling_graphs
+from graph_embedding.helper import imbalance
+from graph_embedding.initial_ordering import initial_ordering
+from graph_embedding.memory import estimate_stage_bytes
+from graph_embedding.port_assignment import LOW_DEGREE
+
+# Runtime models of the stages of diagonal_layout_and_movement: seconds = coefficient * m ** exponent
+# per stage, fitted by scaling_benchmark with compact=True on random 6-regular graphs, and on
+# 3-regular ones for the direct port assignment of graphs of maximum degree LOW_DEGREE, with 64
+# to 1024 vertices. calibrate now defaults to the SCALING_SIZES of benchmark, 256 to 2048
+# vertices, so a fresh calibration covers larger graphs than these models do.
+# The time of balanced ordering varies most from graph to graph, so it was fitted on four
+# graphs per size with up to 2048 vertices instead, relative to the initial potential, whose
+# mean per edge on these graphs is given.
+CALIBRATIONS = {
+    "lovasz": {
+        "potential_per_edge": 0.86,
+        "stages": {
+            "balanced_ordering": (3.51e-07, 2.01),
+            "movement_special": (1.34e-08, 1.97),
+            "port_assignment": (5.89e-06, 1.82),
+            "movement_orders": (1.33e-07, 1.56),
+            "positions": (1.56e-09, 2.11),
+            "edge_construction": (6.74e-07, 1.37),
+            "crossing_removal": (4.77e-05, 1.04),
+            "compaction": (2.49e-06, 1.11),
+        },
+    },
+    "greedy": {
+        "potential_per_edge": 0.86,
+        "stages": {
+            "balanced_ordering": (3.51e-07, 2.01),
+            "movement_special": (2.24e-07, 1.63),
+            "port_assignment": (1.7e-05, 1.65),
+            "movement_orders": (4.13e-07, 1.45),
+            "positions": (7.82e-09, 1.92),
+            "edge_construction": (1.05e-05, 1.04),
+            "crossing_removal": (2.55e-04, 0.83),
+            "compaction": (1.43e-05, 0.93),
+        },
+    },
+    "low_degree": {
+        "potential_per_edge": 0.67,
+        "stages": {
+            "balanced_ordering": (7.71e-04, 0.90),
+            "movement_special": (4.01e-08, 1.99),
+            "port_assignment": (1.19e-06, 1.39),
+            "movement_orders": (3.19e-07, 1.51),
+            "positions": (6.25e-09, 2.16),
+            "edge_construction": (1.02e-06, 1.36),
+            "crossing_removal": (1.67e-06, 1.49),
+            "compaction": (3.05e-04, 0.50),
+        },
+    },
+}
+
+# How many times longer balanced ordering takes on regular graphs of odd degree above LOW_DEGREE,
+# where it mostly ends stalled, than the even-degree graphs of the calibration: the mean over
+# random 5- and 7-regular graphs with 400 and 800 vertices, three each
+ODD_DEGREE_FACTOR = 6.0
+
+# Bytes a Graph holds per edge before the layout, and what the drawing adds to it: traced with
+# tracemalloc on random 6-regular graphs with 500 vertices, rounded up
+GRAPH_BYTES_PER_EDGE = 1024
+DRAWING_BYTES_PER_EDGE = 768
+
+
+def sample_potential(graph: Graph, strategy="insertion", sample=256, seed=0):
+    """
+    Estimate the potential balanced ordering starts from, the total imbalance of the vertices
+    under the initial order but its first and last, see order_potential, from the types of a
+    random sample of these vertices.
+
+    :param graph: The graph object.
+    :param strategy: Initial ordering strategy, see initial_ordering.
+    :param sample: Number of vertices sampled, all of them if the graph has fewer.
+    :param seed: Seed of the sample.
+    :return: The estimated potential.
+    """
+    order = initial_ordering(graph, strategy)
+    interior = order[1:-1]
+    if not interior:
+        return 0.0
+    rank = {v: i for i, v in enumerate(order)}
+    vertices = interior if len(interior) <= sample else random.Random(seed).sample(interior, sample)
+    total = 0
+    for v in vertices:
+        succ = sum(rank[w] > rank[v] for w in graph.neighbors(v))
+        total += imbalance([succ, graph.degree(v) - succ])
+    return total * len(interior) / len(vertices)
+
+def calibrate(graphs=None, coloring="lovasz", repeats=3):
+    """
+    Fit the runtime models of estimate_layout on this machine, as CALIBRATIONS were, though by
+    default on the larger graphs of SCALING_SIZES.
+
+    :param graphs: Dictionary mapping a size to a networkx graph, defaults to scaling_graphs().
+    :param coloring: Colorer the layouts run with.
+    :param repeats: Runs per graph, see scaling_benchmark.
+    :return: A calibration in the form of the values of CALIBRATIONS, with the seeds passed over
+        by scaling_graphs under "skipped".
+    """
+    skipped = {}
+    if graphs is None:
+        graphs = scaling_graphs(skipped=skipped)
+    results = scaling_benchmark(graphs, repeats, coloring=coloring, compact=True)
+    potentials = [sample_potential(build_graph(graph), sample=graph.number_of_nodes()) / graph.number_of_edges()
+                  for graph in graphs.values()]
+    return {
+        "potential_per_edge": float(np.mean(potentials)),
+        "stages": {stage: (fit["coefficient"], fit["exponent"]) for stage, fit in results["stages"].items()},
+        "skipped": skipped,
+    }
+
+def estimate_layout(graph: Graph, strategy="insertion", coloring="lovasz", compact=False, sample=256, seed=0, calibration=None):
+    """
+    Predict the runtime and memory of diagonal_layout_and_movement on a graph without running it,
+    from the number of edges, the degree histogram and a sample of vertex types under the initial
+    order, see sample_potential. The cost is that of the initial ordering and the sample.
+
+    The runtime models are power laws fitted on random regular graphs with up to 1024 vertices
+    on the machine that recorded CALIBRATIONS, so they are only indicative elsewhere and far
+    beyond that size; calibrate fits them on the machine at hand. On regular graphs the total
+    is usually within a factor of two; irregular graphs mostly take less time than predicted.
+    Memory is estimated as by MemoryMeter.
+
+    :param graph: The graph object.
+    :param strategy: Initial ordering strategy of the run.
+    :param coloring: Colorer of the run, "auto" is estimated as "lovasz".
+    :param compact: Whether the run compacts the drawing.
+    :param sample: Number of vertices whose type is sampled.
+    :param seed: Seed of the sample.
+    :param calibration: A value of calibrate, by default the entry of CALIBRATIONS for the colorer,
+        or for graphs of maximum degree at most LOW_DEGREE, for those.
+    :return: A dictionary with n, m, "max_degree", the estimated initial "potential", for every
+        stage under "stages" its estimated "seconds" and "bytes" allocated on top of the graph,
+        and the totals "seconds" and "peak_bytes".
+    """
+    if coloring not in ("lovasz", "greedy", "auto"):
+        raise ValueError(f"Unknown coloring {coloring!r}, expected 'lovasz', 'greedy' or 'auto'")
+    histogram = nx.degree_histogram(graph)
+    max_degree = len(histogram) - 1
+    m = sum(degree * count for degree, count in enumerate(histogram)) // 2
+    if calibration is None:
+        if max_degree <= LOW_DEGREE:
+            calibration = CALIBRATIONS["low_degree"]
+        else:
+            calibration = CALIBRATIONS["greedy" if coloring == "greedy" else "lovasz"]
+    potential = sample_potential(graph, strategy, sample, seed)
+
+    stages = {}
+    for stage, (coefficient, exponent) in calibration["stages"].items():
+        if stage == "compaction" and not compact:
+            continue
+        seconds = coefficient * m ** exponent if m else 0.0
+        if stage == "balanced_ordering":
+            # Fewer unbalanced vertices than on the calibration graphs take fewer moves
+            seconds *= potential / max(m, 1) / calibration["potential_per_edge"]
+            if max_degree > LOW_DEGREE and max_degree % 2:
+                # Vertices of odd maximum degree cannot all be balanced, see ODD_DEGREE_FACTOR
+                seconds *= 1 + (ODD_DEGREE_FACTOR - 1) * histogram[max_degree] / graph.number_of_nodes()
+        stages[stage] = {"seconds": seconds, "bytes": estimate_stage_bytes(stage, graph)}
+
+    retained = (GRAPH_BYTES_PER_EDGE + DRAWING_BYTES_PER_EDGE) * m
+    return {
+        "n": graph.number_of_nodes(),
+        "m": m,
+        "max_degree": max(max_degree, 0),
+        "potential": potential,
+        "stages": stages,
+        "seconds": sum(stage["seconds"] for stage in stages.values()),
+        "peak_bytes": retained + max((stage["bytes"] for stage in stages.values()), default=0),
+    }
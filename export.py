@@ -0,0 +1,205 @@
+import networkx as nx
+import numpy as np
+import itertools
+import json
+import os
+import struct
+
+from graph_embedding.graph import Graph
+from graph_embedding.layout_arrays import layout_arrays
+
+# Number of vertices or edges converted per chunk
+CHUNK_SIZE = 1 << 16
+
+# Corners of the unit cube, corner 4x + 2y + z at (x, y, z)
+_CUBE_CORNERS = np.array(list(itertools.product([-0.5, 0.5], repeat=3)), dtype=np.float32)
+
+# Two triangles per face, counter-clockwise seen from outside
+_CUBE_TRIANGLES = np.array([
+    [3, 2, 0], [1, 3, 0], [4, 6, 7], [4, 7, 5], [0, 4, 5], [0, 5, 1],
+    [7, 6, 2], [3, 7, 2], [6, 4, 0], [2, 6, 0], [1, 5, 7], [1, 7, 3],
+], dtype=np.uint32)
+
+# glTF component types and primitive modes
+_FLOAT, _UNSIGNED_INT = 5126, 5125
+_LINES, _TRIANGLES = 1, 4
+_ARRAY_BUFFER, _ELEMENT_ARRAY_BUFFER = 34962, 34963
+
+
+def _chunks(count, chunk_size):
+    for start in range(0, count, chunk_size):
+        yield start, min(start + chunk_size, count)
+
+def _box_corners(positions, box_size):
+    """
+    :return: float32 array of shape (8k, 3) with the corners of a box around each position.
+    """
+    corners = positions[:, None, :].astype(np.float32) + box_size * _CUBE_CORNERS
+    return corners.reshape(-1, 3)
+
+def _box_triangles(start, stop):
+    """
+    :return: uint32 array of shape (12k, 3) with the corner indices of the boxes start to stop - 1.
+    """
+    first = 8 * np.arange(start, stop, dtype=np.uint32)
+    return (first[:, None, None] + _CUBE_TRIANGLES).reshape(-1, 3)
+
+def _route_segments(route_offsets, start, stop):
+    """
+    List the segments of the routes of edges start to stop - 1.
+
+    :return: int64 array of shape (S, 2) with indices of route points.
+    """
+    first, last = route_offsets[start], route_offsets[stop]
+    points = np.arange(first, last)
+    keep = np.ones(len(points), dtype=bool)
+    # The last point of every route starts no segment
+    ends = route_offsets[start + 1:stop + 1] - 1 - first
+    keep[ends[ends >= 0]] = False
+    points = points[keep]
+    return np.stack([points, points + 1], axis=1)
+
+def _segment_count(route_offsets):
+    lengths = np.diff(route_offsets)
+    return int(np.sum(np.maximum(lengths - 1, 0)))
+
+def export_obj(path, positions, route_points, route_offsets, box_size=1.0, chunk_size=CHUNK_SIZE):
+    """
+    Write a drawing as a Wavefront OBJ file: a box of triangles around every vertex and one
+    line element per route segment.
+
+    The file is written chunk by chunk, so memory use is bounded by chunk_size and the arrays
+    may be memory maps.
+
+    :param path: Path of the file.
+    :param positions: Array of shape (n, 3).
+    :param route_points: Array of shape (P, 3).
+    :param route_offsets: Array of shape (m + 1,) indexing into route_points.
+    :param box_size: Edge length of the vertex boxes.
+    :param chunk_size: Number of vertices or edges converted at once.
+    """
+    n = len(positions)
+    m = len(route_offsets) - 1
+    with open(path, "w") as f:
+        f.write(f"# {n} vertices, {m} edges\no vertices\n")
+        for start, stop in _chunks(n, chunk_size):
+            corners = _box_corners(np.asarray(positions[start:stop]), box_size)
+            f.write("v %g %g %g\n" * len(corners) % tuple(corners.ravel().tolist()))
+        for start, stop in _chunks(n, chunk_size):
+            triangles = _box_triangles(start, stop) + 1
+            f.write("f %d %d %d\n" * len(triangles) % tuple(triangles.ravel().tolist()))
+
+        f.write("o routes\n")
+        for start, stop in _chunks(len(route_points), chunk_size):
+            points = np.asarray(route_points[start:stop])
+            f.write("v %d %d %d\n" * len(points) % tuple(points.ravel().tolist()))
+        for start, stop in _chunks(m, chunk_size):
+            segments = _route_segments(route_offsets, start, stop) + 8 * n + 1
+            f.write("l %d %d\n" * len(segments) % tuple(segments.ravel().tolist()))
+
+def export_glb(path, positions, route_points, route_offsets, box_size=1.0, chunk_size=CHUNK_SIZE):
+    """
+    Write a drawing as binary glTF: one mesh with a triangle primitive for the vertex boxes and
+    a line primitive for the routes. A primitive without elements is left out, and so is the
+    mesh if both are.
+
+    All buffer sizes follow from n, m and the number of route points, so the JSON header is
+    written first and the binary buffer is streamed after it chunk by chunk.
+
+    :param path: Path of the file.
+    :param positions: Array of shape (n, 3).
+    :param route_points: Array of shape (P, 3).
+    :param route_offsets: Array of shape (m + 1,) indexing into route_points.
+    :param box_size: Edge length of the vertex boxes.
+    :param chunk_size: Number of vertices or edges converted at once.
+    """
+    n = len(positions)
+    m = len(route_offsets) - 1
+    p = len(route_points)
+    s = _segment_count(route_offsets)
+    if max(8 * n, 8 * n + p) >= 1 << 32:
+        raise ValueError(f"Drawing with {n} vertices and {p} route points exceeds 32-bit indices")
+
+    # Buffer views and accessors in the order the binary buffer is written: box corners and
+    # triangles, then route points and segments. A primitive without elements gets neither,
+    # as glTF requires counts and byte lengths of at least 1.
+    views = []
+    accessors = []
+    primitives = []
+
+    def add(size, target, accessor):
+        offset = views[-1]["byteOffset"] + views[-1]["byteLength"] if views else 0
+        views.append({"buffer": 0, "byteOffset": offset, "byteLength": size, "target": target})
+        accessors.append({"bufferView": len(views) - 1, **accessor})
+        return len(accessors) - 1
+
+    def bounds(values, pad):
+        return ((np.min(values, axis=0) - pad).astype(float).tolist(),
+                (np.max(values, axis=0) + pad).astype(float).tolist())
+
+    if n:
+        box_min, box_max = bounds(positions, box_size / 2)
+        corners = add(12 * 8 * n, _ARRAY_BUFFER,
+                      {"componentType": _FLOAT, "count": 8 * n, "type": "VEC3", "min": box_min, "max": box_max})
+        triangles = add(4 * 36 * n, _ELEMENT_ARRAY_BUFFER, {"componentType": _UNSIGNED_INT, "count": 36 * n, "type": "SCALAR"})
+        primitives.append({"attributes": {"POSITION": corners}, "indices": triangles, "mode": _TRIANGLES})
+    if s:
+        route_min, route_max = bounds(route_points, 0)
+        points = add(12 * p, _ARRAY_BUFFER,
+                     {"componentType": _FLOAT, "count": p, "type": "VEC3", "min": route_min, "max": route_max})
+        segments = add(4 * 2 * s, _ELEMENT_ARRAY_BUFFER, {"componentType": _UNSIGNED_INT, "count": 2 * s, "type": "SCALAR"})
+        primitives.append({"attributes": {"POSITION": points}, "indices": segments, "mode": _LINES})
+    length = sum(view["byteLength"] for view in views)
+
+    document = {
+        "asset": {"version": "2.0", "generator": "graph_embedding"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0} if primitives else {}],
+    }
+    if primitives:
+        document.update({
+            "meshes": [{"primitives": primitives}],
+            "buffers": [{"byteLength": length}],
+            "bufferViews": views,
+            "accessors": accessors,
+        })
+    header = json.dumps(document, separators=(",", ":")).encode()
+    header += b" " * (-len(header) % 4)
+
+    with open(path, "wb") as f:
+        f.write(struct.pack("<4sII", b"glTF", 2, 12 + 8 + len(header) + (8 + length if length else 0)))
+        f.write(struct.pack("<I4s", len(header), b"JSON"))
+        f.write(header)
+        if not length:
+            return
+        f.write(struct.pack("<I4s", length, b"BIN\0"))
+        for start, stop in _chunks(n, chunk_size):
+            f.write(_box_corners(np.asarray(positions[start:stop]), box_size).tobytes())
+        for start, stop in _chunks(n, chunk_size):
+            f.write(_box_triangles(start, stop).tobytes())
+        if s:
+            for start, stop in _chunks(p, chunk_size):
+                f.write(np.asarray(route_points[start:stop], dtype=np.float32).tobytes())
+            for start, stop in _chunks(m, chunk_size):
+                f.write(_route_segments(route_offsets, start, stop).astype(np.uint32).tobytes())
+
+EXPORTERS = {
+    ".obj": export_obj,
+    ".glb": export_glb,
+}
+
+def export_graph(graph: Graph, path, box_size=1.0, chunk_size=CHUNK_SIZE):
+    """
+    Export the drawing of a graph, in the format given by the file extension (.obj or .glb).
+
+    :param graph: A graph on which the layout has been computed.
+    :param path: Path of the file.
+    :param box_size: Edge length of the vertex boxes.
+    :param chunk_size: Number of vertices or edges converted at once.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXPORTERS:
+        raise ValueError(f"Unknown export format {extension!r}, expected one of {sorted(EXPORTERS)}")
+    arrays = layout_arrays(graph)
+    EXPORTERS[extension](path, arrays.positions, arrays.route_points, arrays.route_offsets, box_size, chunk_size)
@@ -1,21 +1,74 @@
 import networkx as nx
+import time
 
 from graph_embedding.graph import Graph
 from graph_embedding.edge_construction import edge_construction
 from graph_embedding.crossing_removal import crossing_removal
+from graph_embedding.compaction import grid_compaction
+from graph_embedding.memory import MemoryMeter
+from graph_embedding.checkpoint import Checkpoint
 
-def general_position_drawing(graph: Graph, vertex_positions):
+def general_position_drawing(graph: Graph, vertex_positions, compact=False, timings=None, deadline=None, memory=None, checkpoint=None, workers=None):
     """
     Generate the 3D general position drawing of the graph.
 
     :param G: The graph object.
     :param vertex_positions: A dictionary mapping each vertex to its position in 3D space.
-    :return: A dictionary containing 3D coordinates for each vertex and arc paths.
+    :param compact: If True, collapse unused grid planes after crossing removal.
+    :param timings: Optional dictionary, filled with the seconds spent in each stage.
+    :param deadline: Value of time.perf_counter() after which crossing removal stops early.
+    :param memory: Optional MemoryMeter, told when each stage starts and stops.
+    :param checkpoint: Optional Checkpoint. Stages it restored are skipped, the others recorded.
+    :param workers: Number of processes for phase 2 of crossing_removal.
+    :return: A dictionary with "no_crossings", True if crossing removal ran to completion, and
+        the volume report of grid_compaction under "compaction" if compact is True.
     """
-    for v_id, features in graph.nodes(data = True):
-        features["position"] = [0,0,0]
-        for i in range(0,3):
-            features["position"][i] = 3 * (vertex_positions[i].index(v_id) + 1)
+    if timings is None:
+        timings = {}
+    if memory is None:
+        memory = MemoryMeter()
+    if checkpoint is None:
+        checkpoint = Checkpoint(None, graph)
+    report = {}
 
-    edge_construction(graph) 
-    crossing_removal(graph)
\ No newline at end of file
+    if not checkpoint.done("positions"):
+        memory.start("positions")
+        start = time.perf_counter()
+        for v_id, features in graph.nodes(data = True):
+            features["position"] = [0,0,0]
+            for i in range(0,3):
+                features["position"][i] = 3 * (vertex_positions[i].index(v_id) + 1)
+        timings["positions"] = time.perf_counter() - start
+        memory.stop("positions")
+        checkpoint.save("positions", graph)
+
+    if not checkpoint.done("edge_construction"):
+        memory.start("edge_construction")
+        start = time.perf_counter()
+        edge_construction(graph) 
+        timings["edge_construction"] = time.perf_counter() - start
+        memory.stop("edge_construction")
+        checkpoint.save("edge_construction", graph)
+
+    if checkpoint.done("crossing_removal"):
+        report["no_crossings"] = True
+    else:
+        memory.start("crossing_removal")
+        start = time.perf_counter()
+        report["no_crossings"] = crossing_removal(graph, deadline, workers)
+        timings["crossing_removal"] = time.perf_counter() - start
+        memory.stop("crossing_removal")
+        if report["no_crossings"]:
+            checkpoint.save("crossing_removal", graph)
+
+    if compact:
+        if checkpoint.done("compaction"):
+            report["compaction"] = checkpoint.compaction
+        else:
+            memory.start("compaction")
+            start = time.perf_counter()
+            report["compaction"] = grid_compaction(graph)
+            timings["compaction"] = time.perf_counter() - start
+            memory.stop("compaction")
+            checkpoint.save("compaction", graph, compaction=report["compaction"])
+    return report
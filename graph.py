@@ -1,4 +1,53 @@
 import networkx as nx
+import numpy as np
+import functools
+import operator
+
+ARC_ATTRIBUTES = ("color", "orientation", "movement", "special", "anchor", "toward")
+
+
+def encode_arc_value(key, value):
+    """
+    Encode an arc attribute as an int8: colors as 0 to 2 and -1 for None, orientations as 1
+    and -1 and 0 for None, flags as 1, 0 and -1 for None.
+    """
+    if key == "orientation":
+        return 0 if value is None else value
+    if value is None:
+        return -1
+    return int(value)
+
+def decode_arc_value(key, value):
+    """
+    Invert encode_arc_value.
+    """
+    value = int(value)
+    if key == "orientation":
+        return None if value == 0 else value
+    if value == -1:
+        return None
+    if key == "color":
+        return value
+    return bool(value)
+
+# Keys of the attribute dictionaries that Graph.__reduce__ packs into arrays, in order
+_VERTEX_KEYS = ("position", "type")
+_EDGE_KEYS = ("arcs", "route")
+_ARC_KEYS = ARC_ATTRIBUTES + ("start", "end")
+_ARC_VALUES = {
+    "color": (None, 0, 1, 2),
+    "orientation": (None, 1, -1),
+    **{key: (None, False, True) for key in ARC_ATTRIBUTES[2:]},
+}
+# Codes of the arc attribute values by their id. None, the booleans and small ints are
+# singletons, so an int never passes for a bool, nor a numpy integer for an int.
+_ARC_CODES = {key: {id(value): encode_arc_value(key, value) for value in values} for key, values in _ARC_VALUES.items()}
+# The values by their code plus one, as _pack stores them
+_ARC_DECODED = {key: np.array(sorted(values, key=lambda value: encode_arc_value(key, value)), dtype=object)
+                for key, values in _ARC_VALUES.items()}
+
+# Attributes of a graph that Graph.__reduce__ packs into arrays
+_PACKED_ATTRIBUTES = ("_node", "_adj", "port_map", "routes")
 
 class Graph(nx.Graph):
     def __init__(self):
@@ -20,7 +69,13 @@ class Graph(nx.Graph):
             "movement": None,
             "special": None,
             "anchor": None,
+            # Whether the arc points toward its end vertex, set by direction_flags
+            "toward": None,
         }
+        # Port occupancy per vertex, set by port_assignment
+        self.port_map = None
+        # RouteStore the routes are written into, set by edge_construction
+        self.routes = None
 
     def add_vertex(self, vertex_id, **attributes):
         """
@@ -134,6 +189,32 @@ class Graph(nx.Graph):
             self.add_edge(node1,neighbor)
         self.remove_node(node2)
     
+    def __reduce__(self):
+        """
+        Pickle the graph as a few arrays instead of its nested dictionaries: the vertex ids, the
+        adjacency in order, the positions, the arc attributes encoded by encode_arc_value and
+        the routes. Unpickling rebuilds the dictionaries, the port map from the arcs and the
+        route buffer from the routes.
+
+        Graphs whose attributes are not the default ones, or hold values the arrays cannot
+        represent exactly, are pickled as before.
+        """
+        packed = _pack(self)
+        state = {}
+        for key, value in self.__dict__.items():
+            if packed is not None and key in _PACKED_ATTRIBUTES:
+                continue
+            # Views of networkx are cached on the instance and rebuilt on demand
+            if isinstance(getattr(type(self), key, None), functools.cached_property):
+                continue
+            state[key] = {} if key == "__networkx_cache__" else value
+        return _unpickle_graph, (type(self), state, packed)
+
+    def __copy__(self):
+        copied = self.__class__.__new__(self.__class__)
+        copied.__dict__.update(self.__dict__)
+        return copied
+
     def __repr__(self):
         """
         Representation of the graph showing its vertices and edges.
@@ -142,4 +223,202 @@ class Graph(nx.Graph):
         edges = list(self.edges)
         return f"Graph(Vertices: [{vertices}], Edges: {edges})"
 
+def _int_rows(rows):
+    """
+    :param rows: List of lists of three ints.
+    :return: The rows as an array of the smallest of int16, int32 and int64 that holds them,
+        or None if a row is anything else.
+    """
+    if set(map(type, rows)) - {list}:
+        return None
+    array = np.array(rows) if rows else np.zeros((0, 3), dtype=np.int16)
+    if array.dtype.kind != "i" or array.shape != (len(rows), 3):
+        return None
+    for dtype in (np.int16, np.int32):
+        if len(rows) == 0 or (np.iinfo(dtype).min <= array.min() and array.max() <= np.iinfo(dtype).max):
+            return array.astype(dtype)
+    return array.astype(np.int64)
+
+def _pack(graph: Graph):
+    """
+    Pack the vertices, edges and attributes of a graph into arrays, see Graph.__reduce__.
+
+    :param graph: The graph object.
+    :return: Dictionary of arrays, or None if the graph holds anything the arrays cannot represent.
+    """
+    nodes = list(graph._node)
+    if list(graph._adj) != nodes:
+        return None
+    index = {v: i for i, v in enumerate(nodes)}
+
+    vertex_attributes = list(graph._node.values())
+    if not all(map(_VERTEX_KEYS.__eq__, map(tuple, vertex_attributes))):
+        return None
+    if any(attributes["type"] is not None for attributes in vertex_attributes):
+        return None
+    vertex_positions = [attributes["position"] for attributes in vertex_attributes]
+    positions = _int_rows([position for position in vertex_positions if position is not None])
+    if positions is None:
+        return None
+
+    # Number the edges where the scan of the adjacency meets them first, as graph.edges does
+    indptr = [0]
+    indices = []
+    edges = []
+    for i, neighbors in enumerate(graph._adj.values()):
+        for v, data in neighbors.items():
+            j = index[v]
+            indices.append(j)
+            if j >= i:
+                edges.append((i, j, data))
+        indptr.append(len(indices))
+
+    datas = [data for _, _, data in edges]
+    if not all(map(_EDGE_KEYS.__eq__, map(tuple, datas))):
+        return None
+    if not all(type(data["arcs"]) is list and len(data["arcs"]) == 2 for data in datas):
+        return None
+    arcs = [arc for data in datas for arc in data["arcs"]]
+    if not all(map(_ARC_KEYS.__eq__, map(tuple, arcs))):
+        return None
+    # Two bits per attribute, in the order of ARC_ATTRIBUTES
+    codes = np.zeros(len(arcs), dtype=np.uint16)
+    for k, key in enumerate(ARC_ATTRIBUTES):
+        try:
+            column = np.fromiter(map(_ARC_CODES[key].get, map(id, map(operator.itemgetter(key), arcs))),
+                                 dtype=np.int64, count=len(arcs))
+        except TypeError:
+            # A value without a code
+            return None
+        codes |= (column + 1).astype(np.uint16) << (2 * k)
+
+    # The arcs of an edge run between its ends, the first from either
+    ends = np.array([(i, j) for i, j, _ in edges], dtype=np.int64).reshape(-1, 2)
+    starts = list(map(index.get, map(operator.itemgetter("start"), arcs)))
+    stops = list(map(index.get, map(operator.itemgetter("end"), arcs)))
+    if None in starts or None in stops:
+        return None
+    starts = np.array(starts, dtype=np.int64).reshape(-1, 2)
+    stops = np.array(stops, dtype=np.int64).reshape(-1, 2)
+    flipped = starts[:, 0] != ends[:, 0]
+    first = np.where(flipped, ends[:, 1], ends[:, 0])
+    second = np.where(flipped, ends[:, 0], ends[:, 1])
+    if not (np.array_equal(starts[:, 0], first) and np.array_equal(stops[:, 0], second)
+            and np.array_equal(starts[:, 1], second) and np.array_equal(stops[:, 1], first)):
+        return None
+
+    # Routes usually begin and end with the very position lists of their end vertices, which
+    # are not stored again. With a route buffer they are views of it, which alias nothing.
+    routes = [data["route"] for data in datas]
+    route_type = list if graph.routes is None else np.ndarray
+    if not all(type(route) is route_type and len(route) >= 2 for route in routes if route is not None):
+        return None
+    aliases = []
+    stored = []
+    for route, s, t in zip(routes, first.tolist(), second.tolist()):
+        if route is None or route_type is np.ndarray:
+            aliases.append((False, False))
+            if route is not None:
+                stored.extend(route.tolist())
+            continue
+        alias = (route[0] is vertex_positions[s], route[-1] is vertex_positions[t])
+        aliases.append(alias)
+        stored.extend(route[alias[0]:len(route) - alias[1]])
+    route_points = _int_rows(stored)
+    if route_points is None:
+        return None
+    lengths = [-1 if route is None else len(route) - a - b for route, (a, b) in zip(routes, aliases)]
+
+    port_map = None if graph.port_map is None else type(graph.port_map)
+    route_store = None if graph.routes is None else type(graph.routes)
+
+    n = len(nodes)
+    return {
+        "nodes": nodes,
+        "placed": np.array([position is not None for position in vertex_positions], dtype=bool),
+        "positions": positions,
+        "indptr": np.array(indptr, dtype=np.min_scalar_type(len(indices))),
+        "indices": np.array(indices, dtype=np.min_scalar_type(max(n - 1, 0))),
+        "flipped": flipped,
+        "arcs": codes,
+        # Points stored per route, -1 for edges without a route
+        "route_lengths": np.array(lengths, dtype=np.min_scalar_type(-max(max(lengths, default=0), 1))),
+        "route_points": route_points,
+        "aliases": np.array(aliases, dtype=bool).reshape(-1, 2),
+        "port_map": port_map,
+        "route_store": route_store,
+    }
+
+def _unpack(graph: Graph, packed):
+    """
+    Rebuild the dictionaries of a graph from the arrays of _pack.
+
+    :param graph: The graph object, without vertices and edges.
+    :param packed: Dictionary returned by _pack.
+    """
+    nodes = packed["nodes"]
+    rows = iter(packed["positions"].tolist())
+    vertex_positions = [next(rows) if placed else None for placed in packed["placed"].tolist()]
+    node = {v: {"position": position, "type": None} for v, position in zip(nodes, vertex_positions)}
+
+    # The edges in order, as where the scan of the adjacency meets them first
+    indptr = packed["indptr"].astype(np.int64)
+    indices = packed["indices"].astype(np.int64)
+    scanned = np.repeat(np.arange(len(nodes)), np.diff(indptr))
+    first = indices >= scanned
+    flipped = packed["flipped"]
+    starts = np.where(flipped, indices[first], scanned[first])
+    ends = np.where(flipped, scanned[first], indices[first])
+
+    codes = packed["arcs"].astype(np.int64)
+    columns = [_ARC_DECODED[key][codes >> (2 * k) & 3].tolist()
+               for k, key in enumerate(ARC_ATTRIBUTES)]
+    arc_starts = [nodes[s] for s in np.stack([starts, ends], axis=1).ravel().tolist()]
+    arc_ends = [nodes[t] for t in np.stack([ends, starts], axis=1).ravel().tolist()]
+    arcs = [dict(zip(_ARC_KEYS, values)) for values in zip(*columns, arc_starts, arc_ends)]
+
+    points = packed["route_points"].tolist()
+    routes = []
+    offset = 0
+    for length, (alias_start, alias_end), s, t in zip(packed["route_lengths"].tolist(), packed["aliases"].tolist(),
+                                                        starts.tolist(), ends.tolist()):
+        if length < 0:
+            routes.append(None)
+            continue
+        route = points[offset:offset + length]
+        offset += length
+        if alias_start:
+            route.insert(0, vertex_positions[s])
+        if alias_end:
+            route.append(vertex_positions[t])
+        routes.append(route)
+
+    datas = iter([{"arcs": arcs[2 * e:2 * e + 2], "route": route} for e, route in enumerate(routes)])
+    adj = {}
+    indptr = indptr.tolist()
+    indices = indices.tolist()
+    for i, v in enumerate(nodes):
+        neighbors = adj[v] = {}
+        for j in indices[indptr[i]:indptr[i + 1]]:
+            neighbors[nodes[j]] = next(datas) if j >= i else adj[nodes[j]][v]
+
+    graph.__dict__["_node"] = node
+    graph.__dict__["_adj"] = adj
+    port_map = packed["port_map"]
+    graph.__dict__["port_map"] = None if port_map is None else port_map.from_graph(graph)
+    route_store = packed["route_store"]
+    graph.__dict__["routes"] = None if route_store is None else route_store.allocate(graph)
+    if route_store is not None:
+        for i, (_, _, edge) in enumerate(graph.edges(data=True)):
+            if edge["route"] is not None:
+                edge["route"] = graph.routes.set_route(i, edge["route"])
 
+def _unpickle_graph(cls, state, packed):
+    """
+    Create a graph from what Graph.__reduce__ returns.
+    """
+    graph = cls.__new__(cls)
+    graph.__dict__.update(state)
+    if packed is not None:
+        _unpack(graph, packed)
+    return graph
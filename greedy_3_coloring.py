@@ -0,0 +1,98 @@
+import networkx as nx
+import heapq
+import time
+
+from graph_embedding.graph import Graph
+
+
+def _kempe_chain(adjacency, colors, starts, a, b):
+    """
+    Collect the vertices reachable from starts through vertices colored a or b.
+
+    :param adjacency: List of neighbour index lists.
+    :param colors: List of colors, None for uncolored vertices.
+    :param starts: Indices of the vertices to start from.
+    :param a: First color of the chain.
+    :param b: Second color of the chain.
+    :return: Set of vertex indices.
+    """
+    chain = set(starts)
+    stack = list(starts)
+    while stack:
+        x = stack.pop()
+        for y in adjacency[x]:
+            if y not in chain and colors[y] in (a, b):
+                chain.add(y)
+                stack.append(y)
+    return chain
+
+def _kempe_repair(adjacency, colors, v):
+    """
+    Free a color at v by swapping the two colors along Kempe chains of its neighbourhood.
+
+    :param adjacency: List of neighbour index lists.
+    :param colors: List of colors, updated in place.
+    :param v: Index of a vertex whose neighbours use all three colors.
+    :return: The freed color, or None if no swap frees one.
+    """
+    for a in range(3):
+        a_neighbors = [x for x in adjacency[v] if colors[x] == a]
+        for b in range(3):
+            if b == a:
+                continue
+            chain = _kempe_chain(adjacency, colors, a_neighbors, a, b)
+            # Swapping a and b on the chain frees a unless it also reaches a b-neighbour of v
+            if any(colors[x] == b and x in chain for x in adjacency[v]):
+                continue
+            for x in chain:
+                colors[x] = b if colors[x] == a else a
+            return a
+    return None
+
+def greedy_3_coloring(graph: Graph, deadline=None):
+    """
+    3-color a graph with DSatur, repairing dead ends by Kempe chain swaps.
+
+    Vertices are colored in order of decreasing saturation (number of distinct colors among
+    their neighbours), ties broken by degree. When all three colors are taken around a vertex,
+    a Kempe chain swap is tried to free one.
+
+    :param graph: The graph to be colored.
+    :param deadline: Value of time.perf_counter() after which to give up, or None.
+    :return: A dictionary mapping each vertex to a color (0, 1, or 2).
+    """
+    vertices = list(graph.nodes)
+    index = {v: i for i, v in enumerate(vertices)}
+    adjacency = [[index[u] for u in graph.neighbors(v)] for v in vertices]
+    colors = [None] * len(vertices)
+    neighbor_colors = [set() for _ in vertices]
+
+    heap = [(0, -len(adjacency[i]), i) for i in range(len(vertices))]
+    heapq.heapify(heap)
+    while heap:
+        if deadline is not None and time.perf_counter() > deadline:
+            raise TimeoutError("Greedy 3-coloring exceeded its time budget.")
+        saturation, _, v = heapq.heappop(heap)
+        if colors[v] is not None or -saturation != len(neighbor_colors[v]):
+            continue  # Stale heap entry
+
+        free = [c for c in range(3) if c not in neighbor_colors[v]]
+        if free:
+            colors[v] = free[0]
+        else:
+            colors[v] = _kempe_repair(adjacency, colors, v)
+            if colors[v] is None:
+                raise ValueError(f"Failed to assign color to vertex {vertices[v]}.")
+            # The swap recolored vertices anywhere in the graph, so saturations are rebuilt
+            for x in range(len(vertices)):
+                neighbor_colors[x] = {colors[y] for y in adjacency[x] if colors[y] is not None}
+            heap = [(-len(neighbor_colors[x]), -len(adjacency[x]), x) for x in range(len(vertices)) if colors[x] is None]
+            heapq.heapify(heap)
+            continue
+
+        for x in adjacency[v]:
+            if colors[x] is None and colors[v] not in neighbor_colors[x]:
+                neighbor_colors[x].add(colors[v])
+                heapq.heappush(heap, (-len(neighbor_colors[x]), -len(adjacency[x]), x))
+
+    return {v: colors[i] for i, v in enumerate(vertices)}
@@ -115,4 +115,36 @@ def opposite(v, w, type_v, type_w, order):
     """
     return (order.index(w) > order.index(v) and
             (type_v[0] - type_v[1]) > 0 and
-            (type_w[0] - type_w[1]) < 0)
\ No newline at end of file
+            (type_w[0] - type_w[1]) < 0)
+
+def order_types(graph: Graph, order):
+    """
+    Calculate the type of every vertex under the given order in a single pass over the edges.
+
+    :param graph: The graph object.
+    :param order: The ordered list of vertices.
+    :return: A dictionary mapping each vertex to [succ, pred], the number of its neighbours after and before it.
+    """
+    rank = {v: i for i, v in enumerate(order)}
+    types = {v: [0, 0] for v in graph.nodes}
+    for u, v in graph.edges:
+        if rank[u] < rank[v]:
+            types[u][0] += 1
+            types[v][1] += 1
+        else:
+            types[u][1] += 1
+            types[v][0] += 1
+    return types
+
+def imbalance(type_v):
+    """
+    Measure how far a vertex is from balanced: the amount by which |succ - pred| exceeds one.
+
+    The first and last vertex of an order have no predecessor and no successor respectively,
+    so the balance condition only applies to the vertices between them, and the potential of
+    an order leaves the two out, see balanced_ordering.order_potential.
+
+    :param type_v: The type of the vertex [succ, pred].
+    :return: A non-negative integer, zero for a balanced vertex.
+    """
+    return max(0, abs(type_v[0] - type_v[1]) - 1)
@@ -0,0 +1,109 @@
+import networkx as nx
+from networkx.utils import cuthill_mckee_ordering as _cuthill_mckee
+
+from graph_embedding.graph import Graph
+
+# Gap between consecutive labels of degree_ordering when they are assigned afresh
+_LABEL_SPACING = 1 << 32
+
+
+def insertion_ordering(graph: Graph):
+    """
+    Order the vertices as they were inserted into the graph.
+
+    :param graph: The graph object.
+    :return: List of vertices.
+    """
+    return list(graph.nodes)
+
+def bfs_ordering(graph: Graph):
+    """
+    Order the vertices breadth-first, starting each component at a vertex of minimum degree.
+
+    :param graph: The graph object.
+    :return: List of vertices.
+    """
+    order = []
+    visited = set()
+    for start in sorted(graph.nodes, key=graph.degree):
+        if start in visited:
+            continue
+        visited.add(start)
+        order.append(start)
+        for _, v in nx.bfs_edges(graph, start):
+            visited.add(v)
+            order.append(v)
+    return order
+
+def cuthill_mckee_ordering(graph: Graph):
+    """
+    Order the vertices with the Cuthill-McKee heuristic, which keeps the bandwidth of the order small.
+
+    :param graph: The graph object.
+    :return: List of vertices.
+    """
+    return list(_cuthill_mckee(graph))
+
+def degree_ordering(graph: Graph):
+    """
+    Start from the Cuthill-McKee order and place every vertex of degree 5 or 6 in the middle
+    of its neighbours, so that it begins with as many predecessors as successors.
+
+    The order is kept as a linked list whose labels increase along it, so that moving a vertex
+    and comparing the positions of its neighbours take no pass over the order.
+
+    :param graph: The graph object.
+    :return: List of vertices.
+    """
+    order = cuthill_mckee_ordering(graph)
+    head, tail = object(), object()
+    chain = [head] + order + [tail]
+    succ = dict(zip(chain, chain[1:]))
+    pred = dict(zip(chain[1:], chain))
+    label = {}
+
+    def relabel():
+        v, i = head, 0
+        while v is not tail:
+            label[v] = i * _LABEL_SPACING
+            v, i = succ[v], i + 1
+        label[tail] = i * _LABEL_SPACING
+
+    relabel()
+    heavy = [v for v in order if graph.degree(v) >= 5]
+    for v in sorted(heavy, key=graph.degree, reverse=True):
+        succ[pred[v]], pred[succ[v]] = succ[v], pred[v]
+        neighbors = sorted(graph.neighbors(v), key=label.__getitem__)
+        pivot = neighbors[len(neighbors) // 2 - 1]
+        if label[succ[pivot]] - label[pivot] < 2:
+            relabel()
+        label[v] = (label[pivot] + label[succ[pivot]]) // 2
+        succ[v], pred[v] = succ[pivot], pivot
+        pred[succ[pivot]] = v
+        succ[pivot] = v
+
+    result = []
+    v = succ[head]
+    while v is not tail:
+        result.append(v)
+        v = succ[v]
+    return result
+
+ORDERING_STRATEGIES = {
+    "insertion": insertion_ordering,
+    "bfs": bfs_ordering,
+    "cuthill_mckee": cuthill_mckee_ordering,
+    "degree": degree_ordering,
+}
+
+def initial_ordering(graph: Graph, strategy="insertion"):
+    """
+    Compute the order that balanced_ordering starts from.
+
+    :param graph: The graph object.
+    :param strategy: Name of a strategy in ORDERING_STRATEGIES.
+    :return: List of vertices.
+    """
+    if strategy not in ORDERING_STRATEGIES:
+        raise ValueError(f"Unknown ordering strategy {strategy!r}, expected one of {sorted(ORDERING_STRATEGIES)}")
+    return ORDERING_STRATEGIES[strategy](graph)
@@ -0,0 +1,118 @@
+import networkx as nx
+import numpy as np
+
+from graph_embedding.graph import ARC_ATTRIBUTES, Graph, decode_arc_value, encode_arc_value
+from graph_embedding.diagonal_layout_and_movement import diagonal_layout_and_movement
+from graph_embedding.layout_arrays import LayoutArrays, layout_arrays
+
+
+class LayoutResult(LayoutArrays):
+    """
+    A drawing computed by layout, detached from any graph: the positions and routes of
+    LayoutArrays, the attributes of every arc, and the report of the run.
+
+    Edge i runs from `edges[i][0]` to `edges[i][1]`, and so does its route. `arcs[key][i, k]`
+    holds attribute key of arc k of edge i, encoded as by encode_arc_value, where arc 0 leaves
+    the start of the edge and arc 1 its end.
+    """
+
+    def __init__(self, nodes, edges, positions, route_points, route_offsets, arcs, report):
+        """
+        :param nodes: List of vertex ids, in graph order.
+        :param edges: List of (start_id, end_id) tuples, in graph order.
+        :param positions: int32 array of shape (n, 3).
+        :param route_points: int32 array of shape (P, 3) holding all route points.
+        :param route_offsets: int64 array of shape (m + 1,) indexing into route_points.
+        :param arcs: Dictionary mapping each of ARC_ATTRIBUTES to an int8 array of shape (m, 2).
+        :param report: The report of diagonal_layout_and_movement.
+        """
+        super().__init__(nodes, edges, positions, route_points, route_offsets)
+        self.arcs = arcs
+        self.report = report
+
+    def arc(self, i, k):
+        """
+        :param i: Index of the edge.
+        :param k: 0 for the arc from the start of the edge, 1 for the arc back.
+        :return: Dictionary with the attributes of the arc, as a Graph keeps them.
+        """
+        start, end = self.edges[i] if k == 0 else reversed(self.edges[i])
+        attributes = {key: decode_arc_value(key, self.arcs[key][i, k]) for key in ARC_ATTRIBUTES}
+        return {**attributes, "start": start, "end": end}
+
+    def apply(self, graph: Graph):
+        """
+        Write the positions, routes and arc attributes into a graph with the same vertices and
+        edges, as diagonal_layout_and_movement would have left them but with the routes as lists.
+
+        :param graph: The graph object.
+        """
+        super().apply(graph)
+        for i, (u, v) in enumerate(self.edges):
+            for arc in graph.edges[u, v]["arcs"]:
+                k = 0 if arc["start"] == u else 1
+                for key in ARC_ATTRIBUTES:
+                    arc[key] = decode_arc_value(key, self.arcs[key][i, k])
+
+    def __repr__(self):
+        return f"LayoutResult(n={len(self.nodes)}, m={len(self.edges)}, points={len(self.route_points)})"
+
+def working_graph(G):
+    """
+    Build a fresh Graph with the topology of G and nothing else, so that laying it out leaves
+    G untouched.
+
+    Vertices, edges, the order of every adjacency and the direction of every edge are those
+    of G, as they decide the ties of the layout: the working graph is laid out exactly as G
+    would be. G is only read, so several threads may build working graphs of it at once.
+
+    :param G: A Graph, or any networkx graph.
+    :return: A Graph.
+    """
+    work = Graph()
+    if isinstance(G, Graph):
+        work.default_vertex_attributes = dict(G.default_vertex_attributes)
+        work.default_edge_attributes = dict(G.default_edge_attributes)
+        work.default_arc_attributes = dict(G.default_arc_attributes)
+    for v in G:
+        work.add_vertex(v)
+
+    # networkx shares one attribute dictionary between both directions of an edge, and
+    # add_edge cannot reproduce every adjacency order, so the adjacency is filled in directly
+    edges = {}
+    for u, neighbors in G.adj.items():
+        for v, attributes in neighbors.items():
+            edge = edges.get(id(attributes))
+            if edge is None:
+                arcs = attributes.get("arcs")
+                start, end = (arcs[0]["start"], arcs[0]["end"]) if arcs else (u, v)
+                arc1 = {**work.default_arc_attributes, "start": start, "end": end}
+                arc2 = {**work.default_arc_attributes, "start": end, "end": start}
+                edge = edges[id(attributes)] = {**work.default_edge_attributes, "arcs": [arc1, arc2]}
+            work._adj[u][v] = edge
+    return work
+
+def layout(G, **options):
+    """
+    Lay out a graph without changing it, and return the drawing.
+
+    Unlike diagonal_layout_and_movement, which writes its results into the graph, this lays
+    out a working graph with the same topology, see working_graph. G is only read, so one
+    graph may be laid out by several threads at once, without locks or copies of its attributes.
+
+    :param G: A Graph, or any networkx graph.
+    :param options: Keyword arguments of diagonal_layout_and_movement.
+    :return: A LayoutResult.
+    """
+    work = working_graph(G)
+    report = diagonal_layout_and_movement(work, **options)
+    arrays = layout_arrays(work)
+    edges = []
+    arcs = {key: np.empty((len(arrays.edges), 2), dtype=np.int8) for key in ARC_ATTRIBUTES}
+    for i, (_, _, edge_arcs) in enumerate(work.edges(data="arcs")):
+        edges.append((edge_arcs[0]["start"], edge_arcs[0]["end"]))
+        for k, arc in enumerate(edge_arcs):
+            for key in ARC_ATTRIBUTES:
+                arcs[key][i, k] = encode_arc_value(key, arc[key])
+    return LayoutResult(arrays.nodes, edges, arrays.positions, arrays.route_points,
+                        arrays.route_offsets, arcs, report)
@@ -0,0 +1,74 @@
+import networkx as nx
+import numpy as np
+
+from graph_embedding.graph import Graph
+from graph_embedding.route_store import RouteStore
+
+
+class LayoutArrays:
+    """
+    Flat array form of a finished drawing: vertex positions and edge routes.
+
+    Vertices and edges are referred to by their index in `nodes` and `edges`.
+    The route of edge i is `route_points[route_offsets[i]:route_offsets[i + 1]]`.
+    """
+
+    def __init__(self, nodes, edges, positions, route_points, route_offsets):
+        """
+        :param nodes: List of vertex ids, in graph order.
+        :param edges: List of (start_id, end_id) tuples, in graph order.
+        :param positions: int32 array of shape (n, 3).
+        :param route_points: int32 array of shape (P, 3) holding all route points.
+        :param route_offsets: int64 array of shape (m + 1,) indexing into route_points.
+        """
+        self.nodes = nodes
+        self.edges = edges
+        self.positions = positions
+        self.route_points = route_points
+        self.route_offsets = route_offsets
+
+    def route(self, i):
+        """
+        Return the route of edge i as a view into route_points.
+
+        :param i: Index of the edge.
+        :return: int32 array of shape (k, 3).
+        """
+        return self.route_points[self.route_offsets[i]:self.route_offsets[i + 1]]
+
+    def route_store(self):
+        """
+        Return the routes as a RouteStore sharing the same arrays.
+
+        :return: A RouteStore.
+        """
+        return RouteStore(self.edges, self.route_points, self.route_offsets)
+
+    def apply(self, graph: Graph):
+        """
+        Write the positions and routes back into the attributes of a graph, the routes as lists.
+        The graph keeps no route buffer afterwards, see RouteStore.allocate.
+
+        :param graph: A graph with the same vertices and edges.
+        """
+        graph.routes = None
+        for v, position in zip(self.nodes, self.positions.tolist()):
+            graph.nodes[v]["position"] = position
+        for i, (u, v) in enumerate(self.edges):
+            graph.edges[u, v]["route"] = self.route(i).tolist()
+
+    def __repr__(self):
+        return f"LayoutArrays(n={len(self.nodes)}, m={len(self.edges)}, points={len(self.route_points)})"
+
+
+def layout_arrays(graph: Graph):
+    """
+    Pack the positions and routes of a drawn graph into flat arrays.
+
+    :param graph: A graph on which the layout has been computed.
+    :return: A LayoutArrays instance.
+    """
+    nodes = list(graph.nodes)
+    positions = np.array([graph.nodes[v]["position"] for v in nodes], dtype=np.int32).reshape(-1, 3)
+    routes = RouteStore.from_graph(graph)
+    return LayoutArrays(nodes, routes.edges, positions, routes.points, routes.offsets)
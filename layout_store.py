@@ -0,0 +1,235 @@
+import networkx as nx
+import numpy as np
+import json
+import os
+
+from graph_embedding.graph import ARC_ATTRIBUTES, Graph, decode_arc_value, encode_arc_value
+from graph_embedding.route_store import MAX_ROUTE_POINTS
+
+class LayoutStore:
+    """
+    A layout held in memory-mapped .npy files in a directory, so that the drawing stages can
+    stream over it in chunks instead of holding every route of the drawing in memory.
+
+    Vertices and edges are referred to by index. Edge i joins `edges[i, 0]` and `edges[i, 1]`;
+    arc 0 of the edge starts at the first, arc 1 at the second, and its route runs from the
+    first to the second. The neighbours of vertex v are `indices[indptr[v]:indptr[v + 1]]`,
+    reached through the edges `slot_edges[indptr[v]:indptr[v + 1]]`.
+    """
+
+    _ARRAYS = ("edges", "indptr", "indices", "slot_edges", "rank", "color", "orientation",
+               "movement", "special", "anchor", "toward", "positions", "route_points", "route_lengths")
+
+    def __init__(self, directory, mode="r+"):
+        """
+        Open an existing store.
+
+        :param directory: Directory written by LayoutStore.create.
+        :param mode: Memory map mode, "r" or "r+".
+        """
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        self.n = meta["n"]
+        self.m = meta["m"]
+        for name in self._ARRAYS:
+            setattr(self, name, np.load(os.path.join(directory, name + ".npy"), mmap_mode=mode))
+        self._nodes = None
+
+    @classmethod
+    def create(cls, directory, graph: Graph, vertex_positions=None):
+        """
+        Spill the topology, arc attributes and vertex orders of a graph into a new store.
+
+        :param directory: Directory for the files, created if needed.
+        :param graph: The graph object, usually with ports assigned.
+        :param vertex_positions: Optional [X_order, Y_order, Z_order] lists of vertex ids.
+        :return: The LayoutStore, opened for writing.
+        """
+        os.makedirs(directory, exist_ok=True)
+        nodes = list(graph.nodes)
+        index = {v: i for i, v in enumerate(nodes)}
+        n = len(nodes)
+        m = graph.number_of_edges()
+
+        def array(name, dtype, shape, fill=0):
+            values = np.lib.format.open_memmap(os.path.join(directory, name + ".npy"), mode="w+", dtype=dtype, shape=shape)
+            values[...] = fill
+            return values
+
+        edges = array("edges", np.int64, (m, 2))
+        arcs = {key: array(key, np.int8, (m, 2)) for key in ARC_ATTRIBUTES}
+        edge_index = {}
+        for i, (u, v, edge_arcs) in enumerate(graph.edges(data="arcs")):
+            edge_index[(u, v)] = edge_index[(v, u)] = i
+            edges[i] = (index[edge_arcs[0]["start"]], index[edge_arcs[0]["end"]])
+            for k, arc in enumerate(edge_arcs):
+                for key in ARC_ATTRIBUTES:
+                    arcs[key][i, k] = encode_arc_value(key, arc[key])
+
+        # Adjacency in networkx order
+        indptr = array("indptr", np.int64, (n + 1,))
+        np.cumsum([graph.degree(v) for v in nodes], out=indptr[1:])
+        indices = array("indices", np.int64, (2 * m,))
+        slot_edges = array("slot_edges", np.int64, (2 * m,))
+        for v in nodes:
+            start = indptr[index[v]]
+            for k, u in enumerate(graph.neighbors(v)):
+                indices[start + k] = index[u]
+                slot_edges[start + k] = edge_index[(v, u)]
+
+        rank = array("rank", np.int64, (3, n), fill=-1)
+        if vertex_positions is not None:
+            for axis in range(3):
+                rank[axis, [index[v] for v in vertex_positions[axis]]] = np.arange(n)
+
+        array("positions", np.int32, (n, 3))
+        array("route_points", np.int32, (m, MAX_ROUTE_POINTS, 3))
+        array("route_lengths", np.uint8, (m,))
+
+        np.save(os.path.join(directory, "nodes.npy"), np.asarray(nodes), allow_pickle=True)
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({"n": n, "m": m}, f)
+        return cls(directory)
+
+    @property
+    def nodes(self):
+        """
+        The vertex ids, loaded on first use.
+        """
+        if self._nodes is None:
+            self._nodes = np.load(os.path.join(self.directory, "nodes.npy"), allow_pickle=True).tolist()
+        return self._nodes
+
+    def flush(self):
+        """
+        Write all changes to disk.
+        """
+        for name in self._ARRAYS:
+            values = getattr(self, name)
+            if isinstance(values, np.memmap):
+                values.flush()
+
+    def route(self, i):
+        """
+        Return the route of edge i.
+
+        :param i: Index of the edge.
+        :return: int32 array of shape (k, 3).
+        """
+        return np.asarray(self.route_points[i, :self.route_lengths[i]])
+
+    def edge_chunks(self, chunk_size):
+        """
+        Split the edges into consecutive ranges.
+
+        :param chunk_size: Maximum number of edges per range.
+        :return: Generator of (start, stop) tuples.
+        """
+        for start in range(0, self.m, chunk_size):
+            yield start, min(start + chunk_size, self.m)
+
+    def vertex_chunks(self, chunk_size):
+        """
+        Split the vertices into consecutive ranges with at most chunk_size incident arcs each,
+        or a single vertex if its degree alone exceeds that.
+
+        :param chunk_size: Maximum number of incident arcs per range.
+        :return: Generator of (start, stop) tuples.
+        """
+        start = 0
+        while start < self.n:
+            stop = int(np.searchsorted(self.indptr, self.indptr[start] + chunk_size, side="right")) - 1
+            stop = min(max(stop, start + 1), self.n)
+            yield start, stop
+            start = stop
+
+    def load_chunk(self, edge_ids):
+        """
+        Build a Graph holding the given edges, their end points with positions, and their
+        arcs and routes. Vertices are named by index, and the edges are added in the order given.
+
+        :param edge_ids: Array of distinct edge indices.
+        :return: The chunk Graph.
+        """
+        chunk = Graph()
+        edges = np.asarray(self.edges[edge_ids])
+        vertices = np.unique(edges)
+        for v, position in zip(vertices.tolist(), np.asarray(self.positions[vertices]).tolist()):
+            chunk.add_vertex(v, position=position)
+
+        arcs = {key: np.asarray(getattr(self, key)[edge_ids]) for key in ARC_ATTRIBUTES}
+        lengths = np.asarray(self.route_lengths[edge_ids])
+        points = np.asarray(self.route_points[edge_ids])
+        for j, (s, t) in enumerate(edges.tolist()):
+            chunk.add_edge(s, t)
+            edge = chunk.edges[s, t]
+            for k, arc in enumerate(edge["arcs"]):
+                for key in ARC_ATTRIBUTES:
+                    arc[key] = decode_arc_value(key, arcs[key][j, k])
+            if lengths[j]:
+                edge["route"] = points[j, :lengths[j]].tolist()
+        return chunk
+
+    def store_chunk(self, chunk, edge_ids):
+        """
+        Write the arcs and routes of a chunk Graph back to the store.
+
+        :param chunk: Graph built by load_chunk.
+        :param edge_ids: The edge indices it was built from.
+        """
+        edges = np.asarray(self.edges[edge_ids]).tolist()
+        arcs = {key: np.zeros((len(edge_ids), 2), dtype=np.int8) for key in ARC_ATTRIBUTES}
+        points = np.zeros((len(edge_ids), MAX_ROUTE_POINTS, 3), dtype=np.int32)
+        lengths = np.zeros(len(edge_ids), dtype=np.uint8)
+        for j, (s, t) in enumerate(edges):
+            edge = chunk.edges[s, t]
+            for k, arc in enumerate(edge["arcs"]):
+                for key in ARC_ATTRIBUTES:
+                    arcs[key][j, k] = encode_arc_value(key, arc[key])
+            if edge["route"] is not None:
+                lengths[j] = len(edge["route"])
+                points[j, :lengths[j]] = edge["route"]
+        for key in ARC_ATTRIBUTES:
+            getattr(self, key)[edge_ids] = arcs[key]
+        self.route_points[edge_ids] = points
+        self.route_lengths[edge_ids] = lengths
+
+    def store_drawing(self, graph: Graph):
+        """
+        Write the positions and routes of the graph the store was created from into the store,
+        the reverse of apply. The arcs are written by create.
+
+        :param graph: The graph object with positions and routes.
+        """
+        index = {v: i for i, v in enumerate(self.nodes)}
+        for v, position in graph.nodes(data="position"):
+            self.positions[index[v]] = position
+        for i, (s, t) in enumerate(np.asarray(self.edges).tolist()):
+            route = graph.edges[self.nodes[s], self.nodes[t]]["route"]
+            if route is not None:
+                self.route_lengths[i] = len(route)
+                self.route_points[i, :len(route)] = route
+
+    def apply(self, graph: Graph):
+        """
+        Write the positions, arcs and routes back into the attributes of the graph the store
+        was created from. The routes go into the route buffer of the graph if it has one.
+
+        :param graph: The graph object.
+        """
+        nodes = self.nodes
+        for v, position in zip(nodes, np.asarray(self.positions).tolist()):
+            graph.nodes[v]["position"] = position
+        for i, (s, t) in enumerate(np.asarray(self.edges).tolist()):
+            edge = graph.edges[nodes[s], nodes[t]]
+            for k, arc in enumerate(edge["arcs"]):
+                for key in ARC_ATTRIBUTES:
+                    arc[key] = decode_arc_value(key, getattr(self, key)[i, k])
+            if graph.routes is None:
+                edge["route"] = self.route(i).tolist()
+            else:
+                edge["route"] = graph.routes.set_route(graph.routes.index(nodes[s], nodes[t]), self.route(i))
+
+    def __repr__(self):
+        return f"LayoutStore({self.directory!r}, n={self.n}, m={self.m})"
@@ -1,5 +1,5 @@
 import networkx as nx
-import copy
+import time
 
 from graph_embedding.graph import Graph
 
@@ -23,11 +23,21 @@ def lower_coloring(graph):
     
     return colors
 
-def lovasz_3_coloring(graph: Graph):
+def check_deadline(deadline):
+    """
+    Raise a TimeoutError once the deadline has passed.
+
+    :param deadline: Value of time.perf_counter() after which to give up, or None.
+    """
+    if deadline is not None and time.perf_counter() > deadline:
+        raise TimeoutError("Lovasz 3-coloring exceeded its time budget.")
+
+def lovasz_3_coloring(graph: Graph, deadline=None):
     """
     Implements Lovasz's algorithm for 3-coloring based on Brooks' theorem.
 
     :param graph: The graph to be colored.
+    :param deadline: Value of time.perf_counter() after which to raise a TimeoutError, or None.
     :return: A dictionary mapping each vertex to a color (0, 1, or 2).
     """
     # Ensure the graph does not contain K_(Delta + 1)
@@ -49,13 +59,12 @@ def lovasz_3_coloring(graph: Graph):
 
     if nx.is_connected(graph):
         for a in vertices:
+            check_deadline(deadline)
             found = False
             for neighbor in graph.neighbors(a):
                 for two_neighbor in graph.neighbors(neighbor):
                     if two_neighbor != a and not two_neighbor in graph.neighbors(a):
-                        copied = copy.deepcopy(graph)
-                        copied = nx.Graph(copied)
-                        copied.remove_nodes_from([a,two_neighbor])
+                        copied = nx.restricted_view(graph, [a,two_neighbor], [])
                         if nx.is_connected(copied):
                             points_picked = True
                             found = True
@@ -70,11 +79,10 @@ def lovasz_3_coloring(graph: Graph):
         if points_picked is False:
             if nx.is_biconnected(graph):
                 for v0 in vertices:
+                    check_deadline(deadline)
                     if graph.degree(v0) == 3 and graph.degree(v0) < len(list(graph.nodes())):
                         a = v0
-                        copied = copy.deepcopy(graph)
-                        copied = nx.Graph(copied)
-                        copied.remove_node(a)
+                        copied = nx.restricted_view(graph, [a], [])
                         if nx.is_biconnected(copied):
                             found = False
                             for neighbor in graph.neighbors(a):
@@ -92,9 +100,7 @@ def lovasz_3_coloring(graph: Graph):
                             for a in graph.neighbors(v1):
                                 for b in graph.neighbors(v1):
                                     if a != b:
-                                        copied = copy.deepcopy(graph)
-                                        copied = nx.Graph(copied)
-                                        copied.remove_nodes_from([a,b])
+                                        copied = nx.restricted_view(graph, [a,b], [])
                                         if nx.is_connected(copied):
                                             found = True
                                             points_picked = True
@@ -103,15 +109,14 @@ def lovasz_3_coloring(graph: Graph):
                         break
             else:
                 for a in vertices:
-                    copied = copy.deepcopy(graph)
-                    copied = nx.Graph(copied)
-                    copied.remove_node(a)
+                    check_deadline(deadline)
+                    copied = nx.restricted_view(graph, [a], [])
                     if not nx.is_connected(copied):
                         break
                 components = nx.connected_components(copied)
                 for generators in components:
                     subgraph = graph.subgraph(generators)
-                    subgraph_color = lovasz_3_coloring(subgraph)
+                    subgraph_color = lovasz_3_coloring(subgraph, deadline)
                     colors.update(subgraph_color)
 
                 neighbor_colors = {colors[neighbor] for neighbor in graph.neighbors(a) if colors[neighbor] is not None}
@@ -132,7 +137,7 @@ def lovasz_3_coloring(graph: Graph):
         components = nx.connected_components(graph)
         for generators in components:
             subgraph = graph.subgraph(generators)
-            subgraph_color = lovasz_3_coloring(subgraph)
+            subgraph_color = lovasz_3_coloring(subgraph, deadline)
             colors.update(subgraph_color)
         return colors
 
@@ -144,6 +149,7 @@ def lovasz_3_coloring(graph: Graph):
     vertices.remove(v1)
     ordered_vertices = [v1]
     while len(vertices) > 0:
+        check_deadline(deadline)
         for vi in ordered_vertices:
             found = False
             for vii in graph.neighbors(vi):
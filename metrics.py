@@ -0,0 +1,82 @@
+import networkx as nx
+import numpy as np
+
+from graph_embedding.graph import Graph
+from graph_embedding.layout_arrays import layout_arrays
+
+
+def segment_arrays(route_points, route_offsets):
+    """
+    Split all routes into their non-degenerate segments.
+
+    :param route_points: int32 array of shape (P, 3) holding all route points.
+    :param route_offsets: int64 array of shape (m + 1,) indexing into route_points.
+    :return: Tuple (edge_ids, starts, steps) with the edge index, start point and
+        displacement of each segment of non-zero length, in route order.
+    """
+    m = len(route_offsets) - 1
+    lengths = np.diff(route_offsets)
+    edge_of_point = np.repeat(np.arange(m), lengths)
+    steps = np.diff(route_points, axis=0)
+    # A difference between two consecutive points is a segment only if both points belong to the same route
+    same_route = edge_of_point[1:] == edge_of_point[:-1]
+    nonzero = np.any(steps != 0, axis=1)
+    keep = same_route & nonzero
+    return edge_of_point[1:][keep], route_points[:-1][keep], steps[keep]
+
+
+def drawing_metrics(positions, route_points, route_offsets):
+    """
+    Compute the quality measures of a 3D orthogonal drawing.
+
+    Volume counts the grid points of the bounding box of all vertices and route points.
+    A bend is a point of a route where two consecutive segments change direction.
+
+    :param positions: int array of shape (n, 3) with the vertex positions.
+    :param route_points: int array of shape (P, 3) holding all route points.
+    :param route_offsets: int array of shape (m + 1,) indexing into route_points.
+    :return: A dictionary of metrics.
+    """
+    positions = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+    route_points = np.asarray(route_points, dtype=np.int64).reshape(-1, 3)
+    route_offsets = np.asarray(route_offsets, dtype=np.int64)
+    m = len(route_offsets) - 1
+
+    all_points = np.concatenate([positions, route_points])
+    if len(all_points):
+        lower = all_points.min(axis=0)
+        upper = all_points.max(axis=0)
+    else:
+        lower = upper = np.zeros(3, dtype=np.int64)
+    extents = upper - lower
+
+    edge_ids, _, steps = segment_arrays(route_points, route_offsets)
+    segment_lengths = np.abs(steps).sum(axis=1)
+    edge_lengths = np.bincount(edge_ids, weights=segment_lengths, minlength=m).astype(np.int64)
+
+    # Consecutive segments of the same route bend when their directions differ
+    directions = np.sign(steps)
+    turns = (edge_ids[1:] == edge_ids[:-1]) & np.any(directions[1:] != directions[:-1], axis=1)
+    bends = np.bincount(edge_ids[1:][turns], minlength=m)
+
+    return {
+        "extents": extents,
+        "volume": int(np.prod(extents + 1)) if len(all_points) else 0,
+        "total_edge_length": int(edge_lengths.sum()),
+        "edge_lengths": edge_lengths,
+        "bends": bends,
+        "total_bends": int(bends.sum()),
+        "max_bends": int(bends.max()) if m else 0,
+        "bend_histogram": np.bincount(bends),
+    }
+
+
+def graph_metrics(graph: Graph):
+    """
+    Compute the quality measures of the drawing stored in the attributes of a graph.
+
+    :param graph: A graph on which the layout has been computed.
+    :return: A dictionary of metrics, see drawing_metrics.
+    """
+    arrays = layout_arrays(graph)
+    return drawing_metrics(arrays.positions, arrays.route_points, arrays.route_offsets)
@@ -1,10 +1,27 @@
 import networkx as nx
-import copy
+import threading
+import time
 
 from graph_embedding.graph import Graph
 from graph_embedding.helper import order_neighbor, vertex_type
 from graph_embedding.table3 import table3
 from graph_embedding.lovasz_3_coloring import lovasz_3_coloring
+from graph_embedding.greedy_3_coloring import greedy_3_coloring
+from graph_embedding.ports import PortMap
+
+# Graphs of at most this maximum degree get their ports from low_degree_port_assignment
+LOW_DEGREE = 3
+
+# How often each colorer ran on the arc graph, how often "auto" had to fall back, and how
+# often the arc graph was skipped for a low-degree graph
+coloring_stats = {"lovasz": 0, "greedy": 0, "fallbacks": 0, "low_degree": 0}
+_coloring_stats_lock = threading.Lock()
+
+def _count(*colorers):
+    # Layouts may run in several threads at once, see layout
+    with _coloring_stats_lock:
+        for colorer in colorers:
+            coloring_stats[colorer] += 1
 
 def clique(H, nodes, v):
     """
@@ -25,17 +42,17 @@ def clique(H, nodes, v):
     if count == 2:
         v1 = (v, real_nodes[0])
         v2 = (v, real_nodes[1])
-        if v1 not in list(H.neighbors(v2)):
+        if v1 not in H[v2]:
             H.add_edge(v1, v2)
     elif count == 3:
         v1 = (v, real_nodes[0])
         v2 = (v, real_nodes[1])
         v3 = (v, real_nodes[2])
-        if v1 not in list(H.neighbors(v2)):
+        if v1 not in H[v2]:
             H.add_edge(v1, v2)
-        if v1 not in list(H.neighbors(v3)):
+        if v1 not in H[v3]:
             H.add_edge(v1, v3)
-        if v3 not in list(H.neighbors(v2)):
+        if v3 not in H[v2]:
             H.add_edge(v2, v3)
 
 def arc_graph(G: Graph, order, arcs_of_G, vertices, edges):
@@ -49,8 +66,9 @@ def arc_graph(G: Graph, order, arcs_of_G, vertices, edges):
     :param edges: List of edges in G.
     :return: The auxiliary graph H.
     """
-    H = Graph()
-    H.set_vertices(arcs_of_G)
+    # H only needs its adjacency, so it is a plain networkx graph without arc attributes
+    H = nx.Graph()
+    H.add_nodes_from(arcs_of_G)
 
     for v in vertices:
         ordered_v = order_neighbor(order, list(G.neighbors(v))+[v])
@@ -65,12 +83,12 @@ def arc_graph(G: Graph, order, arcs_of_G, vertices, edges):
         if type_v in [[6, 0], [5, 0]]:
             v1 = (v, ordered_v[v_in_v + 2])
             v2 = (ordered_v[v_in_v + 1], v)
-            if v1 not in list(H.neighbors(v2)):
+            if v1 not in H[v2]:
                 H.add_edge(v1, v2)
         elif type_v in [[0, 6], [0, 5]]:
             v1 = (v, ordered_v[v_in_v - 2])
             v2 = (ordered_v[v_in_v - 1], v)
-            if v1 not in list(H.neighbors(v2)):
+            if v1 not in H[v2]:
                 H.add_edge(v1, v2)
 
     # Step b
@@ -82,21 +100,19 @@ def arc_graph(G: Graph, order, arcs_of_G, vertices, edges):
         if not arc1_info['special'] and not arc2_info['special']:
             v1 = arc1
             v2 = arc2
-            if v1 not in list(H.neighbors(v2)):
+            if v1 not in H[v2]:
                 H.add_edge(v1, v2)
 
-    # Step c
-    for arc1 in arcs_of_G:
-        arc1_info = G.get_arc(arc1[0],arc1[1])
-        if arc1_info["movement"]:
-            for arc2 in arcs_of_G:
-                if arc2 != arc1:
-                    arc2_info = G.get_arc(arc2[0],arc2[1])
-                    if arc2_info["start"] == arc1_info["end"] and arc2_info["movement"]:
-                        v1 = arc1
-                        v2 = arc2
-                        if v1 not in list(H.neighbors(v2)):
-                            H.add_edge(v1, v2)
+    # Step c, with the movement arcs grouped by their start instead of scanning all arcs for
+    # every movement arc. The edges are added in the same order as by that scan.
+    movement_arcs = [arc for arc in arcs_of_G if G.get_arc(arc[0], arc[1])["movement"]]
+    starting_at = {}
+    for arc in movement_arcs:
+        starting_at.setdefault(arc[0], []).append(arc)
+    for arc1 in movement_arcs:
+        for arc2 in starting_at.get(arc1[1], ()):
+            if arc2 != arc1 and arc1 not in H[arc2]:
+                H.add_edge(arc1, arc2)
     
     return H
 
@@ -104,23 +120,37 @@ def clean_up(H: Graph, G: Graph, order):
     """
     Clean up the auxiliary graph H by considering vertex properties and simplifying the structure.
 
-    :param H: Auxiliary graph.
-    :return: A tuple of the cleaned-up graph and a mapping of merged vertices.
+    H is cleaned in place rather than copied. The vertices to remove and merge are chosen
+    first, the edges of H that transfer_coloring reads are then set aside, see layer_graph,
+    and only after that are the removals and merges carried out on H, in the order chosen.
+
+    :param H: Auxiliary graph, which becomes the cleaned-up graph.
+    :return: A tuple of the cleaned-up graph H, the reduced graph of layer_graph, a mapping of
+        merged vertices and the vertices removed in layers 1 and 2.
     """
-    H_cleaned = copy.deepcopy(H)
     merged_vertices = {}
     layer1 = []
     layer2 = []
     G_vertices = list(G.nodes())
+    removed = set()
+    # (vertex, representative) in order, the representative None for a vertex only removed
+    steps = []
+
+    def present(vertex):
+        return vertex in H and vertex not in removed
+
+    def remove(vertex, layer):
+        layer.append(vertex)
+        removed.add(vertex)
+        steps.append((vertex, None))
 
     for v in G_vertices:
         if G.degree(v) == 6:
             ordered_v = order_neighbor(order, list(G.neighbors(v))+[v])
             type_v = vertex_type(v, ordered_v)
             nodes = table3(v, type_v, ordered_v)
-            if type_v[0] != type_v[1] and (v, nodes[2]) in list(H_cleaned.nodes()):
-                layer1.append((v, nodes[2]))
-                H_cleaned.remove_node((v, nodes[2]))
+            if type_v[0] != type_v[1] and present((v, nodes[2])):
+                remove((v, nodes[2]), layer1)
 
     for v in G_vertices:
         ordered_v = order_neighbor(order, list(G.neighbors(v))+[v])
@@ -135,26 +165,20 @@ def clean_up(H: Graph, G: Graph, order):
             type_v2 = vertex_type(v2, ordered_v2)
             if type_v1 == [1, 4] or type_v1 == [1, 5] or type_v1 == [4, 1] or type_v1 == [5, 1]:
                 nodes_v1 = table3(v1, type_v1, ordered_v1)
-                if (v1,nodes_v1[1]) in list(H_cleaned.nodes()):
+                if present((v1, nodes_v1[1])):
                     merged_vertices[(v, v2)] = (v1, nodes_v1[1])
-                    for neighbor in list(H_cleaned.neighbors((v1, nodes_v1[1]))):
-                        if neighbor not in list(H_cleaned.neighbors((v, v2))):
-                            H_cleaned.add_edge((v, v2), neighbor)
-                    H_cleaned.remove_node((v1, nodes_v1[1]))
-                if (v1, v) in list(H_cleaned.nodes()):
-                    layer2.append((v1,v))
-                    H_cleaned.remove_node((v1, v))
-                if (v, v1) in list(H_cleaned.nodes()):
-                    layer2.append((v,v1))
-                    H_cleaned.remove_node((v, v1))
+                    removed.add((v1, nodes_v1[1]))
+                    steps.append(((v1, nodes_v1[1]), (v, v2)))
+                if present((v1, v)):
+                    remove((v1, v), layer2)
+                if present((v, v1)):
+                    remove((v, v1), layer2)
                 if type_v2 == [1, 4] or type_v2 == [1, 5] or type_v2 == [4, 1] or type_v2 == [5, 1]:
-                    if (v2,v) in list(H_cleaned.nodes()):
-                        layer2.append((v2,v))
-                        H_cleaned.remove_node((v2,v))
+                    if present((v2,v)):
+                        remove((v2,v), layer2)
             else:
-                if (v, v1) in list(H_cleaned.nodes()):
-                    layer2.append((v, v1))
-                    H_cleaned.remove_node((v, v1))
+                if present((v, v1)):
+                    remove((v, v1), layer2)
         elif type_v == [1, 4] or type_v == [1, 5] or type_v == [4, 1] or type_v == [5, 1]:
             vm1 = nodes[0]
             ordered_vm1 = order_neighbor(order, list(G.neighbors(vm1))+[vm1])
@@ -164,17 +188,44 @@ def clean_up(H: Graph, G: Graph, order):
             else:
                 vm11 = ordered_vm1[ordered_vm1.index(vm1)-1]
             if not (type_vm1 == [0,5] or type_vm1 == [5,0]) and not vm11 == v:
-                if (v, vm1) in list(H_cleaned.nodes()):
-                    layer2.append((v,vm1))
-                    H_cleaned.remove_node((v,vm1))
+                if present((v, vm1)):
+                    remove((v,vm1), layer2)
         elif type_v == [0,4] or type_v == [4,0]:
-                if (v, nodes[0]) in list(H_cleaned.nodes()):
-                    layer2.append((v, nodes[0]))
-                    H_cleaned.remove_node((v, nodes[0]))
-        
-    return H_cleaned, merged_vertices, layer1, layer2
+                if present((v, nodes[0])):
+                    remove((v, nodes[0]), layer2)
+
+    reduced = layer_graph(H, layer1 + layer2)
+    for vertex, representative in steps:
+        if representative is not None:
+            for neighbor in list(H.neighbors(vertex)):
+                if neighbor not in H[representative]:
+                    H.add_edge(representative, neighbor)
+        H.remove_node(vertex)
+    return H, reduced, merged_vertices, layer1, layer2
 
-def transfer_coloring(H: Graph, H_cleaned, merged_vertices, cleaned_colors, layer1, layer2):
+def layer_graph(H, layers):
+    """
+    Reduce the auxiliary graph to what transfer_coloring reads of it.
+
+    :param H: Auxiliary graph.
+    :param layers: Vertices of H removed by clean_up.
+    :return: A graph with all vertices of H and only the edges of H at vertices in layers.
+    """
+    reduced = nx.Graph()
+    reduced.add_nodes_from(H)
+    reduced.add_edges_from(H.edges(layers))
+    return reduced
+
+def _conflict_color(H, colors, vertex):
+    """
+    :return: The lowest color of none of the neighbours of vertex in H that leave the same
+        vertex of G. These are the arcs on its side, of which table3 puts at most three, so
+        the arcs at every vertex keep distinct ports.
+    """
+    used = {colors[neighbor] for neighbor in H.neighbors(vertex) if neighbor[0] == vertex[0]}
+    return min(color for color in range(3) if color not in used)
+
+def transfer_coloring(H: Graph, H_cleaned, merged_vertices, cleaned_colors, layer1, layer2, conflicts=None):
     """
     Transfer 3-coloring from H_cleaned to the original graph H using merged vertices information.
 
@@ -182,6 +233,9 @@ def transfer_coloring(H: Graph, H_cleaned, merged_vertices, cleaned_colors, laye
     :param H_cleaned: Cleaned auxiliary graph.
     :param merged_vertices: Mapping of merged vertices in H_cleaned to their original counterparts in H.
     :param coloring_cleaned: 3-coloring of H_cleaned.
+    :param conflicts: Optional list. If given, a removed vertex whose neighbours already take
+        all three colors is appended to it instead of failing, and takes the lowest color of
+        none of the arcs leaving the same vertex on the same side, see _conflict_color.
     :return: A dictionary mapping vertices in H to their colors.
     """
     colors = {v: None for v in H.nodes}
@@ -202,7 +256,10 @@ def transfer_coloring(H: Graph, H_cleaned, merged_vertices, cleaned_colors, laye
             if color not in neighbor_colors:
                 colors[vertex] = color
         if colors[vertex] is None:
-            raise ValueError(f"Failed to assign color to vertex {vertex}.")
+            if conflicts is None:
+                raise ValueError(f"Failed to assign color to vertex {vertex}.")
+            colors[vertex] = _conflict_color(H, colors, vertex)
+            conflicts.append(vertex)
 
     for vertex in layer1:
         neighbor_colors = {colors[neighbor] for neighbor in H.neighbors(vertex) if colors[neighbor] is not None}
@@ -210,18 +267,129 @@ def transfer_coloring(H: Graph, H_cleaned, merged_vertices, cleaned_colors, laye
             if color not in neighbor_colors:
                 colors[vertex] = color
         if colors[vertex] is None:
-            raise ValueError(f"Failed to assign color to vertex {vertex}.")
+            if conflicts is None:
+                raise ValueError(f"Failed to assign color to vertex {vertex}.")
+            colors[vertex] = _conflict_color(H, colors, vertex)
+            conflicts.append(vertex)
             
     return colors
 
-def port_assignment(G: Graph, order):
+def color_arc_graph(H_cleaned, coloring="lovasz", time_budget=None):
+    """
+    3-color the cleaned arc graph.
+
+    :param H_cleaned: Cleaned auxiliary graph.
+    :param coloring: "lovasz", "greedy" (DSatur with Kempe chain repair), or "auto" to run
+        lovasz and fall back to greedy when it fails or exceeds time_budget.
+    :param time_budget: Seconds allowed for the lovasz coloring, or None for no limit.
+    :return: A dictionary mapping vertices of H_cleaned to colors.
+    """
+    if coloring not in ("lovasz", "greedy", "auto"):
+        raise ValueError(f"Unknown coloring {coloring!r}, expected 'lovasz', 'greedy' or 'auto'")
+
+    if coloring == "greedy":
+        _count("greedy")
+        return greedy_3_coloring(H_cleaned)
+
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    _count("lovasz")
+    if coloring == "lovasz":
+        return lovasz_3_coloring(H_cleaned, deadline)
+    try:
+        return lovasz_3_coloring(H_cleaned, deadline)
+    except (ValueError, TimeoutError):
+        _count("fallbacks", "greedy")
+        return greedy_3_coloring(H_cleaned)
+
+def _bipartite_edge_coloring(ends, count):
+    """
+    Color the edges of a bipartite graph of maximum degree at most 3 with 3 colors, such that
+    edges sharing a vertex differ, as König's theorem guarantees possible.
+
+    :param ends: List of (x, y) tuples, the vertices of every edge, x in one part and y in the other.
+    :param count: Number of vertices, which are numbered from 0.
+    :return: List with the color of every edge.
+    """
+    at = [[None, None, None] for _ in range(count)]  # Edge of each color at each vertex
+    colors = [None] * len(ends)
+    for e, (x, y) in enumerate(ends):
+        alpha = at[x].index(None)
+        beta = at[y].index(None)
+        if at[y][alpha] is not None:
+            # Swap alpha and beta on the path from y whose edges alternate between them. As
+            # alpha is free at x and the graph is bipartite, the path does not reach x.
+            path = []
+            z, color = y, alpha
+            while at[z][color] is not None:
+                f = at[z][color]
+                path.append(f)
+                z = ends[f][0] if ends[f][1] == z else ends[f][1]
+                color = beta if color == alpha else alpha
+            for f in path:
+                for z in ends[f]:
+                    at[z][colors[f]] = None
+            for f in path:
+                colors[f] = beta if colors[f] == alpha else alpha
+                for z in ends[f]:
+                    at[z][colors[f]] = f
+        colors[e] = alpha
+        at[x][alpha] = e
+        at[y][alpha] = e
+    return colors
+
+def low_degree_port_assignment(G: Graph, order):
+    """
+    Assign ports to the arcs of a graph of maximum degree at most LOW_DEGREE directly, without
+    the arc graph.
+
+    No vertex of such a graph has four neighbours on one side, so table3 puts the arcs to the
+    later neighbours of a vertex on one side and the arcs to its earlier neighbours on the
+    other, and movement_special marks no arc. The arc graph is then a clique per side and an
+    edge per pair of opposite arcs, which clean_up leaves as it is. A 3-coloring of it is read
+    off a 3-edge-coloring of G with every vertex split into a copy for its later and a copy for
+    its earlier neighbours, a bipartite graph of maximum degree 3: the arc from the earlier end
+    of an edge gets the color of the edge, and the arc back the next color.
+
+    :param G: The graph object.
+    :param order: The order of vertices.
+    """
+    rank = {v: i for i, v in enumerate(order)}
+    edges = []
+    ends = []
+    for _, _, arcs in G.edges(data="arcs"):
+        forward, backward = arcs if rank[arcs[0]["start"]] < rank[arcs[0]["end"]] else reversed(arcs)
+        edges.append((forward, backward))
+        # Vertex 2i stands for the later neighbours of the vertex at rank i, 2i + 1 for the earlier ones
+        ends.append((2 * rank[forward["start"]], 2 * rank[forward["end"]] + 1))
+    for (forward, backward), color in zip(edges, _bipartite_edge_coloring(ends, 2 * len(order))):
+        forward["orientation"] = 1
+        forward["color"] = color
+        backward["orientation"] = -1
+        backward["color"] = (color + 1) % 3
+    G.port_map = PortMap.from_graph(G)
+
+def port_assignment(G: Graph, order, coloring="lovasz", time_budget=None, conflicts=None):
     """
     Assign ports to arcs in the graph based on vertex types and order.
 
+    Graphs of maximum degree at most LOW_DEGREE take the direct path of
+    low_degree_port_assignment, where coloring and time_budget do not apply.
+
     :param G: The graph object.
     :param order: The order of vertices.
+    :param coloring: Colorer for the arc graph, see color_arc_graph.
+    :param time_budget: Seconds allowed for the lovasz coloring, see color_arc_graph.
+    :param conflicts: Optional list, for orders that are not balanced. If given, arcs the
+        coloring cannot be transferred to are appended to it instead of failing, see
+        transfer_coloring. The ports at every vertex stay distinct, but the drawing may have
+        crossings at these arcs that crossing_removal does not resolve.
     :return: None.
     """
+    if max((d for _, d in G.degree()), default=0) <= LOW_DEGREE:
+        _count("low_degree")
+        low_degree_port_assignment(G, order)
+        return
+
     arcs_of_G = G.get_arcs()
     vertices = list(G.nodes)
     edges = list(G.edges)
@@ -267,16 +435,23 @@ def port_assignment(G: Graph, order):
 
     # Step 1: Create and clean up the auxiliary graph
     H = arc_graph(G, order, arcs_of_G, vertices, edges)
-    H_cleaned, merged_vertices, layer1, layer2 = clean_up(H, G, order)
+    # clean_up turns H into H_cleaned in place, keeping only what transfer_coloring reads of
+    # the original H
+    H_cleaned, H, merged_vertices, layer1, layer2 = clean_up(H, G, order)
 
-    # Step 2: Apply Lovasz's 3-coloring to the cleaned graph
-    coloring_cleaned = lovasz_3_coloring(H_cleaned)
+    # Step 2: 3-color the cleaned graph, with Lovasz's algorithm unless told otherwise
+    coloring_cleaned = color_arc_graph(H_cleaned, coloring, time_budget)
 
     # Step 3: Transfer coloring back to the original graph
-    final_coloring = transfer_coloring(H, H_cleaned, merged_vertices, coloring_cleaned, layer1, layer2)
+    final_coloring = transfer_coloring(H, H_cleaned, merged_vertices, coloring_cleaned, layer1, layer2, conflicts)
+    H.clear()
+    H_cleaned.clear()
+    del H, H_cleaned, merged_vertices, coloring_cleaned
 
     # Step 4: Assign colors to ports
     for arc in arcs_of_G:
         arc_color = final_coloring[arc]
         arc_info = G.get_arc(arc[0],arc[1])
         arc_info["color"] = arc_color
+
+    G.port_map = PortMap.from_graph(G)
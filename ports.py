@@ -0,0 +1,136 @@
+import networkx as nx
+import numpy as np
+
+from graph_embedding.graph import Graph
+
+# Number of set bits of every possible mask
+_POPCOUNT = np.array([bin(mask).count("1") for mask in range(256)], dtype=np.uint8)
+
+
+def port_index(color, orientation):
+    """
+    Number the six ports of a vertex: 2 * color for the positive and 2 * color + 1 for the
+    negative direction, so +X, -X, +Y, -Y, +Z, -Z are 0 to 5.
+
+    :param color: Axis of the port, 0, 1 or 2.
+    :param orientation: 1 or -1.
+    :return: The port index.
+    """
+    return 2 * color + (orientation == -1)
+
+class PortMap:
+    """
+    Port occupancy of every vertex as a 6-bit mask, kept next to the port used by each arc.
+    """
+
+    def __init__(self, vertices):
+        """
+        :param vertices: List of vertex ids.
+        """
+        self.index = {v: i for i, v in enumerate(vertices)}
+        self.masks = np.zeros(len(self.index), dtype=np.uint8)
+        # Arcs per port, above one only while an assignment is in conflict
+        self.port_counts = np.zeros((len(self.index), 6), dtype=np.uint8)
+        self.arcs_assigned = np.zeros(len(self.index), dtype=np.uint8)
+        self.arc_ports = {}
+
+    @classmethod
+    def from_graph(cls, graph: Graph):
+        """
+        Build the port map from the color and orientation of every arc of a graph.
+
+        :param graph: The graph object.
+        :return: A PortMap.
+        """
+        port_map = cls(list(graph.nodes))
+        for _, _, arcs in graph.edges(data="arcs"):
+            for arc in arcs:
+                if arc["color"] is not None and arc["orientation"] is not None:
+                    port_map.assign(arc["start"], arc["end"], arc["color"], arc["orientation"])
+        return port_map
+
+    def assign(self, start_id, end_id, color, orientation):
+        """
+        Record that the arc from start_id to end_id leaves through the given port.
+
+        :param start_id: ID of the start vertex.
+        :param end_id: ID of the end vertex.
+        :param color: Axis of the port.
+        :param orientation: 1 or -1.
+        :return: False if the port was already occupied by another arc, otherwise True.
+        """
+        port = port_index(color, orientation)
+        i = self.index[start_id]
+        free = self.port_counts[i, port] == 0
+        self.port_counts[i, port] += 1
+        self.masks[i] |= 1 << port
+        self.arcs_assigned[i] += 1
+        self.arc_ports[(start_id, end_id)] = port
+        return free
+
+    def release(self, start_id, end_id):
+        """
+        Free the port of the arc from start_id to end_id.
+
+        :param start_id: ID of the start vertex.
+        :param end_id: ID of the end vertex.
+        """
+        port = self.arc_ports.pop((start_id, end_id))
+        i = self.index[start_id]
+        self.arcs_assigned[i] -= 1
+        self.port_counts[i, port] -= 1
+        if self.port_counts[i, port] == 0:
+            self.masks[i] &= ~np.uint8(1 << port)
+
+    def swap(self, arc1, arc2):
+        """
+        Update the map after the colors and orientations of two arcs have been swapped.
+
+        :param arc1: Dictionary of the first arc, holding its new color and orientation.
+        :param arc2: Dictionary of the second arc, holding its new color and orientation.
+        """
+        self.release(arc1["start"], arc1["end"])
+        self.release(arc2["start"], arc2["end"])
+        self.assign(arc1["start"], arc1["end"], arc1["color"], arc1["orientation"])
+        self.assign(arc2["start"], arc2["end"], arc2["color"], arc2["orientation"])
+
+    def is_free(self, vertex_id, color, orientation):
+        """
+        Check in O(1) whether a port of a vertex is unused.
+
+        :param vertex_id: ID of the vertex.
+        :param color: Axis of the port.
+        :param orientation: 1 or -1.
+        :return: True if no arc leaves the vertex through the port.
+        """
+        return not self.masks[self.index[vertex_id]] & (1 << port_index(color, orientation))
+
+    def port_of(self, start_id, end_id):
+        """
+        :return: The port index of the arc from start_id to end_id.
+        """
+        return self.arc_ports[(start_id, end_id)]
+
+    def conflicts(self):
+        """
+        Find the vertices where two arcs share a port.
+
+        :return: List of vertex ids.
+        """
+        vertices = list(self.index)
+        return [vertices[i] for i in np.flatnonzero(_POPCOUNT[self.masks] != self.arcs_assigned)]
+
+    def is_valid(self, graph: Graph = None):
+        """
+        Check that no two arcs of a vertex share a port, and optionally that every arc of the
+        graph has a port.
+
+        :param graph: If given, also require as many assigned arcs at each vertex as its degree.
+        :return: True if the port assignment is valid.
+        """
+        if np.any(_POPCOUNT[self.masks] != self.arcs_assigned):
+            return False
+        if graph is not None:
+            degrees = np.fromiter((graph.degree(v) for v in self.index), dtype=np.int64, count=len(self.index))
+            return bool(np.all(self.arcs_assigned == degrees))
+        return True
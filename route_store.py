@@ -0,0 +1,274 @@
+import networkx as nx
+import numpy as np
+import itertools
+
+from graph_embedding.graph import Graph
+
+# Marks a delta-encoded move whose end point is not a point of the route
+CONTINUED = np.uint8(0x80)
+
+# Routes have at most six points, see edge_construction
+MAX_ROUTE_POINTS = 6
+
+
+class RouteStore:
+    """
+    Edge routes in one int32 point buffer with per-edge offsets.
+
+    The route of edge i is `points[offsets[i]:offsets[i + 1]]`, or its first `lengths[i]`
+    points in a store made by allocate, which leaves room for MAX_ROUTE_POINTS per edge.
+    Unlike `route` lists, the stored points are copies and do not alias the vertex positions.
+
+    edge_construction allocates a store as `graph.routes`, and edge_routing writes every route
+    into it and keeps a view of it as the `route` of the edge, so crossing_removal and
+    grid_compaction work on the buffer. packed drops the room left between the routes.
+    """
+
+    def __init__(self, edges, points, offsets, lengths=None):
+        """
+        :param edges: List of (start_id, end_id) tuples.
+        :param points: int32 array of shape (P, 3).
+        :param offsets: int64 array of shape (m + 1,) indexing into points.
+        :param lengths: Optional array of shape (m,) with the number of points of each route,
+            if the routes do not fill the room between the offsets.
+        """
+        if len(offsets) != len(edges) + 1:
+            raise ValueError(f"{len(offsets)} offsets given for {len(edges)} edges")
+        self.edges = edges
+        self.points = points
+        self.offsets = offsets
+        self.lengths = lengths
+        self._index = None
+
+    @classmethod
+    def allocate(cls, graph: Graph, capacity=MAX_ROUTE_POINTS):
+        """
+        Make room for the routes of a graph, to be written by set_route. The edges are in graph
+        order, each from the start to the end of its first arc, the direction of its route.
+
+        :param graph: The graph object with arcs.
+        :param capacity: Number of points each route may have.
+        :return: A RouteStore with empty routes.
+        """
+        edges = [(arcs[0]["start"], arcs[0]["end"]) for _, _, arcs in graph.edges(data="arcs")]
+        points = np.zeros((capacity * len(edges), 3), dtype=np.int32)
+        offsets = np.arange(0, capacity * (len(edges) + 1), capacity, dtype=np.int64)
+        return cls(edges, points, offsets, np.zeros(len(edges), dtype=np.uint8))
+
+    @classmethod
+    def from_routes(cls, edges, routes):
+        """
+        Pack a sequence of routes, each a list of [x, y, z] points.
+
+        :param edges: List of (start_id, end_id) tuples, one per route.
+        :param routes: List of routes.
+        :return: A RouteStore.
+        """
+        lengths = np.fromiter((len(route) for route in routes), dtype=np.int64, count=len(routes))
+        offsets = np.zeros(len(routes) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        coordinates = itertools.chain.from_iterable(itertools.chain.from_iterable(routes))
+        points = np.fromiter(coordinates, dtype=np.int32, count=3 * int(offsets[-1])).reshape(-1, 3)
+        return cls(list(edges), points, offsets)
+
+    @classmethod
+    def from_graph(cls, graph: Graph):
+        """
+        Pack the routes stored in the edge attributes of a graph, copying every point.
+
+        :param graph: A graph on which the routes have been constructed.
+        :return: A RouteStore with the edges in graph order.
+        """
+        edges = []
+        routes = []
+        for u, v, route in graph.edges(data="route"):
+            edges.append((u, v))
+            routes.append(route)
+        return cls.from_routes(edges, routes)
+
+    def __len__(self):
+        return len(self.edges)
+
+    def route(self, i):
+        """
+        Return the route of edge i.
+
+        :param i: Index of the edge.
+        :return: int32 view of shape (k, 3).
+        """
+        start = self.offsets[i]
+        stop = self.offsets[i + 1] if self.lengths is None else start + self.lengths[i]
+        return self.points[start:stop]
+
+    def index(self, start_id, end_id):
+        """
+        :param start_id: ID of the start vertex.
+        :param end_id: ID of the end vertex.
+        :return: Index of the edge from start_id to end_id.
+        """
+        if self._index is None:
+            self._index = {edge: i for i, edge in enumerate(self.edges)}
+        if (start_id, end_id) not in self._index:
+            raise ValueError(f"({start_id}, {end_id}) is not an edge of {self}")
+        return self._index[(start_id, end_id)]
+
+    def route_of(self, start_id, end_id):
+        """
+        Return the route of an edge, oriented from start_id to end_id.
+
+        :param start_id: ID of the start vertex.
+        :param end_id: ID of the end vertex.
+        :return: int32 view of shape (k, 3).
+        """
+        try:
+            return self.route(self.index(start_id, end_id))
+        except ValueError:
+            return self.route(self.index(end_id, start_id))[::-1]
+
+    def set_route(self, i, route):
+        """
+        Write the route of edge i into the room made by allocate.
+
+        :param i: Index of the edge.
+        :param route: The points of the route.
+        :return: int32 view of shape (k, 3) of the stored points.
+        """
+        if self.lengths is None:
+            raise ValueError(f"{self} has no room for new routes, see RouteStore.allocate")
+        start = self.offsets[i]
+        if len(route) > self.offsets[i + 1] - start:
+            raise ValueError(f"Route of {len(route)} points does not fit in the {self.offsets[i + 1] - start} of edge {i}")
+        self.points[start:start + len(route)] = route
+        self.lengths[i] = len(route)
+        return self.points[start:start + len(route)]
+
+    def rows(self):
+        """
+        :return: int64 array of the indices into points of the points of all routes, in order.
+        """
+        if self.lengths is None:
+            return np.arange(self.offsets[-1])
+        lengths = self.lengths.astype(np.int64)
+        packed = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=packed[1:])
+        return np.repeat(self.offsets[:-1] - packed[:-1], lengths) + np.arange(packed[-1])
+
+    def packed(self):
+        """
+        :return: A RouteStore of the same routes without room between them, this one if it has none.
+        """
+        if self.lengths is None:
+            return self
+        offsets = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        np.cumsum(self.lengths, out=offsets[1:])
+        return RouteStore(list(self.edges), self.points[self.rows()], offsets)
+
+    def apply(self, graph: Graph):
+        """
+        Write the routes back into the edge attributes of a graph as lists. The graph keeps no
+        route buffer afterwards, see allocate.
+
+        :param graph: A graph with the same edges.
+        """
+        graph.routes = None
+        for i, (u, v) in enumerate(self.edges):
+            graph.edges[u, v]["route"] = self.route(i).tolist()
+
+    @property
+    def nbytes(self):
+        lengths = 0 if self.lengths is None else self.lengths.nbytes
+        return self.points.nbytes + self.offsets.nbytes + lengths
+
+    def encode(self):
+        """
+        Delta-encode the routes as a start point and a sequence of (axis, step) moves.
+
+        :return: A DeltaRoutes.
+        """
+        if self.lengths is not None:
+            return self.packed().encode()
+        m = len(self.edges)
+        lengths = np.diff(self.offsets)
+        if np.any(lengths == 0):
+            raise ValueError("Cannot delta-encode an empty route")
+        starts = self.points[self.offsets[:-1]]
+
+        deltas = np.diff(self.points, axis=0)
+        # Drop the differences between the last point of a route and the first point of the next
+        inside = np.ones(len(deltas), dtype=bool)
+        inside[self.offsets[1:-1] - 1] = False
+        deltas = deltas[inside]
+
+        # A segment becomes one move per axis it changes, a repeated point a zero move along x
+        changes = deltas != 0
+        changes[~changes.any(axis=1), 0] = True
+        rows, axes = np.nonzero(changes)
+        steps = deltas[rows, axes]
+        continued = np.zeros(len(rows), dtype=bool)
+        continued[:-1] = rows[1:] == rows[:-1]
+        axes = axes.astype(np.uint8)
+        axes[continued] |= CONTINUED
+        if len(steps):
+            steps = steps.astype(np.min_scalar_type(-int(np.abs(steps).max()) - 1))
+
+        edge_of_segment = np.repeat(np.arange(m), lengths - 1)
+        moves = np.bincount(edge_of_segment, weights=changes.sum(axis=1), minlength=m).astype(np.int64)
+        move_offsets = np.zeros(m + 1, dtype=np.int64)
+        np.cumsum(moves, out=move_offsets[1:])
+        return DeltaRoutes(self.edges, starts, axes, steps, move_offsets)
+
+
+class DeltaRoutes:
+    """
+    Delta-encoded routes: the first point of every route plus one (axis, step) move per segment,
+    the axis as a byte and the signed length in the smallest integer type that fits.
+
+    A segment that is not axis-parallel is stored as one move per axis. All but the last of
+    these carry the CONTINUED bit in their axis byte, so decoding restores the exact points.
+    """
+
+    def __init__(self, edges, starts, axes, steps, move_offsets):
+        """
+        :param edges: List of (start_id, end_id) tuples.
+        :param starts: int32 array of shape (m, 3) with the first point of each route.
+        :param axes: uint8 array of shape (M,).
+        :param steps: Signed integer array of shape (M,).
+        :param move_offsets: int64 array of shape (m + 1,) indexing into axes and steps.
+        """
+        self.edges = edges
+        self.starts = starts
+        self.axes = axes
+        self.steps = steps
+        self.move_offsets = move_offsets
+
+    @property
+    def nbytes(self):
+        return self.starts.nbytes + self.axes.nbytes + self.steps.nbytes + self.move_offsets.nbytes
+
+    def decode(self):
+        """
+        Rebuild the full point buffer.
+
+        :return: A RouteStore.
+        """
+        m = len(self.edges)
+        moves = np.diff(self.move_offsets)
+        row_offsets = self.move_offsets + np.arange(m + 1)
+
+        # Each route contributes its start point followed by one displacement per move
+        deltas = np.zeros((int(row_offsets[-1]), 3), dtype=np.int64)
+        first = np.zeros(len(deltas), dtype=bool)
+        first[row_offsets[:-1]] = True
+        deltas[first] = self.starts
+        deltas[~first, self.axes & ~CONTINUED] = self.steps
+
+        # Prefix sums restarted at every route start turn displacements into points
+        points = np.cumsum(deltas, axis=0)
+        base = points[row_offsets[:-1]] - self.starts
+        points -= np.repeat(base, moves + 1, axis=0)
+
+        keep = first.copy()
+        keep[~first] = (self.axes & CONTINUED) == 0
+        kept = np.zeros(len(keep) + 1, dtype=np.int64)
+        np.cumsum(keep, out=kept[1:])
+        return RouteStore(self.edges, points[keep].astype(np.int32), kept[row_offsets])
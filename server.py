@@ -0,0 +1,435 @@
+import networkx as nx
+import numpy as np
+import asyncio
+import itertools
+import multiprocessing
+import os
+import struct
+
+from graph_embedding.graph import Graph
+from graph_embedding.diagonal_layout_and_movement import diagonal_layout_and_movement
+from graph_embedding.layout_arrays import LayoutArrays
+from graph_embedding.route_store import DeltaRoutes, RouteStore
+
+# Every frame is a 4-byte big-endian body length followed by the body, whose first byte is
+# the frame kind
+_FRAME = struct.Struct("!I")
+SUBMIT, CANCEL, RESULT = 1, 2, 3
+
+# SUBMIT: job id, timeout in seconds (0 for none), n, m, then the edges as (m, 2) uint32
+# vertex indices
+_SUBMIT = struct.Struct("<BQdII")
+# CANCEL: job id
+_CANCEL = struct.Struct("<BQ")
+# RESULT: job id and status. OK is followed by n, m, the number of route moves and the byte
+# size of a step, then positions (n, 3) int32, route starts (m, 3) int32, move offsets
+# (m + 1) int64, move axes uint8 and move steps. Other statuses are followed by a message.
+_RESULT = struct.Struct("<BQB")
+_ROUTES = struct.Struct("<IIQB")
+OK, CANCELLED, TIMED_OUT, FAILED = 0, 1, 2, 3
+
+
+def _warm_worker():
+    """
+    Initialize a worker process by running one small layout, so that the first job does not
+    pay for imports and first calls.
+    """
+    G = Graph()
+    for u, v in nx.complete_graph(7).edges:
+        G.add_edge(u, v)
+    diagonal_layout_and_movement(G)
+
+def _layout_job(n, edges):
+    """
+    Lay out a graph in a worker.
+
+    :param n: Number of vertices, named 0 to n - 1.
+    :param edges: uint32 array of shape (m, 2).
+    :return: The RESULT body after job id and status.
+    """
+    G = Graph()
+    for v in range(n):
+        G.add_vertex(v)
+    edges = edges.tolist()
+    for u, v in edges:
+        G.add_edge(u, v)
+    diagonal_layout_and_movement(G)
+
+    positions = np.array([G.nodes[v]["position"] for v in range(n)], dtype=np.int32).reshape(-1, 3)
+    # Routes in the order and direction the edges were sent in
+    routes = RouteStore.from_routes(edges, [G.edges[u, v]["route"] for u, v in edges]).encode()
+    return b"".join([
+        _ROUTES.pack(n, len(edges), len(routes.axes), routes.steps.dtype.itemsize),
+        positions.tobytes(),
+        routes.starts.astype(np.int32).tobytes(),
+        routes.move_offsets.tobytes(),
+        routes.axes.tobytes(),
+        routes.steps.tobytes(),
+    ])
+
+def _worker_main(connection):
+    """
+    Main loop of a worker process: warm up, then lay out every (n, edges) job received on the
+    connection and send back ("ok", payload) or ("error", message).
+    """
+    _warm_worker()
+    while True:
+        try:
+            n, edges = connection.recv()
+        except EOFError:
+            return
+        try:
+            connection.send(("ok", _layout_job(n, edges)))
+        except Exception as e:
+            connection.send(("error", f"{type(e).__name__}: {e}"))
+
+class _Worker:
+    """
+    A warm worker process and the parent end of its pipe.
+    """
+
+    def __init__(self, context):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    async def run(self, n, edges):
+        """
+        Lay out a graph in this worker.
+
+        :return: ("ok", payload) or ("error", message).
+        """
+        self.connection.send((n, edges))
+        return await asyncio.get_running_loop().run_in_executor(None, self.connection.recv)
+
+    def terminate(self):
+        self.process.terminate()
+        self.process.join()
+        self.connection.close()
+
+def decode_result(payload, nodes, edges):
+    """
+    Decode the body of an OK result.
+
+    :param payload: Bytes following job id and status.
+    :param nodes: The vertex ids, in the order they were numbered for submission.
+    :param edges: The (start_id, end_id) tuples, in the order they were submitted.
+    :return: A LayoutArrays.
+    """
+    n, m, moves, itemsize = _ROUTES.unpack_from(payload)
+    offset = _ROUTES.size
+
+    def take(dtype, count):
+        nonlocal offset
+        values = np.frombuffer(payload, dtype=dtype, count=count, offset=offset)
+        offset += values.nbytes
+        return values
+
+    positions = take(np.int32, 3 * n).reshape(n, 3)
+    starts = take(np.int32, 3 * m).reshape(m, 3)
+    move_offsets = take(np.int64, m + 1)
+    axes = take(np.uint8, moves)
+    steps = take(np.dtype(f"<i{itemsize}"), moves)
+    routes = DeltaRoutes(edges, starts, axes, steps, move_offsets).decode()
+    return LayoutArrays(nodes, edges, positions.copy(), routes.points, routes.offsets)
+
+async def _read_frame(reader):
+    """
+    :return: The next frame body, or None at the end of the stream.
+    """
+    try:
+        header = await reader.readexactly(_FRAME.size)
+        return await reader.readexactly(_FRAME.unpack(header)[0])
+    except asyncio.IncompleteReadError:
+        return None
+
+def _frame(*parts):
+    body = b"".join(parts)
+    return _FRAME.pack(len(body)) + body
+
+class LayoutServer:
+    """
+    Serve layouts over a Unix socket or localhost TCP from a pool of warm worker processes.
+
+    Jobs wait in asyncio until a worker is free. Results are sent back on the submitting
+    connection as soon as each job finishes, in any order. A job that is cancelled or times out
+    while running has its worker process terminated and replaced by a fresh one.
+    """
+
+    def __init__(self, path=None, host="127.0.0.1", port=0, workers=None, timeout=None):
+        """
+        :param path: Path of a Unix socket. If None, listen on host and port instead.
+        :param host: Host to listen on, localhost by default.
+        :param port: TCP port, 0 for any free port.
+        :param workers: Number of worker processes, defaults to the number of CPUs.
+        :param timeout: Default time limit of a job in seconds, counted from its submission.
+        """
+        self.path = path
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.timeout = timeout
+        self._context = multiprocessing.get_context()
+        self._workers = []
+        self._idle = None
+        self._server = None
+        self._connections = set()
+
+    async def start(self):
+        """
+        Start the worker processes and begin accepting connections.
+        """
+        self._idle = asyncio.Queue()
+        for _ in range(self.workers or os.cpu_count()):
+            self._add_worker()
+        if self.path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    @property
+    def address(self):
+        """
+        The socket path, or the (host, port) tuple of the TCP socket.
+        """
+        return self.path if self.path is not None else (self.host, self.port)
+
+    async def serve_forever(self):
+        """
+        Serve until cancelled.
+        """
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """
+        Stop accepting connections and shut down the workers.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for connection in list(self._connections):
+            connection.cancel()
+        await asyncio.gather(*self._connections)
+        for worker in self._workers:
+            worker.terminate()
+        self._workers = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _add_worker(self):
+        worker = _Worker(self._context)
+        self._workers.append(worker)
+        self._idle.put_nowait(worker)
+
+    async def _run(self, n, edges):
+        worker = await self._idle.get()
+        try:
+            status, payload = await worker.run(n, edges)
+        except EOFError:
+            self._workers.remove(worker)
+            worker.terminate()
+            self._add_worker()
+            raise ValueError("Worker process died during the layout")
+        except BaseException:
+            # Abandoned mid-layout, the worker cannot be reused
+            self._workers.remove(worker)
+            worker.terminate()
+            self._add_worker()
+            raise
+        self._idle.put_nowait(worker)
+        if status == "error":
+            raise ValueError(payload)
+        return payload
+
+    async def _job(self, writer, job_id, n, edges, timeout):
+        try:
+            payload = await asyncio.wait_for(self._run(n, edges), timeout)
+            frame = _frame(_RESULT.pack(RESULT, job_id, OK), payload)
+        except asyncio.TimeoutError:
+            frame = _frame(_RESULT.pack(RESULT, job_id, TIMED_OUT), f"Job exceeded {timeout} s".encode())
+        except ValueError as e:
+            frame = _frame(_RESULT.pack(RESULT, job_id, FAILED), str(e).encode())
+        except Exception as e:
+            # A worker lost while the job was sent to it, say, must still answer the client;
+            # cancellation is a BaseException and passes through
+            frame = _frame(_RESULT.pack(RESULT, job_id, FAILED), f"{type(e).__name__}: {e}".encode())
+        if not writer.is_closing():
+            writer.write(frame)
+            await writer.drain()
+
+    def _done(self, writer, jobs, job_id, task):
+        del jobs[job_id]
+        # A task cancelled before it started never ran _job, so the reply is sent from here
+        if task.cancelled() and not writer.is_closing():
+            writer.write(_frame(_RESULT.pack(RESULT, job_id, CANCELLED)))
+
+    async def _handle(self, reader, writer):
+        jobs = {}
+        self._connections.add(asyncio.current_task())
+        try:
+            while True:
+                body = await _read_frame(reader)
+                if body is None:
+                    break
+                if body[0] == SUBMIT:
+                    _, job_id, timeout, n, m = _SUBMIT.unpack_from(body)
+                    edges = np.frombuffer(body, dtype="<u4", count=2 * m, offset=_SUBMIT.size).reshape(m, 2)
+                    timeout = timeout or self.timeout
+                    task = asyncio.create_task(self._job(writer, job_id, n, edges, timeout))
+                    jobs[job_id] = task
+                    task.add_done_callback(lambda task, job_id=job_id: self._done(writer, jobs, job_id, task))
+                elif body[0] == CANCEL:
+                    _, job_id = _CANCEL.unpack_from(body)
+                    if job_id in jobs:
+                        jobs[job_id].cancel()
+                else:
+                    raise ValueError(f"Unknown frame kind {body[0]}")
+        except asyncio.CancelledError:
+            pass  # The server is closing
+        finally:
+            self._connections.discard(asyncio.current_task())
+            for task in list(jobs.values()):
+                task.cancel()
+            writer.close()
+
+class LayoutClient:
+    """
+    Submit graphs to a LayoutServer and wait for their layouts.
+    """
+
+    def __init__(self, reader, writer):
+        """
+        Use LayoutClient.connect to open a connection.
+        """
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count()
+        self._pending = {}
+        self._results = {}
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, address):
+        """
+        Connect to a server.
+
+        :param address: Socket path or (host, port) tuple, see LayoutServer.address.
+        :return: A LayoutClient.
+        """
+        if isinstance(address, str):
+            reader, writer = await asyncio.open_unix_connection(address)
+        else:
+            reader, writer = await asyncio.open_connection(*address)
+        return cls(reader, writer)
+
+    async def submit(self, graph, timeout=None):
+        """
+        Queue a graph for layout.
+
+        :param graph: A graph with vertices and edges, attributes are not sent.
+        :param timeout: Time limit in seconds, or None for the server's default.
+        :return: The job id.
+        """
+        nodes = list(graph.nodes)
+        index = {v: i for i, v in enumerate(nodes)}
+        edges = list(graph.edges)
+        if len(nodes) >= 1 << 32:
+            raise ValueError(f"Cannot send {len(nodes)} vertices")
+        pairs = np.array([(index[u], index[v]) for u, v in edges], dtype="<u4").reshape(-1, 2)
+
+        job_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[job_id] = (nodes, edges)
+        self._results[job_id] = future
+        self._writer.write(_frame(_SUBMIT.pack(SUBMIT, job_id, timeout or 0.0, len(nodes), len(edges)), pairs.tobytes()))
+        await self._writer.drain()
+        return job_id
+
+    async def cancel(self, job_id):
+        """
+        Ask the server to cancel a job. Its result then raises asyncio.CancelledError.
+
+        :param job_id: Id returned by submit.
+        """
+        self._writer.write(_frame(_CANCEL.pack(CANCEL, job_id)))
+        await self._writer.drain()
+
+    async def result(self, job_id):
+        """
+        Wait for the layout of a job.
+
+        :param job_id: Id returned by submit.
+        :return: A LayoutArrays.
+        """
+        future = self._results[job_id]
+        try:
+            return await future
+        finally:
+            del self._results[job_id]
+
+    async def layout(self, graph, timeout=None):
+        """
+        Submit a graph and wait for its layout.
+
+        :return: A LayoutArrays.
+        """
+        return await self.result(await self.submit(graph, timeout))
+
+    async def close(self):
+        """
+        Close the connection. The server cancels all jobs still open on it.
+        """
+        self._writer.close()
+        await self._writer.wait_closed()
+        await self._receiver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _receive(self):
+        while True:
+            body = await _read_frame(self._reader)
+            if body is None:
+                break
+            _, job_id, status = _RESULT.unpack_from(body)
+            nodes, edges = self._pending.pop(job_id)
+            future = self._results[job_id]
+            payload = body[_RESULT.size:]
+            if status == OK:
+                future.set_result(decode_result(payload, nodes, edges))
+            elif status == CANCELLED:
+                future.cancel()
+            elif status == TIMED_OUT:
+                future.set_exception(TimeoutError(payload.decode()))
+            else:
+                future.set_exception(ValueError(payload.decode()))
+        for job_id in self._pending:
+            self._results[job_id].cancel()
+
+def serve(path=None, host="127.0.0.1", port=0, workers=None, timeout=None):
+    """
+    Run a LayoutServer until interrupted.
+
+    :param path: Path of a Unix socket. If None, listen on host and port instead.
+    :param host: Host to listen on.
+    :param port: TCP port.
+    :param workers: Number of worker processes.
+    :param timeout: Default time limit of a job in seconds.
+    """
+    asyncio.run(LayoutServer(path, host, port, workers, timeout).serve_forever())
@@ -0,0 +1,277 @@
+import networkx as nx
+import numpy as np
+import heapq
+
+from graph_embedding.graph import Graph
+from graph_embedding.layout_arrays import layout_arrays
+from graph_embedding.metrics import segment_arrays
+
+
+class _AxisSegments:
+    """
+    The segments parallel to one axis, sorted by the line they lie on and then by their start,
+    so that all segments of a line are found by binary search.
+    """
+
+    def __init__(self, axis, edge_ids, starts, steps):
+        """
+        :param axis: 0, 1 or 2.
+        :param edge_ids: Edge index of each segment.
+        :param starts: Start points of the segments, shape (k, 3).
+        :param steps: Displacements of the segments, zero except along axis.
+        """
+        self.axis = axis
+        self.others = [a for a in range(3) if a != axis]
+        ends = starts[:, axis] + steps[:, axis]
+        lo = np.minimum(starts[:, axis], ends)
+        hi = np.maximum(starts[:, axis], ends)
+        c1 = starts[:, self.others[0]]
+        c2 = starts[:, self.others[1]]
+        order = np.lexsort((lo, c2, c1))
+        self.c1 = c1[order]
+        self.c2 = c2[order]
+        self.lo = lo[order]
+        self.hi = hi[order]
+        self.edge_ids = edge_ids[order]
+
+    def line(self, c1, c2):
+        """
+        :return: Tuple (start, stop) of the segments on the line with these coordinates.
+        """
+        i0 = np.searchsorted(self.c1, c1, side="left")
+        i1 = np.searchsorted(self.c1, c1, side="right")
+        j0 = i0 + np.searchsorted(self.c2[i0:i1], c2, side="left")
+        j1 = i0 + np.searchsorted(self.c2[i0:i1], c2, side="right")
+        return j0, j1
+
+    def at(self, point):
+        """
+        :return: Edge indices of the segments through point.
+        """
+        j0, j1 = self.line(point[self.others[0]], point[self.others[1]])
+        x = point[self.axis]
+        # Only segments starting at or before x can contain it
+        k = j0 + np.searchsorted(self.lo[j0:j1], x, side="right")
+        candidates = slice(j0, k)
+        return self.edge_ids[candidates][self.hi[candidates] >= x]
+
+    def in_box(self, lower, upper):
+        """
+        :return: Edge indices of the segments meeting the box.
+        """
+        o1, o2 = self.others
+        i0 = np.searchsorted(self.c1, lower[o1], side="left")
+        i1 = np.searchsorted(self.c1, upper[o1], side="right")
+        c2 = self.c2[i0:i1]
+        meets = (c2 >= lower[o2]) & (c2 <= upper[o2])
+        meets &= (self.lo[i0:i1] <= upper[self.axis]) & (self.hi[i0:i1] >= lower[self.axis])
+        return self.edge_ids[i0:i1][meets]
+
+class _KDTree:
+    """
+    A k-d tree over the vertex positions. Every node holds a contiguous run of the permuted
+    vertex indices and the bounding box of their positions; a node with more than leaf_size
+    vertices is split at the median of the axis along which its box is widest.
+    """
+
+    def __init__(self, positions, leaf_size):
+        """
+        :param positions: int array of shape (n, 3).
+        :param leaf_size: Most vertices of a leaf.
+        """
+        self.positions = positions
+        self.index = np.arange(len(positions), dtype=np.int64)
+        self.start = []
+        self.stop = []
+        self.children = []
+        self.lower = []
+        self.upper = []
+        if not len(positions):
+            return
+        stack = [(0, len(positions), self._add(0, len(positions)))]
+        while stack:
+            start, stop, node = stack.pop()
+            if stop - start <= leaf_size:
+                continue
+            points = positions[self.index[start:stop]]
+            axis = int(np.argmax(self.upper[node] - self.lower[node]))
+            middle = (stop - start) // 2
+            self.index[start:stop] = self.index[start:stop][np.argpartition(points[:, axis], middle)]
+            left = self._add(start, start + middle)
+            right = self._add(start + middle, stop)
+            self.children[node] = (left, right)
+            stack.append((start, start + middle, left))
+            stack.append((start + middle, stop, right))
+
+    def _add(self, start, stop):
+        points = self.positions[self.index[start:stop]]
+        self.start.append(start)
+        self.stop.append(stop)
+        self.children.append(None)
+        self.lower.append(points.min(axis=0))
+        self.upper.append(points.max(axis=0))
+        return len(self.start) - 1
+
+    def _distance(self, node, point):
+        """
+        :return: Squared distance from point to the bounding box of node.
+        """
+        gap = np.maximum(np.maximum(self.lower[node] - point, point - self.upper[node]), 0)
+        return float(gap @ gap)
+
+    def nearest(self, point, k):
+        """
+        :return: Tuple of arrays (vertex indices, squared distances) of k vertices closest to point.
+        """
+        # Nodes are visited closest box first until the box of the next one lies farther than
+        # the k-th closest vertex found so far
+        queue = [(self._distance(0, point), 0)]
+        found = []
+        kth = np.inf
+        while queue:
+            distance, node = heapq.heappop(queue)
+            if distance > kth:
+                break
+            if self.children[node] is None:
+                vertices = self.index[self.start[node]:self.stop[node]]
+                offsets = self.positions[vertices] - point
+                found.append((vertices, np.einsum("ij,ij->i", offsets, offsets)))
+                if sum(len(vertices) for vertices, _ in found) >= k:
+                    found = [tuple(map(np.concatenate, zip(*found)))]
+                    kth = np.partition(found[0][1], k - 1)[k - 1]
+            else:
+                for child in self.children[node]:
+                    heapq.heappush(queue, (self._distance(child, point), child))
+        return tuple(map(np.concatenate, zip(*found)))
+
+class SpatialIndex:
+    """
+    Point, box and nearest-neighbour queries over a finished drawing.
+
+    Vertices are kept in a hash for point queries, in a k-d tree for nearest queries and sorted
+    along each axis for box queries. The axis-parallel route segments are kept per axis, sorted by the
+    line they lie on, so a point query costs two binary searches plus the segments of one line.
+    The rare segments that are not axis-parallel are checked one by one.
+
+    Vertices and edges are referred to by their index, as in LayoutArrays.
+    """
+
+    def __init__(self, positions, route_points, route_offsets, leaf_size=16):
+        """
+        :param positions: int array of shape (n, 3) with the vertex positions.
+        :param route_points: int array of shape (P, 3) holding all route points.
+        :param route_offsets: int array of shape (m + 1,) indexing into route_points.
+        :param leaf_size: Most vertices in a leaf of the k-d tree.
+        """
+        self.positions = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+        route_points = np.asarray(route_points, dtype=np.int64).reshape(-1, 3)
+        route_offsets = np.asarray(route_offsets, dtype=np.int64)
+
+        # Vertices
+        self._vertex_at = {tuple(p): v for v, p in enumerate(self.positions.tolist())}
+        self._tree = _KDTree(self.positions, leaf_size)
+        self._sorted = [np.argsort(self.positions[:, axis], kind="stable") for axis in range(3)]
+        self._sorted_values = [self.positions[order, axis] for axis, order in enumerate(self._sorted)]
+
+        # Segments
+        edge_ids, starts, steps = segment_arrays(route_points, route_offsets)
+        moving = steps != 0
+        parallel = moving.sum(axis=1) == 1
+        self._axes = []
+        for axis in range(3):
+            along = parallel & moving[:, axis]
+            self._axes.append(_AxisSegments(axis, edge_ids[along], starts[along], steps[along]))
+        irregular = ~parallel
+        self._irregular_edges = edge_ids[irregular]
+        self._irregular_lower = np.minimum(starts[irregular], starts[irregular] + steps[irregular])
+        self._irregular_upper = np.maximum(starts[irregular], starts[irregular] + steps[irregular])
+
+    @classmethod
+    def from_graph(cls, graph: Graph, leaf_size=16):
+        """
+        Index the drawing of a graph. The vertex and edge indices refer to list(graph.nodes)
+        and list(graph.edges).
+
+        :param graph: A graph on which the layout has been computed.
+        :param leaf_size: See SpatialIndex.
+        :return: A SpatialIndex.
+        """
+        arrays = layout_arrays(graph)
+        return cls(arrays.positions, arrays.route_points, arrays.route_offsets, leaf_size)
+
+    def vertex_at(self, point):
+        """
+        :param point: Grid point (x, y, z).
+        :return: Index of the vertex at point, or None.
+        """
+        return self._vertex_at.get(tuple(int(c) for c in point))
+
+    def edges_at(self, point):
+        """
+        Find the edges whose route passes through a grid point, end points included.
+
+        :param point: Grid point (x, y, z).
+        :return: Sorted array of edge indices.
+        """
+        point = np.asarray(point, dtype=np.int64)
+        found = [segments.at(point) for segments in self._axes]
+        # A point of a segment that is not axis-parallel is checked by its bounding box only
+        inside = np.all((self._irregular_lower <= point) & (point <= self._irregular_upper), axis=1)
+        found.append(self._irregular_edges[inside])
+        return np.unique(np.concatenate(found))
+
+    def query_box(self, lower, upper):
+        """
+        Find the vertices inside and the edges meeting an axis-aligned box, bounds included.
+
+        :param lower: Lower corner (x, y, z).
+        :param upper: Upper corner (x, y, z).
+        :return: Tuple of sorted arrays (vertex indices, edge indices).
+        """
+        lower = np.asarray(lower, dtype=np.int64)
+        upper = np.asarray(upper, dtype=np.int64)
+        if np.any(lower > upper):
+            raise ValueError(f"Empty box from {lower.tolist()} to {upper.tolist()}")
+
+        # Vertices: take the axis with the fewest candidates and filter them on the other two
+        ranges = [(np.searchsorted(values, lower[axis], side="left"), np.searchsorted(values, upper[axis], side="right"))
+                  for axis, values in enumerate(self._sorted_values)]
+        axis = min(range(3), key=lambda a: ranges[a][1] - ranges[a][0])
+        candidates = self._sorted[axis][ranges[axis][0]:ranges[axis][1]]
+        points = self.positions[candidates]
+        vertices = np.sort(candidates[np.all((points >= lower) & (points <= upper), axis=1)])
+
+        found = [segments.in_box(lower, upper) for segments in self._axes]
+        meets = np.all((self._irregular_lower <= upper) & (self._irregular_upper >= lower), axis=1)
+        found.append(self._irregular_edges[meets])
+        return vertices, np.unique(np.concatenate(found))
+
+    def nearest_vertices(self, point, k=1):
+        """
+        Find the k vertices closest to a point in Euclidean distance.
+
+        Nodes of the k-d tree are searched closest first, so a query costs about a logarithmic
+        number of nodes however far the point lies from the drawing. Ties are broken by the
+        lower vertex index.
+
+        :param point: Point (x, y, z), need not be on the grid.
+        :param k: Number of vertices.
+        :return: Array of up to k vertex indices, closest first.
+        """
+        point = np.asarray(point, dtype=np.float64)
+        k = min(k, len(self.positions))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        candidates, distances = self._tree.nearest(point, k)
+        return candidates[np.lexsort((candidates, distances))[:k]]
+
+    def near_vertex(self, v, radius):
+        """
+        Find what lies within a distance of a vertex along every axis.
+
+        :param v: Index of the vertex.
+        :param radius: Half the edge length of the box around the vertex.
+        :return: Tuple of sorted arrays (vertex indices, edge indices), see query_box.
+        """
+        position = self.positions[v]
+        return self.query_box(position - radius, position + radius)
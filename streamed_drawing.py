@@ -0,0 +1,128 @@
+import networkx as nx
+import numpy as np
+
+from graph_embedding.graph import Graph
+from graph_embedding.layout_store import LayoutStore
+from graph_embedding.balanced_ordering import balanced_ordering
+from graph_embedding.movement_special import movement_special
+from graph_embedding.port_assignment import port_assignment
+from graph_embedding.diagonal_layout_and_movement import movement_orders
+from graph_embedding.edge_construction import direction_flags, edge_routing
+from graph_embedding.crossing_removal import _phase1, _phase2
+
+# Rough size of one edge of a chunk Graph (adjacency dicts, arc dicts and route lists), used to
+# turn a memory budget into a chunk size
+CHUNK_BYTES_PER_EDGE = 4096
+
+def chunk_size(memory_budget):
+    """
+    Number of edges a chunk Graph may hold within a memory budget.
+
+    :param memory_budget: Bytes available to a chunk.
+    :return: Edges per chunk, at least 1.
+    """
+    return max(1, memory_budget // CHUNK_BYTES_PER_EDGE)
+
+def stream_positions(store: LayoutStore, memory_budget):
+    """
+    Place every vertex at 3 * (rank + 1) on each axis, as general_position_drawing does.
+
+    :param store: The LayoutStore with ranks filled in.
+    :param memory_budget: Bytes available per chunk.
+    """
+    if np.any(store.rank[:, :1] < 0):
+        raise ValueError(f"{store} has no vertex orders")
+    step = max(1, memory_budget // 64)
+    for start in range(0, store.n, step):
+        stop = min(start + step, store.n)
+        store.positions[start:stop] = 3 * (np.asarray(store.rank[:, start:stop]).T + 1)
+
+def stream_edge_construction(store: LayoutStore, memory_budget):
+    """
+    Route every edge chunk by chunk, writing the routes straight to the store.
+
+    :param store: The LayoutStore with positions and ports filled in.
+    :param memory_budget: Bytes available per chunk.
+    """
+    for start, stop in store.edge_chunks(chunk_size(memory_budget)):
+        edge_ids = np.arange(start, stop)
+        chunk = store.load_chunk(edge_ids)
+        direction_flags(chunk)
+        for _, _, edge in chunk.edges(data=True):
+            edge_routing(edge, chunk)
+        store.store_chunk(chunk, edge_ids)
+
+def _incident_edges(store: LayoutStore, start, stop):
+    """
+    :return: Sorted indices of the edges incident to the vertices start to stop - 1.
+    """
+    return np.unique(store.slot_edges[store.indptr[start]:store.indptr[stop]])
+
+def stream_crossing_removal(store: LayoutStore, memory_budget):
+    """
+    Run both phases of crossing_removal chunk by chunk over ranges of vertices.
+
+    Phase 1 keeps its work list as one flag per vertex and sweeps the chunks until no flag is
+    left. A vertex revisited inside its own chunk is handled in the same sweep, one in another
+    chunk in a later sweep. Chunk Graphs also list neighbours in edge order, so the swaps may
+    come in a different order than in crossing_removal.
+
+    :param store: The LayoutStore with routes constructed.
+    :param memory_budget: Bytes available per chunk.
+    """
+    size = chunk_size(memory_budget)
+
+    # Phase 1
+    pending = np.ones(store.n, dtype=bool)
+    while pending.any():
+        for start, stop in store.vertex_chunks(size):
+            if not pending[start:stop].any():
+                continue
+            edge_ids = _incident_edges(store, start, stop)
+            chunk = store.load_chunk(edge_ids)
+            for v in range(start, stop):
+                while pending[v]:
+                    pending[v] = False
+                    revisit = _phase1(chunk, v)
+                    if revisit:
+                        pending[v] = True
+                        pending[revisit] = True
+            store.store_chunk(chunk, edge_ids)
+
+    # Phase 2
+    for start, stop in store.vertex_chunks(size):
+        edge_ids = _incident_edges(store, start, stop)
+        chunk = store.load_chunk(edge_ids)
+        _phase2(chunk, range(start, stop))
+        store.store_chunk(chunk, edge_ids)
+
+def stream_drawing_layout(G: Graph, directory, memory_budget=1 << 28, strategy="insertion", coloring="lovasz"):
+    """
+    Compute the layout of diagonal_layout_and_movement with the drawing stages streamed over
+    a LayoutStore instead of the graph.
+
+    Only the drawing stages are streamed. Balanced ordering, movement_special and port
+    assignment, including the arc graph H, run on G in memory as usual, so G and H must fit
+    in RAM and graphs larger than RAM are not supported. What the streaming saves is the
+    drawing: positions, edge construction and crossing removal only read and write the store,
+    in chunks sized to memory_budget, and G is left without positions or routes, use
+    LayoutStore.apply to copy them over.
+
+    :param G: The graph object.
+    :param directory: Directory for the store.
+    :param memory_budget: Bytes available to the streamed stages per chunk.
+    :param strategy: Initial ordering strategy handed to balanced_ordering.
+    :param coloring: Colorer for the arc graph in port_assignment, see color_arc_graph.
+    :return: The LayoutStore.
+    """
+    order = balanced_ordering(G, strategy)
+    movement_special(G, order)
+    port_assignment(G, order, coloring)
+    vertex_positions = movement_orders(G, order)
+
+    store = LayoutStore.create(directory, G, vertex_positions)
+    stream_positions(store, memory_budget)
+    stream_edge_construction(store, memory_budget)
+    stream_crossing_removal(store, memory_budget)
+    store.flush()
+    return store
@@ -18,9 +18,9 @@ def table3(v, type_v, ordered_v):
             for i in range(0, type_v[1]):
                 nodes[3 - i - 1] = ordered_v[v_in_v - i - 1]
         if type_v[0] < type_v[1]:
-            for i in range(0, type_v[0]):
-                nodes[3 + i] = ordered_v[v_in_v - i - 1]
             for i in range(0, type_v[1]):
+                nodes[3 + i] = ordered_v[v_in_v - i - 1]
+            for i in range(0, type_v[0]):
                 nodes[3 - i - 1] = ordered_v[v_in_v + i + 1]
 
     if type_v == [4, 0]:
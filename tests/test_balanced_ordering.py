@@ -0,0 +1,113 @@
+import networkx as nx
+import hashlib
+
+import pytest
+
+from graph_embedding.graph import Graph
+from graph_embedding.balanced_ordering import (balanced_ordering, bounded_balanced_ordering, order_potential, _find_move, _rerank,
+                                               _select_round, _update_potential)
+from graph_embedding.helper import order_types
+from graph_embedding.initial_ordering import ORDERING_STRATEGIES, initial_ordering
+
+
+def build(graph):
+    """
+    :return: A Graph of the networkx graph.
+    """
+    G = Graph()
+    for v in graph.nodes:
+        G.add_vertex(v)
+    for u, v in graph.edges:
+        G.add_edge(u, v)
+    return G
+
+@pytest.mark.parametrize("strategy", ORDERING_STRATEGIES)
+@pytest.mark.parametrize("graph", [nx.cycle_graph(12), nx.complete_graph(4), nx.balanced_tree(2, 3)], ids=["cycle", "k4", "tree"])
+def test_balanced(graph, strategy):
+    result = bounded_balanced_ordering(build(graph), strategy)
+    assert result.status == "balanced"
+    assert result.balanced
+
+def test_cycle_balanced_by_moves():
+    G = build(nx.cycle_graph(9))
+    initial = [0, 2, 1, 3, 4, 5, 6, 7, 8]
+    assert order_potential(initial, order_types(G, initial)) > 0
+    result = bounded_balanced_ordering(G, initial=initial)
+    assert result.status == "balanced"
+    assert result.moves > 0
+
+@pytest.mark.parametrize("engine", ["sequential", "rounds"])
+def test_potential_matches_order(engine):
+    G = build(nx.random_regular_graph(6, 60, seed=1))
+    result = bounded_balanced_ordering(G, engine=engine)
+    assert result.potential == order_potential(result.order, order_types(G, result.order))
+    assert result.potentials[-1] == result.potential
+
+def test_default_stall_warns():
+    G = build(nx.random_regular_graph(5, 60, seed=0))
+    assert bounded_balanced_ordering(G).status == "stalled"
+    with pytest.warns(RuntimeWarning):
+        balanced_ordering(G)
+
+def order_hash(order):
+    """
+    :return: A short digest of an order of integer vertices.
+    """
+    return hashlib.sha256(repr(order).encode()).hexdigest()[:12]
+
+# Orders reached by the sequential engine from the insertion ordering, taken from the engine
+# that recomputed the types of the order before every check
+SEQUENTIAL_ORDERS = {
+    "rr3_0": (nx.random_regular_graph(3, 30, seed=0), "converged", 34, "b59bab3847a7"),
+    "rr3_1": (nx.random_regular_graph(3, 30, seed=1), "stalled", 95, "56ee711ed162"),
+    "rr4_2": (nx.random_regular_graph(4, 30, seed=2), "converged", 45, "16ea1db40555"),
+    "rr5_0": (nx.random_regular_graph(5, 30, seed=0), "stalled", 156, "6d99cc74c2e0"),
+    "rr6_3": (nx.random_regular_graph(6, 30, seed=3), "converged", 44, "aa2c50346fe0"),
+    "gnp1": (nx.gnp_random_graph(30, 0.15, seed=1), "stalled", 91, "5afea26252be"),
+}
+
+@pytest.mark.parametrize("name", SEQUENTIAL_ORDERS)
+def test_sequential_orders_pinned(name):
+    graph, status, moves, digest = SEQUENTIAL_ORDERS[name]
+    result = bounded_balanced_ordering(build(graph))
+    assert (result.status, result.moves, order_hash(result.order)) == (status, moves, digest)
+
+@pytest.mark.parametrize("seed", range(3))
+def test_round_matches_moves_one_by_one(seed):
+    G = build(nx.random_regular_graph(6, 60, seed=seed))
+    order = initial_ordering(G, "insertion")
+    rank = {v: i for i, v in enumerate(order)}
+    types = order_types(G, order)
+    degree = max(dict(G.degree()).values())
+    full = {v: d == degree for v, d in G.degree()}
+    check = list(G.edges)
+    batched = 0
+    for _ in range(5):
+        selected, _ = _select_round(G, order, rank, types, degree, full, check, None)
+        if not selected:
+            break
+        batched += len(selected) > 1
+        # Each move in turn, checked against the order left by the moves before it
+        single = list(order)
+        single_rank = dict(rank)
+        single_types = {v: list(t) for v, t in types.items()}
+        for (v, w), found in selected:
+            # Still allowed, though move 4 may now pass a different vertex that is not a neighbour
+            again = _find_move(G, single, single_rank, single_types, degree, v, w)
+            assert again is not None and (again[0], again[1][0]) == (found[0], found[1][0])
+            move, vertices = found
+            span = [single_rank[x] for x in vertices]
+            move(single, *vertices)
+            _rerank(single, single_rank, span)
+            _update_potential(G, single_rank, single_types, set(G.neighbors(v)).union(G.neighbors(w)))
+            assert single_types == order_types(G, single)
+        # The whole round at once, as bounded_balanced_ordering executes it
+        span = [rank[x] for _, (_, vertices) in selected for x in vertices]
+        for _, (move, vertices) in selected:
+            move(order, *vertices)
+        _rerank(order, rank, span)
+        _update_potential(G, rank, types, set().union(*(set(G.neighbors(v)).union(G.neighbors(w)) for (v, w), _ in selected)))
+        assert order == single
+        assert rank == single_rank == {v: i for i, v in enumerate(order)}
+        assert types == single_types == order_types(G, order)
+    assert batched
@@ -0,0 +1,57 @@
+import networkx as nx
+import copy
+
+import pytest
+
+from graph_embedding.graph import Graph
+from graph_embedding.balanced_ordering import bounded_balanced_ordering
+from graph_embedding.movement_special import movement_special
+from graph_embedding.port_assignment import port_assignment
+from graph_embedding.diagonal_layout_and_movement import movement_orders
+from graph_embedding.edge_construction import edge_construction
+from graph_embedding.crossing_removal import crossing_removal, independent_vertex_sets
+
+
+def routed(graph):
+    """
+    :return: A Graph of the networkx graph with its edges routed, before crossing removal.
+    """
+    G = Graph()
+    for v in graph.nodes:
+        G.add_vertex(v)
+    for u, v in graph.edges:
+        G.add_edge(u, v)
+    order = bounded_balanced_ordering(G).order
+    movement_special(G, order)
+    port_assignment(G, order, "greedy")
+    vertex_positions = movement_orders(G, order)
+    for v, features in G.nodes(data=True):
+        features["position"] = [3 * (vertex_positions[i].index(v) + 1) for i in range(3)]
+    edge_construction(G)
+    return G
+
+def drawing(G):
+    """
+    :return: The positions, routes and ports of a Graph.
+    """
+    return ([G.nodes[v]["position"] for v in G.nodes],
+            [(edge["route"].tolist(), [(arc["color"], arc["orientation"], arc["toward"]) for arc in edge["arcs"]])
+             for _, _, edge in G.edges(data=True)],
+            G.port_map.conflicts())
+
+def test_independent_vertex_sets():
+    graph = nx.random_regular_graph(5, 60, seed=0)
+    vertex_sets = independent_vertex_sets(graph)
+    assert sorted(v for vertex_set in vertex_sets for v in vertex_set) == sorted(graph.nodes)
+    assert len(vertex_sets) <= 6
+    for vertex_set in vertex_sets:
+        assert not any(graph.has_edge(u, v) for u in vertex_set for v in vertex_set)
+
+@pytest.mark.parametrize("graph", [nx.petersen_graph(), nx.random_regular_graph(4, 80, seed=1),
+                                   nx.random_regular_graph(6, 60, seed=2)], ids=["petersen", "rr4", "rr6"])
+def test_workers_match_sequential(graph):
+    sequential = routed(graph)
+    parallel = copy.deepcopy(sequential)
+    assert crossing_removal(sequential)
+    assert crossing_removal(parallel, workers=2)
+    assert drawing(parallel) == drawing(sequential)
@@ -0,0 +1,35 @@
+import networkx as nx
+import time
+
+import pytest
+
+from graph_embedding.graph import Graph
+from graph_embedding.diagonal_layout_and_movement import diagonal_layout_and_movement
+
+
+def build(graph):
+    """
+    :return: A Graph of the networkx graph.
+    """
+    G = Graph()
+    for v in graph.nodes:
+        G.add_vertex(v)
+    for u, v in graph.edges:
+        G.add_edge(u, v)
+    return G
+
+@pytest.mark.parametrize("graph", [nx.cycle_graph(10), nx.complete_graph(4), nx.balanced_tree(2, 3)],
+                         ids=["cycle", "k4", "tree"])
+def test_balanced_order_guarantee(graph):
+    report = diagonal_layout_and_movement(build(graph))
+    assert report["guarantees"]["balanced_order"]
+    assert "port_conflicts" not in report
+
+def test_cut_short_order_is_reported():
+    G = build(nx.random_regular_graph(6, 100, seed=0))
+    report = diagonal_layout_and_movement(G, deadline=time.perf_counter())
+    assert not report["guarantees"]["balanced_order"]
+    assert report["port_conflicts"] >= 0
+    for v in G.nodes:
+        ports = [(arc["color"], arc["orientation"]) for arc in (G.get_arc(v, w) for w in G.neighbors(v))]
+        assert len(set(ports)) == len(ports)
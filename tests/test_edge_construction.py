@@ -0,0 +1,37 @@
+import networkx as nx
+
+from graph_embedding.graph import Graph
+from graph_embedding.balanced_ordering import bounded_balanced_ordering
+from graph_embedding.movement_special import movement_special
+from graph_embedding.port_assignment import port_assignment
+from graph_embedding.diagonal_layout_and_movement import movement_orders
+from graph_embedding.edge_construction import direction_flags, edge_routing
+
+
+def placed(graph):
+    """
+    :return: A Graph of the networkx graph with ports assigned and vertices placed.
+    """
+    G = Graph()
+    for v in graph.nodes:
+        G.add_vertex(v)
+    for u, v in graph.edges:
+        G.add_edge(u, v)
+    order = bounded_balanced_ordering(G).order
+    movement_special(G, order)
+    port_assignment(G, order)
+    vertex_positions = movement_orders(G, order)
+    for v, features in G.nodes(data=True):
+        features["position"] = [3 * (vertex_positions[i].index(v) + 1) for i in range(3)]
+    return G
+
+def test_routing_without_direction_flags():
+    graph = nx.random_regular_graph(4, 30, seed=0)
+    flagged = placed(graph)
+    direction_flags(flagged)
+    unflagged = placed(graph)
+    for (_, _, edge), (_, _, bare) in zip(flagged.edges(data=True), unflagged.edges(data=True)):
+        edge_routing(edge, flagged)
+        edge_routing(bare, unflagged)
+        assert [arc["toward"] for arc in bare["arcs"]] == [arc["toward"] for arc in edge["arcs"]]
+        assert bare["route"] == edge["route"]
@@ -0,0 +1,52 @@
+import networkx as nx
+import numpy as np
+import json
+import struct
+
+import pytest
+
+from graph_embedding.export import export_glb
+
+
+def read_glb(path):
+    """
+    :return: Tuple (document, binary) of the JSON chunk and the binary chunk, or None without one.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, length = struct.unpack_from("<4sII", data)
+    assert (magic, version, length) == (b"glTF", 2, len(data))
+    size, kind = struct.unpack_from("<I4s", data, 12)
+    assert kind == b"JSON"
+    document = json.loads(data[20:20 + size])
+    binary = None
+    if 20 + size < len(data):
+        size2, kind = struct.unpack_from("<I4s", data, 20 + size)
+        assert kind == b"BIN\0"
+        binary = data[28 + size:28 + size + size2]
+    return document, binary
+
+DRAWINGS = {
+    "empty": (np.zeros((0, 3)), np.zeros((0, 3)), np.zeros(1, dtype=np.int64)),
+    "no_edges": (np.arange(6).reshape(2, 3), np.zeros((0, 3)), np.zeros(1, dtype=np.int64)),
+    "path": (np.array([[0, 0, 0], [4, 4, 4]]), np.array([[0, 0, 0], [4, 0, 0], [4, 4, 4]]), np.array([0, 3])),
+}
+
+@pytest.mark.parametrize("name", DRAWINGS)
+def test_glb_has_no_empty_accessors(name, tmp_path):
+    positions, route_points, route_offsets = DRAWINGS[name]
+    path = tmp_path / "drawing.glb"
+    export_glb(path, positions, route_points, route_offsets)
+    document, binary = read_glb(path)
+    views = document.get("bufferViews", [])
+    accessors = document.get("accessors", [])
+    assert all(view["byteLength"] > 0 for view in views)
+    assert all(accessor["count"] > 0 for accessor in accessors)
+    primitives = [primitive for mesh in document.get("meshes", []) for primitive in mesh["primitives"]]
+    assert len(primitives) == (len(positions) > 0) + (len(route_points) > 0)
+    for primitive in primitives:
+        assert primitive["attributes"]["POSITION"] < len(accessors) and primitive["indices"] < len(accessors)
+    if views:
+        assert len(binary) == document["buffers"][0]["byteLength"] == sum(view["byteLength"] for view in views)
+    else:
+        assert binary is None and "mesh" not in document["nodes"][0]
@@ -0,0 +1,69 @@
+import networkx as nx
+import importlib
+import random
+
+import pytest
+
+from graph_embedding.graph import Graph
+from graph_embedding.balanced_ordering import bounded_balanced_ordering
+from graph_embedding.movement_special import movement_special
+from graph_embedding.port_assignment import arc_graph, port_assignment
+
+# The package exports the function port_assignment under the name of its module
+port_assignment_module = importlib.import_module("graph_embedding.port_assignment")
+
+
+def subcubic_graph(n, seed):
+    """
+    :return: A random cubic graph on n vertices with about a third of its edges removed.
+    """
+    rng = random.Random(seed)
+    graph = nx.random_regular_graph(3, n, seed=seed)
+    graph.remove_edges_from([e for e in list(graph.edges) if rng.random() < 1 / 3])
+    return graph
+
+GRAPHS = {
+    "cycle": nx.cycle_graph(9),
+    "path": nx.path_graph(8),
+    "petersen": nx.petersen_graph(),
+    "k4": nx.complete_graph(4),
+    **{f"cubic_{seed}": nx.random_regular_graph(3, 40, seed=seed) for seed in range(3)},
+    **{f"subcubic_{seed}": subcubic_graph(40, seed) for seed in range(3)},
+}
+
+def build(graph):
+    """
+    :return: A Graph of the networkx graph.
+    """
+    G = Graph()
+    for v in graph.nodes:
+        G.add_vertex(v)
+    for u, v in graph.edges:
+        G.add_edge(u, v)
+    return G
+
+def prepared(graph, order):
+    """
+    :return: A Graph of the networkx graph with its arcs classified under order.
+    """
+    G = build(graph)
+    movement_special(G, order)
+    return G
+
+@pytest.mark.parametrize("name", GRAPHS)
+def test_low_degree_matches_arc_graph(name, monkeypatch):
+    graph = GRAPHS[name]
+    order = bounded_balanced_ordering(build(graph)).order
+
+    direct = prepared(graph, order)
+    port_assignment(direct, order)
+    monkeypatch.setattr(port_assignment_module, "LOW_DEGREE", -1)
+    general = prepared(graph, order)
+    port_assignment(general, order, coloring="greedy")
+
+    arcs = general.get_arcs()
+    for arc in arcs:
+        assert direct.get_arc(*arc)["orientation"] == general.get_arc(*arc)["orientation"]
+    H = arc_graph(general, order, arcs, list(general.nodes), list(general.edges))
+    for arc1, arc2 in H.edges:
+        assert direct.get_arc(*arc1)["color"] != direct.get_arc(*arc2)["color"]
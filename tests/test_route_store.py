@@ -0,0 +1,51 @@
+import networkx as nx
+import numpy as np
+import pickle
+
+import pytest
+
+from graph_embedding.graph import Graph
+from graph_embedding.diagonal_layout_and_movement import diagonal_layout_and_movement
+from graph_embedding.route_store import RouteStore
+
+
+def drawn(graph, compact=False):
+    """
+    :return: A Graph of the networkx graph, laid out.
+    """
+    G = Graph()
+    for v in graph.nodes:
+        G.add_vertex(v)
+    for u, v in graph.edges:
+        G.add_edge(u, v)
+    diagonal_layout_and_movement(G, compact=compact)
+    return G
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_routes_are_views_of_the_buffer(compact):
+    G = drawn(nx.random_regular_graph(4, 40, seed=0), compact)
+    for u, v, route in G.edges(data="route"):
+        assert np.shares_memory(route, G.routes.points)
+        arc = G.get_edge_data(u, v)["arcs"][0]
+        assert route[0].tolist() == G.nodes[arc["start"]]["position"]
+        assert route[-1].tolist() == G.nodes[arc["end"]]["position"]
+
+    # The routes hold copies of the positions
+    v = next(iter(G.nodes))
+    routes = [route.tolist() for _, _, route in G.edges(v, data="route")]
+    G.nodes[v]["position"][0] += 1000
+    assert [route.tolist() for _, _, route in G.edges(v, data="route")] == routes
+
+def test_pickle_keeps_the_buffer():
+    G = drawn(nx.petersen_graph())
+    H = pickle.loads(pickle.dumps(G))
+    for (_, _, route), (_, _, copied) in zip(G.edges(data="route"), H.edges(data="route")):
+        assert np.shares_memory(copied, H.routes.points)
+        assert copied.tolist() == route.tolist()
+
+def test_packed_matches_from_graph():
+    G = drawn(nx.random_regular_graph(3, 30, seed=1))
+    packed = G.routes.packed()
+    assert packed.lengths is None
+    assert np.array_equal(packed.points, RouteStore.from_graph(G).points)
+    assert np.array_equal(packed.offsets, RouteStore.from_graph(G).offsets)